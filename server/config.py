@@ -32,6 +32,7 @@ class Config:
         
         # Database configuration
         self.database_url = self._get_database_url()
+        self.database_pool_config = self._get_database_pool_config()
         
         # MCP Tool configuration
         self.mcp_endpoint = self._get_mcp_endpoint()
@@ -51,6 +52,12 @@ class Config:
         # Model configuration for different agents
         self.model_config = self._get_model_config()
         
+        # Gemini context caching of the root and WhatsApp agents' static prompt and tools
+        self.context_cache_config = {
+            "enabled": os.getenv("LLM_CONTEXT_CACHE", "true").lower() == "true",
+            "ttl_seconds": int(os.getenv("LLM_CONTEXT_CACHE_TTL", "3600"))
+        }
+        
     def _get_model_config(self) -> dict:
         """Get model configuration for different agents."""
         return {
@@ -65,6 +72,18 @@ class Config:
             "root": os.getenv("LLM_MODEL_ROOT", "gemini-2.5-flash-preview-05-20")
         }
     
+    def _get_database_pool_config(self) -> dict:
+        """Get asyncpg connection pool sizing from environment."""
+        return {
+            # Connections opened up front so the first requests skip connect + auth
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "10")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "50")),
+            # Idle connections above min_size are closed after this many seconds
+            "max_inactive_connection_lifetime": float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300")),
+            # Seconds a request waits for a free connection before failing fast
+            "acquire_timeout": float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "2.0")),
+        }
+        
     def _get_database_url(self) -> str:
         """Get PostgreSQL database URL from environment."""
         # Get full DATABASE_URL first
@@ -135,6 +154,19 @@ class Config:
             "project_id": os.getenv("DISCOVERY_ENGINE_PROJECT_ID", "agent-ai-initiatives"),
             "location": os.getenv("DISCOVERY_ENGINE_LOCATION", "us"),
             "engine_id": os.getenv("DISCOVERY_ENGINE_ID", "app-moe-support-agent-tech_1752497866942"),
+            # Upper bound on concurrent Discovery Engine RPCs per process
+            "max_inflight": int(os.getenv("DISCOVERY_ENGINE_MAX_INFLIGHT", "32")),
+            # Independent gRPC channels (TCP connections) the Ask Mode service spreads RPCs over
+            "channel_pool_size": int(os.getenv("DISCOVERY_ENGINE_CHANNEL_POOL_SIZE", "4")),
+            # Deadline in seconds for one agent search tool call
+            "search_timeout": float(os.getenv("DISCOVERY_ENGINE_SEARCH_TIMEOUT", "10")),
+            # Opt-in reuse of search results for near-duplicate queries (agent search tools)
+            "semantic_cache": {
+                "enabled": os.getenv("DISCOVERY_ENGINE_SEMANTIC_CACHE", "false").lower() == "true",
+                "threshold": float(os.getenv("DISCOVERY_ENGINE_SEMANTIC_CACHE_THRESHOLD", "0.85")),
+                "ttl_seconds": float(os.getenv("DISCOVERY_ENGINE_SEMANTIC_CACHE_TTL", "300")),
+                "max_entries": int(os.getenv("DISCOVERY_ENGINE_SEMANTIC_CACHE_SIZE", "512"))
+            },
             "datastores": {
                 "confluence_runbooks": os.getenv("DISCOVERY_ENGINE_CONFLUENCE_DATASTORE", "moe-confluence-support-runbooks-live-p_1752497946721_page"),
                 "zendesk_tickets": os.getenv("DISCOVERY_ENGINE_ZENDESK_DATASTORE", "moe-gs-zendesk-live-private_1752599941188_gcs_store"),
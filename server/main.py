@@ -1,5 +1,6 @@
 import os
 import uvicorn
+from fastapi.middleware.gzip import GZipMiddleware
 from moe_support_agent.ask_mode.analytics import analytics_router
 from google.adk.cli.fast_api import get_fast_api_app
 from config import config
@@ -26,6 +27,10 @@ app.include_router(analytics_router)
 app.include_router(sessions_router) # we don't have list all session endpoint from adk so for that this endpointl
 app.include_router(prompt_library_router)
 
+# Compress large JSON bodies (session/turn dumps); small health/count responses
+# stay under minimum_size, and SSE streams are excluded by Starlette
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,24 @@
+-- Description: Indexes for the /api/sessions and /api/asksessions listing queries
+-- Both endpoints filter on the creation timestamp and ORDER BY it DESC, and
+-- /api/asksessions also filters on user_id and status.
+-- Not CONCURRENTLY: migrate.py runs each file as one multi-statement script,
+-- which Postgres executes inside an implicit transaction block.
+
+-- sessions is created by the ADK session service on first start, so only
+-- index it once it exists
+DO $$
+BEGIN
+    IF to_regclass('sessions') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_sessions_create_time_desc ON sessions(create_time DESC);
+    END IF;
+END
+$$;
+
+-- Equality on user_id/status, then range + ordering on created_at.
+-- The unfiltered case is served by idx_asksessions_created_at scanned backwards.
+CREATE INDEX IF NOT EXISTS idx_asksessions_user_status_created_at ON asksessions(user_id, status, created_at DESC);
+
+-- Insert migration record
+INSERT INTO migrations (migration_name, checksum) 
+VALUES ('002_session_listing_indexes', 'session_listing_indexes_v1')
+ON CONFLICT (migration_name) DO NOTHING;
@@ -0,0 +1,17 @@
+-- Description: Index for /api/asksessions filtered by user_id alone
+-- 002 added (user_id, status, created_at DESC) for user + status filters, but
+-- that index cannot return one user's sessions across all statuses in
+-- created_at order, so the user-only listing still needed a sort before LIMIT.
+-- No INCLUDE columns: the listings also read session_metadata (JSONB), so an
+-- index-only scan is not reachable and the extra width would only slow writes.
+-- Not CONCURRENTLY: migrate.py runs each file inside an implicit transaction.
+
+CREATE INDEX IF NOT EXISTS idx_asksessions_user_created_at ON asksessions(user_id, created_at DESC);
+
+-- The single-column user_id index is a prefix of the one above
+DROP INDEX IF EXISTS idx_asksessions_user_id;
+
+-- Insert migration record
+INSERT INTO migrations (migration_name, checksum) 
+VALUES ('003_asksessions_user_listing_index', 'asksessions_user_listing_index_v1')
+ON CONFLICT (migration_name) DO NOTHING;
@@ -39,7 +39,7 @@ from .specialists import (
     PushTroubleshootAgent,
     WhatsAppTroubleshootAgent
 )
-from .discovery_engine import search_help_docs_tool, search_runbooks_tool, search_zendesk_tickets_tool
+from .discovery_engine import search_all_sources_tool, search_help_docs_tool, search_runbooks_tool, search_zendesk_tickets_tool
 from .prompts import KNOWLEDGE_AGENT_PROMPT, EXECUTION_AGENT_PROMPT, CAMPAIGN_LOGS_AGENT_PROMPT
 from .solution_utils import generate_final_solution, analyze_root_cause, generate_recommendations
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters, SseConnectionParams
@@ -276,7 +276,7 @@ The more details you can share, the better I can help troubleshoot and resolve y
 
 # --- Create Specialist Agents ---
 # Prepare search tools for specialists
-search_tools = [search_help_docs_tool, search_runbooks_tool, search_zendesk_tickets_tool]
+search_tools = [search_help_docs_tool, search_runbooks_tool, search_zendesk_tickets_tool, search_all_sources_tool]
 
 # Technical Troubleshoot Agent - handles technical debugging with MCP tools
 technical_agent = TechnicalTroubleshootAgent()
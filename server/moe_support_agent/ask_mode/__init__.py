@@ -23,6 +23,7 @@ from .models import (
     ErrorResponse,
     QueryRequest,
     QueryResponse,
+    SessionQueryRequest,
     CitationSource,
     MappedCitation,
     RecommendationsRequest,
@@ -39,6 +40,7 @@ __all__ = [
     "ErrorResponse",
     "QueryRequest",
     "QueryResponse", 
+    "SessionQueryRequest",
     "CitationSource",
     "MappedCitation",
     "RecommendationsRequest",
@@ -8,9 +8,10 @@ import asyncpg
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field, validator
 from moe_support_agent.ask_mode.db import get_db
+from moe_support_agent.ask_mode.errors import AskModeRoute
 
 
-announcement_router = router = APIRouter(tags=["announcements"])
+announcement_router = router = APIRouter(tags=["announcements"], route_class=AskModeRoute)
 
 # ----------------------------
 # Enums and Pydantic Models
@@ -1,6 +1,8 @@
 import asyncpg
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 import asyncio
+import contextlib
+import orjson
 import os
 import sys
 
@@ -10,10 +12,57 @@ from config import config
 
 # Get database URL from configuration
 DB_URL = config.database_url
+POOL_CONFIG = config.database_pool_config
 
-async def get_db():
-    conn = await asyncpg.connect(DB_URL)
+# Shared pool; connections are reused across requests instead of paying
+# a TCP connect + auth handshake per request
+_pool = None
+_pool_lock = asyncio.Lock()
+
+def _encode_json(value) -> str:
+    return orjson.dumps(value).decode()
+
+async def _init_connection(conn):
+    # Decode json/jsonb columns straight into Python objects with orjson,
+    # and accept Python objects as json/jsonb parameters
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=_encode_json,
+            decoder=orjson.loads,
+            schema="pg_catalog",
+        )
+
+async def get_pool():
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                # min_size connections are opened here, so the pool is warm
+                # before the first request is served from it
+                _pool = await asyncpg.create_pool(
+                    DB_URL,
+                    min_size=POOL_CONFIG["min_size"],
+                    max_size=POOL_CONFIG["max_size"],
+                    max_inactive_connection_lifetime=POOL_CONFIG["max_inactive_connection_lifetime"],
+                    init=_init_connection,
+                )
+    return _pool
+
+@contextlib.asynccontextmanager
+async def acquire_connection():
+    """Borrow a pooled connection, failing with 503 when the pool stays exhausted."""
+    pool = await get_pool()
+    try:
+        conn = await pool.acquire(timeout=POOL_CONFIG["acquire_timeout"])
+    except asyncio.TimeoutError:
+        # Pool exhausted; shed load instead of queueing requests indefinitely
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
     try:
         yield conn
     finally:
-        await conn.close()
+        await pool.release(conn)
+
+async def get_db():
+    async with acquire_connection() as conn:
+        yield conn
@@ -0,0 +1,65 @@
+"""
+Error handling shared by the Ask Mode routers.
+"""
+
+import logging
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+logger = logging.getLogger(__name__)
+
+EndpointT = TypeVar("EndpointT", bound=Callable)
+
+
+def internal_error(message: str, error: Optional[str] = None) -> Callable[[EndpointT], EndpointT]:
+    """
+    Declare the 500 detail AskModeRoute reports when an endpoint fails.
+    
+    With ``error`` the detail is ``{"error": error, "message": message,
+    "details": str(exc)}``; without it, it is the string ``f"{message}: {exc}"``.
+    Endpoints that declare nothing get the generic ``"internal"`` code.
+    """
+    def decorator(endpoint: EndpointT) -> EndpointT:
+        endpoint.internal_error = (message, error)
+        return endpoint
+    return decorator
+
+
+def _internal_error_detail(endpoint: Callable, exc: Exception):
+    message, error = getattr(endpoint, "internal_error", ("Internal server error", "internal"))
+    if error is None:
+        return f"{message}: {exc}"
+    return {"error": error, "message": message, "details": str(exc)}
+
+
+class AskModeRoute(APIRoute):
+    """
+    Route class that maps unexpected endpoint errors to a 500 HTTPException.
+
+    Endpoints only raise HTTPException for domain validation; anything else is
+    logged once here and re-raised as HTTPException(500) with the detail the
+    endpoint declared through ``internal_error``. It is rendered by FastAPI's
+    exception middleware (inside CORS) and only for routers that opt in with
+    ``APIRouter(route_class=AskModeRoute)``.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            try:
+                return await handler(request)
+            except (StarletteHTTPException, RequestValidationError):
+                raise
+            except Exception as e:
+                logger.error("Unhandled error on %s %s: %s", request.method, request.url.path, e, exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=_internal_error_detail(self.endpoint, e)
+                )
+
+        return route_handler
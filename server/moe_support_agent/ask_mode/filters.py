@@ -0,0 +1,107 @@
+"""
+WHERE-clause building shared by the session listing endpoints.
+"""
+
+import functools
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(value: str, end_of_day: bool) -> datetime:
+    """
+    Parse a YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS or YYYY-MM-DD HH:MM:SS filter value.
+    
+    Dashboards send the same handful of date strings over and over, so the
+    parsed result is cached. A bare date used as an end bound is pushed to
+    the end of that day for inclusive filtering.
+    """
+    if len(value) == 10:  # YYYY-MM-DD format
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+        return parsed.replace(hour=23, minute=59, second=59) if end_of_day else parsed
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S" if "T" in value else "%Y-%m-%d %H:%M:%S")
+
+
+def _cursor_time(value: datetime, naive_time_column: bool) -> datetime:
+    """
+    Match a cursor timestamp to the time column's type.
+    
+    asyncpg cannot bind an aware datetime to a naive ``timestamp`` column, and
+    binds a naive one to ``timestamptz`` in the server's local zone, so the
+    cursor is converted to UTC and its tzinfo dropped or filled in.
+    """
+    if naive_time_column:
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def build_where(
+    time_column: str,
+    *,
+    id_column: Optional[str] = None,
+    user_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    last_n_days: Optional[int] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[str] = None,
+    naive_time_column: bool = False
+) -> Tuple[Tuple[str, ...], List[Any]]:
+    """
+    Build WHERE conditions and their positional parameters for a session listing.
+    
+    Returns the conditions as a tuple, which doubles as the cache key for the
+    prebuilt SQL of that filter shape, and the parameter values in `$n` order.
+    last_n_days takes precedence over start_date/end_date. after_created_at and
+    after_id form a keyset cursor on (time_column, id_column) and must be given
+    together; set naive_time_column when time_column is a ``timestamp`` without
+    time zone (ADK's sessions table) so the cursor is bound as a naive UTC value.
+    
+    Raises:
+        HTTPException: 400 if start_date or end_date cannot be parsed, or if
+            only half of the cursor is given
+    """
+    conditions = []
+    params: List[Any] = []
+    
+    if user_id:
+        params.append(user_id)
+        conditions.append(f"user_id = ${len(params)}")
+    
+    if status:
+        params.append(status)
+        conditions.append(f"status = ${len(params)}")
+    
+    if last_n_days is not None:
+        params.append(timedelta(days=last_n_days))
+        # The cutoff is computed by Postgres, so the range can use the
+        # time-column index without a client-side timestamp
+        conditions.append(f"{time_column} >= NOW() - ${len(params)}::interval")
+    else:
+        if start_date:
+            try:
+                params.append(_parse_date(start_date, False))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid start_date format: {e}")
+            conditions.append(f"{time_column} >= ${len(params)}")
+        
+        if end_date:
+            try:
+                params.append(_parse_date(end_date, True))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid end_date format: {e}")
+            conditions.append(f"{time_column} <= ${len(params)}")
+    
+    if after_created_at is not None or after_id is not None:
+        if after_created_at is None or after_id is None:
+            raise HTTPException(status_code=400, detail="after_created_at and after_id must be given together")
+        params.append(_cursor_time(after_created_at, naive_time_column))
+        params.append(after_id)
+        # Row comparison matches ORDER BY time DESC, id DESC, so the next
+        # page starts right after the cursor row without an OFFSET scan
+        conditions.append(f"({time_column}, {id_column}) < (${len(params) - 1}, ${len(params)})")
+    
+    return tuple(conditions), params
@@ -129,6 +129,53 @@ class QueryRequest(BaseModel):
         }
 
 
+class SessionQueryRequest(BaseModel):
+    """Request model for creating a session and running its first query in one call."""
+    
+    user_id: str = Field(
+        ..., 
+        description="Unique identifier for the user",
+        min_length=1,
+        max_length=100,
+        example="user_12345"
+    )
+    query: str = Field(
+        ..., 
+        description="The first search query text for the new session",
+        min_length=1,
+        max_length=1000,
+        example="How do I set up push notifications?"
+    )
+    preamble: Optional[str] = Field(
+        None, 
+        description="Custom preamble for answer generation",
+        max_length=2000
+    )
+    data_sources: Optional[List[str]] = Field(
+        None, 
+        description="List of data store IDs to search (defaults to all available)"
+    )
+    max_results: Optional[int] = Field(
+        10, 
+        description="Maximum number of results to return",
+        ge=1,
+        le=50
+    )
+    include_citations: Optional[bool] = Field(
+        True, 
+        description="Include citations in the response"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "user_id": "user_12345",
+                "query": "How do I set up push notifications?",
+                "max_results": 5,
+                "include_citations": True
+            }
+        }
+
 class CitationSource(BaseModel):
     """Source information for a citation."""
     
@@ -6,13 +6,16 @@ including session management and query processing.
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Union
 import uuid
+import asyncio
+import contextlib
 from datetime import datetime, timezone
-import json
+import orjson
 
 from .models import (
     CreateSessionRequest, 
@@ -21,12 +24,16 @@ from .models import (
     QueryRequest,
     QueryResponse,
     RecommendationsRequest,
-    RecommendationsResponse
+    RecommendationsResponse,
+    SessionQueryRequest
 )
-from .services import SessionService, get_session_service
+from .errors import AskModeRoute, internal_error
+from .services import SessionService, get_session_service, DEFAULT_DATA_SOURCES_JOINED
 
 # --- Database Dependency ---
-from moe_support_agent.ask_mode.db import get_db
+from moe_support_agent.ask_mode.db import acquire_connection, get_db
+from moe_support_agent.ask_mode.filters import build_where
+from moe_support_agent.ask_mode.sessions import invalidate_ask_sessions_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +53,127 @@ class StoreConversationTurnRequest(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
     citations: Optional[List[Dict[str, Any]]] = None
 
+def _json_body(model):
+    """
+    Build a dependency that validates the raw request body with the model's
+    compiled core validator, looked up once here instead of per request.
+    
+    Skips FastAPI's generic body solving (JSON decode, then field-by-field
+    validation) for the hot per-turn endpoints; errors keep the usual 422 shape.
+    """
+    validate_json = model.__pydantic_validator__.validate_json
+    
+    async def parse_body(request: Request):
+        try:
+            return validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+    
+    return parse_body
+
+def _json_body_openapi(model) -> Dict[str, Any]:
+    """Document the body a _json_body dependency expects, since FastAPI can't infer it."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
+_parse_create_ask_session = _json_body(CreateAskSessionRequest)
+_parse_conversation_turn = _json_body(StoreConversationTurnRequest)
+
+def _session_row_to_dict(row) -> Dict[str, Any]:
+    """Project an asksessions row; datetime columns are encoded by orjson."""
+    session = dict(row)
+    session.pop("total_count", None)
+    session["session_metadata"] = session["session_metadata"] or {}
+    return session
+
+def _turn_row_to_dict(row) -> Dict[str, Any]:
+    """Project an ask_conversation_turns row; datetime columns are encoded by orjson."""
+    turn = dict(row)
+    turn["metadata"] = turn["metadata"] or {}
+    turn["citations"] = turn["citations"] or None
+    return turn
+
+def _model_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Serialize a response model straight to JSON with pydantic-core.
+    
+    Returning a Response skips FastAPI's re-validation of the model against
+    response_model (kept on the route for OpenAPI) and its dict round-trip.
+    """
+    return Response(
+        content=model.__pydantic_serializer__.to_json(model),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+def _validate_query_request(request: Union[QueryRequest, SessionQueryRequest], service: SessionService) -> None:
+    """Raise a 400 for an empty query or unknown data sources."""
+    # Validate query
+    if not request.query or not request.query.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "validation_error",
+                "message": "Query cannot be empty",
+                "details": "Please provide a valid search query"
+            }
+        )
+    
+    # Validate data sources if provided
+    if request.data_sources:
+        validation_error = service.validate_data_sources(request.data_sources)
+        if validation_error:
+            logger.warning("Data sources validation failed: %s", validation_error)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "error": "validation_error",
+                    "message": validation_error,
+                    "details": f"Available data sources: {DEFAULT_DATA_SOURCES_JOINED}"
+                }
+            )
+
+# Health payload served as-is; the timestamp is refreshed by a background
+# task so liveness probes don't pay for datetime formatting per request
+_HEALTH_PAYLOAD = {
+    "status": "healthy",
+    "service": "ask-mode-api",
+    "timestamp": "",
+    "version": "1.0.0"
+}
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+async def _tick_health_timestamp():
+    while True:
+        _HEALTH_PAYLOAD["timestamp"] = _utc_timestamp()
+        await asyncio.sleep(1)
+
+@contextlib.asynccontextmanager
+async def _health_lifespan(app):
+    """Run the health timestamp ticker for the lifetime of the app."""
+    _HEALTH_PAYLOAD["timestamp"] = _utc_timestamp()
+    ticker = asyncio.create_task(_tick_health_timestamp())
+    try:
+        yield
+    finally:
+        ticker.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await ticker
+
 # Create the router with prefix and tags
 ask_router = APIRouter(
     prefix="/ask",
     tags=["ask-mode"],
+    route_class=AskModeRoute,
+    lifespan=_health_lifespan,
     responses={
         500: {"model": ErrorResponse, "description": "Internal server error"},
         400: {"model": ErrorResponse, "description": "Bad request"},
@@ -96,6 +220,7 @@ ask_router = APIRouter(
         }
     }
 )
+@internal_error("Failed to create Discovery Engine session", error="session_creation_failed")
 async def create_session(
     request: CreateSessionRequest,
     service: SessionService = Depends(get_session_service)
@@ -111,47 +236,109 @@ async def create_session(
         CreateSessionResponse: Session details including session_id
         
     Raises:
-        HTTPException: If session creation fails or validation errors occur
+        HTTPException: If user_id validation fails
     """
-    try:
-        logger.info(f"Received session creation request for user: {request.user_id}")
-        
-        # Validate user ID
-        validation_error = service.validate_user_id(request.user_id)
-        if validation_error:
-            logger.warning(f"User ID validation failed: {validation_error}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error": "validation_error",
-                    "message": validation_error,
-                    "details": f"Invalid user_id: {request.user_id}"
-                }
-            )
-        
-        # Create the session
-        response = await service.create_session(request.user_id)
-        
-        logger.info(f"Session created successfully for user {request.user_id}: {response.session_id}")
-        return response
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions (validation errors, etc.)
-        raise
+    logger.info("Received session creation request for user: %s", request.user_id)
+    
+    # Validate user ID
+    validation_error = service.validate_user_id(request.user_id)
+    if validation_error:
+        logger.warning("User ID validation failed: %s", validation_error)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "validation_error",
+                "message": validation_error,
+                "details": f"Invalid user_id: {request.user_id}"
+            }
+        )
+    
+    # Create the session
+    response = await service.create_session(request.user_id)
+    
+    logger.info("Session created successfully for user %s: %s", request.user_id, response.session_id)
+    return response
+
+
+@ask_router.post(
+    "/session/query",
+    response_model=QueryResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create Session and Execute First Query",
+    description="""
+    Create a Discovery Engine session and answer its first query in a single call.
+    
+    Equivalent to `/ask/session` followed by `/ask/query` with the new session_id,
+    but saves the client a round trip. The returned `session_id` should be used
+    for follow-up queries.
+    
+    **Example:**
+    ```json
+    {
+        "user_id": "user_12345",
+        "query": "How do I set up push notifications?"
+    }
+    ```
+    """,
+    responses={
+        201: {
+            "description": "Session created and query executed successfully",
+            "model": QueryResponse
+        },
+        400: {
+            "description": "Invalid request data",
+            "model": ErrorResponse
+        },
+        500: {
+            "description": "Internal server error",
+            "model": ErrorResponse
+        }
+    }
+)
+@internal_error("Failed to execute Discovery Engine query", error="query_execution_failed")
+async def create_session_and_query(
+    request: SessionQueryRequest,
+    service: SessionService = Depends(get_session_service)
+) -> Response:
+    """
+    Create a session for the user and execute its first query.
+    
+    Args:
+        request: User ID plus the first query's search parameters
+        service: Injected session service dependency
         
-    except Exception as e:
-        # Handle unexpected errors
-        error_msg = f"Failed to create session: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+    Returns:
+        Response: QueryResponse JSON for the first query, carrying the new session_id
         
+    Raises:
+        HTTPException: If user_id, query or data source validation fails
+    """
+    logger.info("Received session+query request for user %s: '%.100s...'", request.user_id, request.query)
+    
+    validation_error = service.validate_user_id(request.user_id)
+    if validation_error:
+        logger.warning("User ID validation failed: %s", validation_error)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail={
-                "error": "session_creation_failed",
-                "message": "Failed to create Discovery Engine session",
-                "details": str(e)
+                "error": "validation_error",
+                "message": validation_error,
+                "details": f"Invalid user_id: {request.user_id}"
             }
         )
+    _validate_query_request(request, service)
+    
+    response = await service.create_session_and_answer(
+        user_id=request.user_id,
+        query=request.query.strip(),
+        preamble=request.preamble,
+        data_sources=request.data_sources,
+        max_results=request.max_results or 10,
+        include_citations=request.include_citations if request.include_citations is not None else True
+    )
+    
+    logger.info("Session %s created and first query answered, answer length: %d chars", response.session_id, len(response.answer))
+    return _model_response(response, status.HTTP_201_CREATED)
 
 
 @ask_router.post(
@@ -210,10 +397,11 @@ async def create_session(
         }
     }
 )
+@internal_error("Failed to execute Discovery Engine query", error="query_execution_failed")
 async def execute_query(
     request: QueryRequest,
     service: SessionService = Depends(get_session_service)
-) -> QueryResponse:
+) -> Response:
     """
     Execute a Discovery Engine query with full customization.
     
@@ -222,70 +410,101 @@ async def execute_query(
         service: Injected session service dependency
         
     Returns:
-        QueryResponse: Response containing answer, citations, and metadata
+        Response: QueryResponse JSON containing answer, citations, and metadata
         
     Raises:
-        HTTPException: If query execution fails or validation errors occur
+        HTTPException: If query or data source validation fails
     """
-    try:
-        logger.info(f"Received query request: '{request.query[:100]}...'")
-        
-        # Validate query
-        if not request.query or not request.query.strip():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error": "validation_error",
-                    "message": "Query cannot be empty",
-                    "details": "Please provide a valid search query"
-                }
-            )
-        
-        # Validate data sources if provided
-        if request.data_sources:
-            validation_error = service.validate_data_sources(request.data_sources)
-            if validation_error:
-                logger.warning(f"Data sources validation failed: {validation_error}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail={
-                        "error": "validation_error",
-                        "message": validation_error,
-                        "details": f"Available data sources: {', '.join(service.get_default_data_sources())}"
-                    }
-                )
-        
-        # Execute the query
-        response = await service.answer_query(
-            query=request.query.strip(),
-            session_id=request.session_id,
-            preamble=request.preamble,
-            data_sources=request.data_sources,
-            max_results=request.max_results or 10,
-            include_citations=request.include_citations if request.include_citations is not None else True,
-            user_pseudo_id=request.user_pseudo_id
-        )
-        
-        logger.info(f"Query executed successfully for: '{request.query[:50]}...', answer length: {len(response.answer)} chars")
-        return response
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions (validation errors, etc.)
-        raise
+    logger.info("Received query request: '%.100s...'", request.query)
+    
+    _validate_query_request(request, service)
+    
+    # Execute the query
+    response = await service.answer_query(
+        query=request.query.strip(),
+        session_id=request.session_id,
+        preamble=request.preamble,
+        data_sources=request.data_sources,
+        max_results=request.max_results or 10,
+        include_citations=request.include_citations if request.include_citations is not None else True,
+        user_pseudo_id=request.user_pseudo_id
+    )
+    
+    logger.info("Query executed successfully for: '%.50s...', answer length: %d chars", request.query, len(response.answer))
+    return _model_response(response)
+
+
+@ask_router.post(
+    "/query/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream Discovery Engine Query",
+    description="""
+    Execute a query like `/ask/query`, but stream the answer as Server-Sent Events
+    while Discovery Engine generates it.
+    
+    **Events** (each `data:` line is a JSON object):
+    - `{"type": "delta", "text": "..."}` - next chunk of answer text
+    - `{"type": "final", "response": {...}}` - full `QueryResponse` with citations
+    - `{"type": "error", "error": "...", "message": "...", "details": "..."}` - the stream failed
+    """,
+    responses={
+        200: {"description": "Answer stream", "content": {"text/event-stream": {}}},
+        400: {
+            "description": "Invalid request data",
+            "model": ErrorResponse
+        }
+    }
+)
+@internal_error("Failed to execute Discovery Engine query", error="query_execution_failed")
+async def stream_query(
+    request: QueryRequest,
+    service: SessionService = Depends(get_session_service)
+) -> StreamingResponse:
+    """
+    Stream a Discovery Engine answer as Server-Sent Events.
+    
+    Args:
+        request: Query request with search parameters
+        service: Injected session service dependency
         
-    except Exception as e:
-        # Handle unexpected errors
-        error_msg = f"Failed to execute query: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+    Returns:
+        StreamingResponse: text/event-stream of delta, final and error events
         
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
+    Raises:
+        HTTPException: If query or data source validation fails
+    """
+    logger.info("Received streaming query request: '%.100s...'", request.query)
+    _validate_query_request(request, service)
+    
+    async def events():
+        # Headers are already sent once streaming starts, so failures are
+        # reported in-band instead of through the exception handler
+        try:
+            async for item in service.stream_answer_query(
+                query=request.query.strip(),
+                session_id=request.session_id,
+                preamble=request.preamble,
+                data_sources=request.data_sources,
+                max_results=request.max_results or 10,
+                include_citations=request.include_citations if request.include_citations is not None else True,
+                user_pseudo_id=request.user_pseudo_id
+            ):
+                if isinstance(item, str):
+                    event = {"type": "delta", "text": item}
+                else:
+                    event = {"type": "final", "response": item.model_dump(mode="json")}
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            logger.error("Failed to stream query: %s", e, exc_info=True)
+            event = {
+                "type": "error",
                 "error": "query_execution_failed",
                 "message": "Failed to execute Discovery Engine query",
                 "details": str(e)
             }
-        )
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @ask_router.post(
@@ -350,10 +569,11 @@ async def execute_query(
         }
     }
 )
+@internal_error("Failed to generate ticket recommendations", error="recommendations_generation_failed")
 async def get_recommendations(
     request: RecommendationsRequest,
     service: SessionService = Depends(get_session_service)
-) -> RecommendationsResponse:
+) -> Response:
     """
     Generate recommendations based on comprehensive Zendesk ticket information.
     
@@ -362,50 +582,31 @@ async def get_recommendations(
         service: Injected session service dependency
         
     Returns:
-        RecommendationsResponse: Structured recommendations
+        Response: RecommendationsResponse JSON with structured recommendations
         
     Raises:
-        HTTPException: If recommendation generation fails
+        HTTPException: If ticket info validation fails
     """
-    try:
-        logger.info("Received recommendations request")
-        
-        # Validate ticket info
-        validation_error = service.validate_ticket_info(request.ticket_info)
-        if validation_error:
-            logger.warning(f"Ticket info validation failed: {validation_error}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "error": "validation_error",
-                    "message": validation_error,
-                    "details": "Please provide valid ticket info with title, description, or comments"
-                }
-            )
-        
-        # Generate recommendations
-        response = await service.get_recommendations(request.ticket_info)
-        
-        logger.info(f"Recommendations generated successfully: {len(response.related_questions)} questions, {len(response.relevant_tickets)} tickets")
-        return response
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions (validation errors, etc.)
-        raise
-        
-    except Exception as e:
-        # Handle unexpected errors
-        error_msg = f"Failed to generate recommendations: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        
+    logger.info("Received recommendations request")
+    
+    # Validate ticket info
+    validation_error = service.validate_ticket_info(request.ticket_info)
+    if validation_error:
+        logger.warning("Ticket info validation failed: %s", validation_error)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail={
-                "error": "recommendations_generation_failed",
-                "message": "Failed to generate ticket recommendations",
-                "details": str(e)
+                "error": "validation_error",
+                "message": validation_error,
+                "details": "Please provide valid ticket info with title, description, or comments"
             }
         )
+    
+    # Generate recommendations
+    response = await service.get_recommendations(request.ticket_info)
+    
+    logger.info("Recommendations generated successfully: %d questions, %d tickets", len(response.related_questions), len(response.relevant_tickets))
+    return _model_response(response)
 
 
 @ask_router.get(
@@ -434,97 +635,89 @@ async def health_check():
     Returns:
         dict: Health status information
     """
-    from datetime import datetime
-    
-    return {
-        "status": "healthy",
-        "service": "ask-mode-api",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "version": "1.0.0"
-    }
-
+    return ORJSONResponse(_HEALTH_PAYLOAD)
 
-@ask_router.post("/ask-sessions")
-async def create_ask_session(request: CreateAskSessionRequest, db=Depends(get_db)):
+@ask_router.post("/ask-sessions", openapi_extra=_json_body_openapi(CreateAskSessionRequest))
+@internal_error("Database error")
+async def create_ask_session(
+    request: CreateAskSessionRequest = Depends(_parse_create_ask_session),
+    db=Depends(get_db)
+):
     """Create a new Ask session record"""
-    try:
-        existing = await db.fetchrow(
-            "SELECT session_id FROM asksessions WHERE session_id = $1",
-            request.session_id
-        )
-        if existing:
-            raise HTTPException(status_code=409, detail="Session already exists")
-        now = datetime.now(timezone.utc)
-        await db.execute(
-            """
-            INSERT INTO asksessions (
-                session_id, user_id, api_session_id, conversation_id, 
-                title, created_at, updated_at, status, session_metadata,
-                total_queries, last_query_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-            """,
-            request.session_id,
-            request.user_id,
-            request.api_session_id,
-            request.conversation_id,
-            request.title,
-            now,
-            now,
-            "active",
-            json.dumps(request.session_metadata),
-            0,
-            None
-        )
-        return {
-            "success": True,
-            "data": {
-                "session_id": request.session_id,
-                "user_id": request.user_id,
-                "created_at": now.isoformat(),
-                "status": "active"
-            }
+    now = datetime.now(timezone.utc)
+    # Single round-trip; ON CONFLICT makes concurrent duplicate creates race-free
+    created = await db.fetchval(
+        """
+        INSERT INTO asksessions (
+            session_id, user_id, api_session_id, conversation_id, 
+            title, created_at, updated_at, status, session_metadata,
+            total_queries, last_query_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $6, 'active', $7, 0, NULL)
+        ON CONFLICT (session_id) DO NOTHING
+        RETURNING session_id
+        """,
+        request.session_id,
+        request.user_id,
+        request.api_session_id,
+        request.conversation_id,
+        request.title,
+        now,
+        request.session_metadata
+    )
+    if created is None:
+        raise HTTPException(status_code=409, detail="Session already exists")
+    invalidate_ask_sessions_cache()
+    return {
+        "success": True,
+        "data": {
+            "session_id": request.session_id,
+            "user_id": request.user_id,
+            "created_at": now.isoformat(),
+            "status": "active"
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    }
 
-@ask_router.post("/ask-sessions/turns")
-async def store_conversation_turn(request: StoreConversationTurnRequest, db=Depends(get_db)):
+@ask_router.post("/ask-sessions/turns", openapi_extra=_json_body_openapi(StoreConversationTurnRequest))
+@internal_error("Database error")
+async def store_conversation_turn(
+    request: StoreConversationTurnRequest = Depends(_parse_conversation_turn),
+    db=Depends(get_db)
+):
     """Store a conversation turn"""
-    try:
-        session = await db.fetchrow(
-            "SELECT session_id FROM asksessions WHERE session_id = $1",
-            request.session_id
-        )
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-        turn_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc)
-        await db.execute(
-            """
-            INSERT INTO ask_conversation_turns (
-                id, session_id, user_query, ai_response, created_at, metadata, citations
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """,
-            turn_id,
-            request.session_id,
-            request.user_query,
-            request.ai_response,
-            now,
-            json.dumps(request.metadata),
-            json.dumps(request.citations) if request.citations else None
+    turn_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    # Existence check and insert in one statement; nothing is returned
+    # when the session does not exist
+    inserted = await db.fetchval(
+        """
+        INSERT INTO ask_conversation_turns (
+            id, session_id, user_query, ai_response, created_at, metadata, citations
         )
-        return {
-            "success": True,
-            "data": {
-                "turn_id": turn_id,
-                "session_id": request.session_id,
-                "created_at": now.isoformat()
-            }
+        SELECT $1, $2, $3, $4, $5::timestamptz, $6::jsonb, $7::jsonb
+        WHERE EXISTS (SELECT 1 FROM asksessions WHERE session_id = $2)
+        RETURNING id
+        """,
+        turn_id,
+        request.session_id,
+        request.user_query,
+        request.ai_response,
+        now,
+        request.metadata,
+        request.citations or None
+    )
+    if inserted is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {
+        "success": True,
+        "data": {
+            "turn_id": turn_id,
+            "session_id": request.session_id,
+            "created_at": now.isoformat()
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    }
 
 @ask_router.get("/ask-sessions")
+@internal_error("Database error")
 async def get_session_history(
     user_id: Optional[str] = Query(None, description="Optional: Filter by User ID"),
     limit: int = Query(50, ge=1, le=100, description="Number of results to return"),
@@ -536,156 +729,98 @@ async def get_session_history(
     db=Depends(get_db)
 ):
     """Get all sessions with optional filtering by user_id, status, date range, and pagination"""
-    try:
-        # Build dynamic WHERE clause based on provided filters
-        where_clauses = []
-        params = []
-        param_count = 0
-        
-        if user_id:
-            param_count += 1
-            where_clauses.append(f"user_id = ${param_count}")
-            params.append(user_id)
-        if status:
-            param_count += 1
-            where_clauses.append(f"status = ${param_count}")
-            params.append(status)
-        if last_n_days:
-            param_count += 1
-            where_clauses.append(f"created_at >= NOW() - INTERVAL '${last_n_days} days'")
-        else:
-            if start_date:
-                param_count += 1
-                where_clauses.append(f"created_at >= ${param_count}")
-                params.append(start_date)
-            if end_date:
-                param_count += 1
-                where_clauses.append(f"created_at <= ${param_count}")
-                params.append(end_date)
-        where_clause = ""
-        if where_clauses:
-            where_clause = "WHERE " + " AND ".join(where_clauses)
-        count_query = f"SELECT COUNT(*) FROM asksessions {where_clause}"
-        total_count = await db.fetchval(count_query, *params)
-        query = f"""
-            SELECT session_id, user_id, api_session_id, conversation_id, title,
-                   created_at, updated_at, status, session_metadata, total_queries, last_query_at
-            FROM asksessions 
-            {where_clause}
-            ORDER BY created_at DESC
-            LIMIT ${param_count + 1} OFFSET ${param_count + 2}
-        """
-        params: list[Any] = params
-        params.extend([limit, offset])
-        rows = await db.fetch(query, *params)
-        sessions = []
-        for row in rows:
-            sessions.append({
-                "session_id": row['session_id'],
-                "user_id": row['user_id'],
-                "api_session_id": row['api_session_id'],
-                "conversation_id": row['conversation_id'],
-                "title": row['title'],
-                "created_at": row['created_at'].isoformat() if row['created_at'] else None,
-                "updated_at": row['updated_at'].isoformat() if row['updated_at'] else None,
-                "status": row['status'],
-                "session_metadata": json.loads(row['session_metadata']) if row['session_metadata'] else {},
-                "total_queries": row['total_queries'],
-                "last_query_at": row['last_query_at'].isoformat() if row['last_query_at'] else None
-            })
-        return {
-            "success": True,
-            "data": {
-                "sessions": sessions,
-                "total_count": total_count
-            }
+    where_clauses, params = build_where(
+        "created_at",
+        user_id=user_id,
+        status=status,
+        start_date=start_date,
+        end_date=end_date,
+        last_n_days=last_n_days
+    )
+    param_count = len(params)
+    where_clause = ""
+    if where_clauses:
+        where_clause = "WHERE " + " AND ".join(where_clauses)
+    # The window count rides along with the page, so one round trip returns both
+    query = f"""
+        SELECT session_id, user_id, api_session_id, conversation_id, title,
+               created_at, updated_at, status, session_metadata, total_queries, last_query_at,
+               COUNT(*) OVER() AS total_count
+        FROM asksessions 
+        {where_clause}
+        ORDER BY created_at DESC
+        LIMIT ${param_count + 1} OFFSET ${param_count + 2}
+    """
+    rows = await db.fetch(query, *params, limit, offset)
+    total_count = rows[0]["total_count"] if rows else 0
+    if not rows and offset:
+        # Paged past the end, so no row carried the total
+        total_count = await db.fetchval(f"SELECT COUNT(*) FROM asksessions {where_clause}", *params)
+    return ORJSONResponse({
+        "success": True,
+        "data": {
+            "sessions": [_session_row_to_dict(row) for row in rows],
+            "total_count": total_count
         }
-    except Exception as e:
-        logger.error(f"Database error in get_session_history: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    })
 
 @ask_router.get("/ask-sessions/{session_id}")
+@internal_error("Database error")
 async def get_session_with_turns(
     session_id: str,
-    user_id: str = Query(..., description="User ID for security"),
-    db=Depends(get_db)
+    user_id: str = Query(..., description="User ID for security")
 ):
     """Get a specific session with its conversation turns"""
-    try:
-        session_row = await db.fetchrow(
-            """
-            SELECT session_id, user_id, api_session_id, conversation_id, title,
-                   created_at, updated_at, status, session_metadata, total_queries, last_query_at
-            FROM asksessions 
-            WHERE session_id = $1 AND user_id = $2
-            """,
-            session_id, user_id
-        )
-        if not session_row:
-            raise HTTPException(status_code=404, detail="Session not found")
-        turn_rows = await db.fetch(
-            """
-            SELECT id, session_id, user_query, ai_response, created_at, metadata, citations
-            FROM ask_conversation_turns 
-            WHERE session_id = $1
-            ORDER BY created_at ASC
-            """,
-            session_id
-        )
-        session = {
-            "session_id": session_row['session_id'],
-            "user_id": session_row['user_id'],
-            "api_session_id": session_row['api_session_id'],
-            "conversation_id": session_row['conversation_id'],
-            "title": session_row['title'],
-            "created_at": session_row['created_at'].isoformat(),
-            "updated_at": session_row['updated_at'].isoformat(),
-            "status": session_row['status'],
-            "session_metadata": json.loads(session_row['session_metadata']) if session_row['session_metadata'] else {},
-            "total_queries": session_row['total_queries'],
-            "last_query_at": session_row['last_query_at'].isoformat() if session_row['last_query_at'] else None
-        }
-        turns = []
-        for turn_row in turn_rows:
-            turns.append({
-                "id": turn_row['id'],
-                "session_id": turn_row['session_id'],
-                "user_query": turn_row['user_query'],
-                "ai_response": turn_row['ai_response'],
-                "created_at": turn_row['created_at'].isoformat(),
-                "metadata": json.loads(turn_row['metadata']) if turn_row['metadata'] else {},
-                "citations": json.loads(turn_row['citations']) if turn_row['citations'] else None
-            })
-        return {
-            "success": True,
-            "data": {
-                "session": session,
-                "turns": turns
-            }
+    async def fetch_session():
+        async with acquire_connection() as db:
+            return await db.fetchrow(
+                """
+                SELECT session_id, user_id, api_session_id, conversation_id, title,
+                       created_at, updated_at, status, session_metadata, total_queries, last_query_at
+                FROM asksessions 
+                WHERE session_id = $1 AND user_id = $2
+                """,
+                session_id, user_id
+            )
+    
+    async def fetch_turns():
+        async with acquire_connection() as db:
+            return await db.fetch(
+                """
+                SELECT id, session_id, user_query, ai_response, created_at, metadata, citations
+                FROM ask_conversation_turns 
+                WHERE session_id = $1
+                ORDER BY created_at ASC
+                """,
+                session_id
+            )
+    
+    # The turns query only needs the session_id, so both reads run
+    # concurrently, each on its own connection with the bounded acquire
+    session_row, turn_rows = await asyncio.gather(fetch_session(), fetch_turns())
+    if not session_row:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return ORJSONResponse({
+        "success": True,
+        "data": {
+            "session": _session_row_to_dict(session_row),
+            "turns": [_turn_row_to_dict(turn_row) for turn_row in turn_rows]
         }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    })
 
 @ask_router.get("/ask-sessions/count")
+@internal_error("Database error")
 async def get_session_count(
     user_id: str = Query(..., description="User ID"),
     db=Depends(get_db)
 ):
     """Get session count for a user"""
-    try:
-        count = await db.fetchval(
-            "SELECT COUNT(*) FROM asksessions WHERE user_id = $1",
-            user_id
-        )
-        return {
-            "success": True,
-            "data": {"count": count}
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
+    count = await db.fetchval(
+        "SELECT COUNT(*) FROM asksessions WHERE user_id = $1",
+        user_id
+    )
+    return {
+        "success": True,
+        "data": {"count": count}
+    }
 
-# Note: Exception handlers are handled within individual endpoint functions
-# using try/catch blocks, as APIRouter doesn't support exception_handler decorators
@@ -5,25 +5,34 @@ This module provides business logic for interacting with Google Discovery Engine
 including session management and query processing.
 """
 
+import asyncio
+import functools
+import itertools
 import logging
-import json
+import orjson
 import re
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Dict, Tuple, Union
 from urllib.parse import urlparse
 
 from google.cloud import discoveryengine_v1 as discoveryengine
+from google.cloud.discoveryengine_v1.services.conversational_search_service.transports import (
+    ConversationalSearchServiceGrpcAsyncIOTransport
+)
 from google.api_core.client_options import ClientOptions
 
 from ..discovery_engine import (
     DEFAULT_PROJECT_ID, 
     DEFAULT_LOCATION, 
     DEFAULT_ENGINE_ID, 
+    MAX_INFLIGHT_REQUESTS,
+    CHANNEL_POOL_SIZE,
     credentials,
     CONFLUENCE_RUNBOOKS_DATASTORE_ID,
     ZENDESK_TICKETS_DATASTORE_ID,
     HELP_DOCS_DATASTORE_ID
 )
+from ..cache import TTLCache
 from .models import (
     CreateSessionResponse, 
     ErrorResponse, 
@@ -35,6 +44,238 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Default data sources are fixed by configuration at import time
+DEFAULT_DATA_SOURCES: Tuple[str, ...] = (
+    HELP_DOCS_DATASTORE_ID,
+    CONFLUENCE_RUNBOOKS_DATASTORE_ID,
+    ZENDESK_TICKETS_DATASTORE_ID
+)
+DEFAULT_DATA_SOURCES_JOINED = ", ".join(DEFAULT_DATA_SOURCES)
+_DEFAULT_DATA_SOURCES_SET = frozenset(DEFAULT_DATA_SOURCES)
+_DEFAULT_MAX_RESULTS = 10
+
+# Ticket parsing patterns, compiled once at import
+_TICKET_INDICATOR_RE = re.compile(r'Ticket Title:|Ticket Description:|Comment')
+_TITLE_RE = re.compile(r'\*\*Ticket Title:\*\*\s*(.+)')
+_DESC_RE = re.compile(r'\*\*Ticket Description:\*\*\s*(.+?)(?=\*\*Ticket Comments:|$)', re.DOTALL)
+_COMMENT_RE = re.compile(r'Comment #\d+.*?Author ID:.*?(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z)\s*\n(.*?)(?=Comment #|\n\n|\Z)', re.DOTALL)
+# One pass over a comment finds MoEngage features (whole words) and error /
+# configuration keywords (substrings, as plain `in` checks would match)
+_COMMENT_SCAN_RE = re.compile(
+    r'(?P<feat>\b(?:Cards?|SDK|Push|Campaign|Notification|Integration|Analytics|Segmentation|API|Dashboard)\b)'
+    r'|(?P<err>error|issue|problem|not working|failed|bug)'
+    r'|(?P<tech>configuration|setup|implementation|version|upgrade|fix)',
+    re.IGNORECASE
+)
+_WS_RE = re.compile(r'\s+')
+
+# Request specs that don't vary per query, built once at import
+QueryUnderstandingSpec = discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec
+AnswerGenerationSpec = discoveryengine.AnswerQueryRequest.AnswerGenerationSpec
+
+_QUERY_UNDERSTANDING_SPEC = QueryUnderstandingSpec(
+    query_rephraser_spec=QueryUnderstandingSpec.QueryRephraserSpec(
+        disable=False,
+        max_rephrase_steps=1,
+    ),
+    query_classification_spec=QueryUnderstandingSpec.QueryClassificationSpec(
+        types=[
+            QueryUnderstandingSpec.QueryClassificationSpec.Type.ADVERSARIAL_QUERY,
+            QueryUnderstandingSpec.QueryClassificationSpec.Type.NON_ANSWER_SEEKING_QUERY,
+        ]
+    ),
+)
+
+DEFAULT_PREAMBLE = (
+    "You are MoEngage Support Assistant, a helpful AI assistant for MoEngage customers. "
+    "Provide detailed, accurate answers based on MoEngage documentation. "
+    "Use proper formatting and always include relevant citations and sources. "
+    "Be specific and actionable in your responses."
+)
+
+_DEFAULT_ANSWER_GENERATION_SPEC = AnswerGenerationSpec(
+    ignore_adversarial_query=False,
+    ignore_non_answer_seeking_query=False,
+    ignore_low_relevant_content=False,
+    model_spec=AnswerGenerationSpec.ModelSpec(
+        model_version="gemini-2.5-flash/answer_gen/v1",
+    ),
+    prompt_spec=AnswerGenerationSpec.PromptSpec(
+        preamble=DEFAULT_PREAMBLE,
+    ),
+    include_citations=True,
+    answer_language_code="en",
+)
+
+_GROUNDING_SPEC = discoveryengine.AnswerQueryRequest.GroundingSpec(
+    include_grounding_supports=True,
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _data_store_specs(data_store_prefix: str, data_sources: Tuple[str, ...]) -> Tuple[discoveryengine.SearchRequest.DataStoreSpec, ...]:
+    """Data store specs for a data source combination; copied into each request."""
+    return tuple(
+        discoveryengine.SearchRequest.DataStoreSpec(data_store=f"{data_store_prefix}{data_source}")
+        for data_source in data_sources
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_title_from_uri(uri: str) -> str:
+    """Title for a citation URI; memoised since the same documents are cited repeatedly."""
+    try:
+        parsed = urlparse(uri)
+        
+        # Extract filename from path
+        path_parts = parsed.path.strip('/').split('/')
+        if path_parts and path_parts[-1]:
+            filename = path_parts[-1]
+            # Remove file extension and replace hyphens/underscores with spaces
+            title = filename.split('.')[0].replace('-', ' ').replace('_', ' ')
+            return title.title()
+        
+        # Fallback to domain name
+        if parsed.netloc:
+            return parsed.netloc.replace('www.', '').title()
+        
+        return uri
+        
+    except Exception:
+        return uri
+
+
+def _structured_source(service: "SessionService", reference_id: str, reference) -> CitationSource:
+    info = reference.structured_document_info
+    return CitationSource.model_construct(
+        reference_id=reference_id,
+        document_id=info.document,
+        uri=info.uri,
+        title=service.extract_title_from_uri(info.uri),
+        struct_data=dict(info.struct_data) if info.struct_data else None
+    )
+
+
+def _unstructured_source(service: "SessionService", reference_id: str, reference) -> CitationSource:
+    info = reference.unstructured_document_info
+    return CitationSource.model_construct(
+        reference_id=reference_id,
+        document_id=info.document,
+        uri=info.uri,
+        title=service.extract_title_from_uri(info.uri),
+        struct_data=None
+    )
+
+
+def _chunk_source(service: "SessionService", reference_id: str, reference) -> CitationSource:
+    metadata = reference.chunk_info.document_metadata
+    return CitationSource.model_construct(
+        reference_id=reference_id,
+        document_id=metadata.document,
+        uri=metadata.uri,
+        title=service.extract_title_from_uri(metadata.uri),
+        struct_data=None
+    )
+
+
+# Answer.Reference keeps its document info in the `content` oneof
+_reference_pb = discoveryengine.Answer.Reference.pb
+_REFERENCE_SOURCE_MAPPERS = {
+    "structured_document_info": _structured_source,
+    "unstructured_document_info": _unstructured_source,
+    "chunk_info": _chunk_source,
+}
+
+
+def _extract_fenced_json(text: str) -> Optional[str]:
+    """Return the body of the first ``` / ```json fenced block that holds a JSON object."""
+    fence = text.find("```")
+    while fence != -1:
+        body_start = fence + 3
+        if text.startswith("json", body_start):
+            body_start += 4
+        body_end = text.find("```", body_start)
+        if body_end == -1:
+            return None
+        body = text[body_start:body_end].strip()
+        if body.startswith("{") and body.endswith("}"):
+            return body
+        fence = text.find("```", fence + 3)
+    return None
+
+
+def _find_json_object(text: str, must_contain: Tuple[str, ...] = ('"related_questions"', '"relevant_tickets"')) -> Optional[str]:
+    """
+    Return the first top-level {...} span in text containing every must_contain
+    substring. A single linear brace-depth scan, so malformed model output
+    can't trigger regex backtracking.
+    """
+    depth = 0
+    start = -1
+    for i, char in enumerate(text):
+        if char == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                candidate = text[start:i + 1]
+                if all(key in candidate for key in must_contain):
+                    return candidate
+    return None
+
+# Keepalive keeps idle pooled connections warm; a local subchannel pool stops
+# gRPC from collapsing channels with identical args onto one TCP connection
+_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+
+def _create_pooled_channel(host, **kwargs):
+    kwargs["options"] = [*kwargs.get("options", []), *_CHANNEL_OPTIONS]
+    return ConversationalSearchServiceGrpcAsyncIOTransport.create_channel(host, **kwargs)
+
+
+def _pooled_transport(**kwargs):
+    return ConversationalSearchServiceGrpcAsyncIOTransport(channel=_create_pooled_channel, **kwargs)
+
+
+class AdmissionLimiter:
+    """
+    Bounds concurrent upstream calls, like asyncio.Semaphore, but the bound
+    can be changed at runtime without disturbing calls already admitted.
+    """
+    
+    def __init__(self, max_concurrency: int):
+        self._max_concurrency = max_concurrency
+        self._active = 0
+        self._cond = asyncio.Condition()
+    
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+    
+    async def set_max_concurrency(self, max_concurrency: int) -> None:
+        """Change the bound; raising it wakes waiters that now fit."""
+        async with self._cond:
+            self._max_concurrency = max_concurrency
+            self._cond.notify_all()
+    
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._max_concurrency)
+            self._active += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify(1)
+
 
 class SessionService:
     """Service for managing Discovery Engine sessions."""
@@ -45,6 +286,30 @@ class SessionService:
         self.location = DEFAULT_LOCATION
         self.engine_id = DEFAULT_ENGINE_ID
         
+        # Resource names are fixed for the service's lifetime
+        self._parent = (
+            f"projects/{self.project_id}/locations/{self.location}/"
+            f"collections/default_collection/engines/{self.engine_id}"
+        )
+        self._serving_config = f"{self._parent}/servingConfigs/default_serving_config"
+        self._data_store_prefix = (
+            f"projects/{self.project_id}/locations/{self.location}/"
+            f"collections/default_collection/dataStores/"
+        )
+        self._default_request = self._build_request_shape(None, None, _DEFAULT_MAX_RESULTS, True)
+        
+        # In-flight sessionless queries, keyed by request parameters, so that
+        # identical concurrent requests share a single Discovery Engine call
+        self._inflight_queries: Dict[Tuple, asyncio.Future] = {}
+        
+        # Recent sessionless answers; FAQ-style queries repeat often and the
+        # indexed content changes slowly
+        self._answer_cache = TTLCache(maxsize=1024, ttl=600)
+        
+        # Caps in-flight Discovery Engine RPCs so bursts queue here instead of
+        # exhausting connections or tripping upstream quota
+        self._admission = AdmissionLimiter(MAX_INFLIGHT_REQUESTS)
+        
         # Configure client options based on location
         self.client_options = (
             ClientOptions(api_endpoint=f"{self.location}-discoveryengine.googleapis.com")
@@ -52,17 +317,29 @@ class SessionService:
             else None
         )
         
-        # Initialize the Discovery Engine client
+        # Initialize the Discovery Engine clients; the async client keeps the
+        # event loop free while a session/answer RPC is in flight, and each
+        # pooled client owns its own channel so concurrent RPCs don't queue
+        # behind one HTTP/2 connection
         try:
-            self.client = discoveryengine.ConversationalSearchServiceClient(
-                credentials=credentials,
-                client_options=self.client_options
-            )
+            self._clients = [
+                discoveryengine.ConversationalSearchServiceAsyncClient(
+                    credentials=credentials,
+                    transport=_pooled_transport,
+                    client_options=self.client_options
+                )
+                for _ in range(max(1, CHANNEL_POOL_SIZE))
+            ]
+            self._client_rr = itertools.count()
             logger.info(f"SessionService initialized for project {self.project_id} in {self.location}")
         except Exception as e:
             logger.error(f"Failed to initialize Discovery Engine client: {e}")
             raise Exception(f"Failed to initialize Discovery Engine client: {e}")
     
+    def _next_client(self) -> discoveryengine.ConversationalSearchServiceAsyncClient:
+        """Round-robin over the pooled clients."""
+        return self._clients[next(self._client_rr) % len(self._clients)]
+    
     async def create_session(self, user_id: str) -> CreateSessionResponse:
         """
         Create a new Discovery Engine session for the specified user.
@@ -79,28 +356,23 @@ class SessionService:
         try:
             logger.info(f"Creating Discovery Engine session for user: {user_id}")
             
-            # Build the parent resource name
-            parent = (
-                f"projects/{self.project_id}/locations/{self.location}/"
-                f"collections/default_collection/engines/{self.engine_id}"
-            )
-            
             # Create the session request
             session_request = discoveryengine.Session(
                 user_pseudo_id=user_id
             )
             
             # Make the API call to create the session
-            session = self.client.create_session(
-                parent=parent,
-                session=session_request
-            )
+            async with self._admission:
+                session = await self._next_client().create_session(
+                    parent=self._parent,
+                    session=session_request
+                )
             
             # Extract session ID from the full resource name
             session_id = session.name
             
-            # Create response
-            response = CreateSessionResponse(
+            # Create response (validated once against response_model by FastAPI)
+            response = CreateSessionResponse.model_construct(
                 session_id=session_id,
                 user_id=user_id,
                 created_at=datetime.utcnow().isoformat() + "Z",
@@ -143,23 +415,16 @@ class SessionService:
         Returns:
             str: Parent resource path for the engine
         """
-        return (
-            f"projects/{self.project_id}/locations/{self.location}/"
-            f"collections/default_collection/engines/{self.engine_id}"
-        )
+        return self._parent
     
-    def get_default_data_sources(self) -> List[str]:
+    def get_default_data_sources(self) -> Tuple[str, ...]:
         """
         Get the default data sources for queries.
         
         Returns:
-            List[str]: List of default data store IDs
+            Tuple[str, ...]: Default data store IDs (shared, precomputed at import)
         """
-        return [
-            HELP_DOCS_DATASTORE_ID,
-            CONFLUENCE_RUNBOOKS_DATASTORE_ID,
-            ZENDESK_TICKETS_DATASTORE_ID
-        ]
+        return DEFAULT_DATA_SOURCES
     
     def validate_data_sources(self, data_sources: List[str]) -> Optional[str]:
         """
@@ -171,13 +436,12 @@ class SessionService:
         Returns:
             Optional[str]: Error message if validation fails, None if valid
         """
-        available_sources = self.get_default_data_sources()
-        
-        for source in data_sources:
-            if source not in available_sources:
-                return f"Invalid data source: {source}. Available sources: {', '.join(available_sources)}"
+        # Common case is a single C-level subset check
+        if _DEFAULT_DATA_SOURCES_SET.issuperset(data_sources):
+            return None
         
-        return None
+        source = next(source for source in data_sources if source not in _DEFAULT_DATA_SOURCES_SET)
+        return f"Invalid data source: {source}. Available sources: {DEFAULT_DATA_SOURCES_JOINED}"
     
     def extract_title_from_uri(self, uri: str) -> str:
         """
@@ -189,25 +453,9 @@ class SessionService:
         Returns:
             str: Extracted title or URI if extraction fails
         """
-        try:
-            parsed = urlparse(uri)
-            
-            # Extract filename from path
-            path_parts = parsed.path.strip('/').split('/')
-            if path_parts and path_parts[-1]:
-                filename = path_parts[-1]
-                # Remove file extension and replace hyphens/underscores with spaces
-                title = filename.split('.')[0].replace('-', ' ').replace('_', ' ')
-                return title.title()
-            
-            # Fallback to domain name
-            if parsed.netloc:
-                return parsed.netloc.replace('www.', '').title()
-            
-            return uri
-            
-        except Exception:
+        if not uri:
             return uri
+        return _extract_title_from_uri(uri)
     
     def map_citations_to_references(self, answer) -> List[MappedCitation]:
         """
@@ -224,14 +472,20 @@ class SessionService:
         if not hasattr(answer, 'citations') or not answer.citations:
             return mapped_citations
         
+        # proto-plus re-wraps fields on every access, so read them once
+        answer_text = answer.answer_text
+        references = answer.references
+        reference_count = len(references)
+        
         for citation in answer.citations:
-            # Extract the actual cited text from the answer
-            cited_text = answer.answer_text[citation.start_index:citation.end_index]
+            start_index = citation.start_index
+            end_index = citation.end_index
             
-            citation_info = MappedCitation(
-                cited_text=cited_text,
-                start_index=citation.start_index,
-                end_index=citation.end_index,
+            # Extract the actual cited text from the answer
+            citation_info = MappedCitation.model_construct(
+                cited_text=answer_text[start_index:end_index],
+                start_index=start_index,
+                end_index=end_index,
                 sources=[]
             )
             
@@ -239,41 +493,13 @@ class SessionService:
             for source in citation.sources:
                 try:
                     ref_index = int(source.reference_id)
-                    if ref_index < len(answer.references):
-                        reference = answer.references[ref_index]
+                    if ref_index < reference_count:
+                        reference = references[ref_index]
                         
-                        # Handle structured document info
-                        if hasattr(reference, 'structured_document_info') and reference.structured_document_info:
-                            source_info = CitationSource(
-                                reference_id=source.reference_id,
-                                document_id=reference.structured_document_info.document,
-                                uri=reference.structured_document_info.uri,
-                                title=self.extract_title_from_uri(reference.structured_document_info.uri),
-                                struct_data=dict(reference.structured_document_info.struct_data) if reference.structured_document_info.struct_data else None
-                            )
-                            citation_info.sources.append(source_info)
-                        
-                        # Handle unstructured document info
-                        elif hasattr(reference, 'unstructured_document_info') and reference.unstructured_document_info:
-                            source_info = CitationSource(
-                                reference_id=source.reference_id,
-                                document_id=reference.unstructured_document_info.document,
-                                uri=reference.unstructured_document_info.uri,
-                                title=self.extract_title_from_uri(reference.unstructured_document_info.uri),
-                                struct_data=None
-                            )
-                            citation_info.sources.append(source_info)
-                        
-                        # Handle chunk info
-                        elif hasattr(reference, 'chunk_info') and reference.chunk_info:
-                            source_info = CitationSource(
-                                reference_id=source.reference_id,
-                                document_id=reference.chunk_info.document_metadata.document,
-                                uri=reference.chunk_info.document_metadata.uri,
-                                title=self.extract_title_from_uri(reference.chunk_info.document_metadata.uri),
-                                struct_data=None
-                            )
-                            citation_info.sources.append(source_info)
+                        # Dispatch on whichever document info the reference carries
+                        map_source = _REFERENCE_SOURCE_MAPPERS.get(_reference_pb(reference).WhichOneof('content'))
+                        if map_source:
+                            citation_info.sources.append(map_source(self, source.reference_id, reference))
                             
                 except (ValueError, IndexError, AttributeError) as e:
                     logger.warning(f"Failed to process citation source {source.reference_id}: {e}")
@@ -311,131 +537,280 @@ class SessionService:
         Raises:
             Exception: If query execution fails
         """
-        try:
-            logger.info(f"Executing Discovery Engine query: '{query[:100]}...'")
-            
-            # Use default data sources if none provided
-            if not data_sources:
-                data_sources = self.get_default_data_sources()
-            
-            # Build serving config
-            serving_config = (
-                f"projects/{self.project_id}/locations/{self.location}/"
-                f"collections/default_collection/engines/{self.engine_id}/"
-                f"servingConfigs/default_serving_config"
+        # Sessioned queries carry conversation context and are never shared
+        if session_id is not None:
+            return await self._execute_answer_query(
+                query, session_id, preamble, data_sources,
+                max_results, include_citations, user_pseudo_id
             )
-            
-            # Configure query understanding spec
-            query_understanding_spec = discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec(
-                query_rephraser_spec=discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryRephraserSpec(
-                    disable=False,
-                    max_rephrase_steps=1,
-                ),
-                query_classification_spec=discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec(
-                    types=[
-                        discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec.Type.ADVERSARIAL_QUERY,
-                        discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec.Type.NON_ANSWER_SEEKING_QUERY,
-                    ]
-                ),
+        
+        key = (
+            query,
+            tuple(sorted(data_sources)) if data_sources else None,
+            preamble,
+            max_results,
+            include_citations
+        )
+        cached = self._answer_cache.get(key)
+        if cached is not None:
+            logger.info(f"Serving cached Discovery Engine answer for query: '{query[:100]}...'")
+            return cached
+        
+        task = self._inflight_queries.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute_answer_query(
+                query, None, preamble, data_sources,
+                max_results, include_citations, user_pseudo_id
+            ))
+            self._inflight_queries[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight_query(key, done))
+        else:
+            logger.info(f"Joining in-flight Discovery Engine query: '{query[:100]}...'")
+        
+        # Shield so one cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task)
+    
+    def _finish_inflight_query(self, key: Tuple, task: asyncio.Future) -> None:
+        """Drop a finished shared query and cache its answer if it succeeded."""
+        self._inflight_queries.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._answer_cache.set(key, task.result())
+    
+    def _build_request_shape(
+        self,
+        preamble: Optional[str],
+        data_sources: Optional[List[str]],
+        max_results: int,
+        include_citations: bool
+    ) -> discoveryengine.AnswerQueryRequest:
+        """Build an AnswerQuery request with everything except the per-call query, session and user."""
+        # Use default data sources if none provided
+        if not data_sources:
+            data_sources = self.get_default_data_sources()
+        
+        # Static specs are shared; the request copies them on assignment.
+        # Only a custom preamble or disabled citations needs its own copy
+        answer_generation_spec = _DEFAULT_ANSWER_GENERATION_SPEC
+        if preamble or not include_citations:
+            answer_generation_spec = AnswerGenerationSpec(_DEFAULT_ANSWER_GENERATION_SPEC)
+            if preamble:
+                answer_generation_spec.prompt_spec.preamble = preamble
+            answer_generation_spec.include_citations = include_citations
+        
+        # Configure search spec
+        search_spec = discoveryengine.AnswerQueryRequest.SearchSpec(
+            search_params=discoveryengine.AnswerQueryRequest.SearchSpec.SearchParams(
+                max_return_results=max_results,
+                data_store_specs=list(_data_store_specs(self._data_store_prefix, tuple(data_sources)))
             )
+        )
+        
+        return discoveryengine.AnswerQueryRequest(
+            serving_config=self._serving_config,
+            search_spec=search_spec,
+            query_understanding_spec=_QUERY_UNDERSTANDING_SPEC,
+            answer_generation_spec=answer_generation_spec,
+            grounding_spec=_GROUNDING_SPEC,
+        )
+    
+    def _build_answer_request(
+        self,
+        query: str,
+        session_id: Optional[str],
+        preamble: Optional[str],
+        data_sources: Optional[List[str]],
+        max_results: int,
+        include_citations: bool,
+        user_pseudo_id: Optional[str]
+    ) -> discoveryengine.AnswerQueryRequest:
+        """Build the AnswerQuery request shared by the unary and streaming calls."""
+        # Most queries use the default shape; copying the prebuilt template is
+        # one protobuf copy instead of assembling every nested spec
+        if (
+            not preamble
+            and include_citations
+            and max_results == _DEFAULT_MAX_RESULTS
+            and (not data_sources or tuple(data_sources) == DEFAULT_DATA_SOURCES)
+        ):
+            request = discoveryengine.AnswerQueryRequest(self._default_request)
+        else:
+            request = self._build_request_shape(preamble, data_sources, max_results, include_citations)
+        
+        request.query.text = query
+        if session_id:
+            request.session = session_id
+        request.user_pseudo_id = user_pseudo_id or "ask-mode-api-user"
+        return request
+    
+    def _build_query_response(
+        self,
+        response: discoveryengine.AnswerQueryResponse,
+        answer_text: str,
+        session_id: Optional[str],
+        include_citations: bool
+    ) -> QueryResponse:
+        """Map a (final) AnswerQuery response to the API response model."""
+        # Map citations
+        mapped_citations = []
+        if include_citations and hasattr(response.answer, "citations"):
+            mapped_citations = self.map_citations_to_references(response.answer)
+        
+        # Extract query classification if available
+        query_classification = None
+        if hasattr(response, "query_understanding_info") and response.query_understanding_info:
+            query_classification = {
+                "query_classification_info": dict(response.query_understanding_info.query_classification_info) if hasattr(response.query_understanding_info, "query_classification_info") else None
+            }
+        
+        # Extract grounding supports if available
+        grounding_supports = []
+        if hasattr(response.answer, "grounding_supports") and response.answer.grounding_supports:
+            for support in response.answer.grounding_supports:
+                grounding_supports.append({
+                    "segment": dict(support.segment) if hasattr(support, "segment") else None,
+                    "grounding_check_required": getattr(support, "grounding_check_required", False)
+                })
+        
+        # Build response; fields come from typed protobuf values, so skip
+        # validation and let the router serialize it straight to JSON
+        return QueryResponse.model_construct(
+            answer=answer_text,
+            citations=mapped_citations,
+            session_id=session_id,
+            query_classification=query_classification,
+            grounding_supports=grounding_supports if grounding_supports else None,
+            status="success"
+        )
+    
+    async def _send_answer_query(
+        self,
+        request: discoveryengine.AnswerQueryRequest,
+        include_citations: bool
+    ) -> QueryResponse:
+        """Send a built AnswerQuery request and map the response."""
+        async with self._admission:
+            response = await self._next_client().answer_query(request)
+        
+        answer_text = response.answer.answer_text if hasattr(response.answer, "answer_text") else ""
+        query_response = self._build_query_response(response, answer_text, request.session or None, include_citations)
+        
+        logger.info(f"Query executed successfully, answer length: {len(answer_text)} chars, citations: {len(query_response.citations)}")
+        return query_response
+    
+    async def _execute_answer_query(
+        self,
+        query: str,
+        session_id: Optional[str],
+        preamble: Optional[str],
+        data_sources: Optional[List[str]],
+        max_results: int,
+        include_citations: bool,
+        user_pseudo_id: Optional[str]
+    ) -> QueryResponse:
+        """Build and send a single AnswerQuery request to Discovery Engine."""
+        try:
+            logger.info(f"Executing Discovery Engine query: '{query[:100]}...'")
             
-            # Configure answer generation spec
-            default_preamble = (
-                "You are MoEngage Support Assistant, a helpful AI assistant for MoEngage customers. "
-                "Provide detailed, accurate answers based on MoEngage documentation. "
-                "Use proper formatting and always include relevant citations and sources. "
-                "Be specific and actionable in your responses."
+            request = self._build_answer_request(
+                query, session_id, preamble, data_sources,
+                max_results, include_citations, user_pseudo_id
             )
             
-            answer_generation_spec = discoveryengine.AnswerQueryRequest.AnswerGenerationSpec(
-                ignore_adversarial_query=False,
-                ignore_non_answer_seeking_query=False,
-                ignore_low_relevant_content=False,
-                model_spec=discoveryengine.AnswerQueryRequest.AnswerGenerationSpec.ModelSpec(
-                    model_version="gemini-2.5-flash/answer_gen/v1",
-                ),
-                prompt_spec=discoveryengine.AnswerQueryRequest.AnswerGenerationSpec.PromptSpec(
-                    preamble=preamble or default_preamble,
-                ),
-                include_citations=include_citations,
-                answer_language_code="en",
-            )
+            logger.info(f"Sending Discovery Engine request for query: '{query[:50]}...'")
+            return await self._send_answer_query(request, include_citations)
             
-            # Configure grounding spec
-            grounding_spec = discoveryengine.AnswerQueryRequest.GroundingSpec(
-                include_grounding_supports=True,
-            )
+        except Exception as e:
+            error_msg = f"Failed to execute query: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            raise Exception(error_msg)
+    
+    async def create_session_and_answer(
+        self,
+        user_id: str,
+        query: str,
+        preamble: Optional[str] = None,
+        data_sources: Optional[List[str]] = None,
+        max_results: int = 10,
+        include_citations: bool = True
+    ) -> QueryResponse:
+        """
+        Create a session for the user and answer the first query in it.
+        
+        The answer request is built first and the new session name filled in
+        once the session exists, so clients need one API round trip instead
+        of two.
+        
+        Returns:
+            QueryResponse: Answer whose session_id is the new session
             
-            # Configure search spec
-            data_store_specs = []
-            for data_source in data_sources:
-                data_store_spec = discoveryengine.SearchRequest.DataStoreSpec(
-                    data_store=f"projects/{self.project_id}/locations/{self.location}/collections/default_collection/dataStores/{data_source}"
-                )
-                data_store_specs.append(data_store_spec)
+        Raises:
+            Exception: If session creation or query execution fails
+        """
+        request = self._build_answer_request(
+            query, None, preamble, data_sources,
+            max_results, include_citations, user_id
+        )
+        session = await self.create_session(user_id)
+        request.session = session.session_id
+        
+        try:
+            logger.info(f"Sending first query for new session {session.session_id}: '{query[:50]}...'")
+            return await self._send_answer_query(request, include_citations)
+        except Exception as e:
+            error_msg = f"Failed to execute query: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            raise Exception(error_msg)
+    
+    async def stream_answer_query(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        preamble: Optional[str] = None,
+        data_sources: Optional[List[str]] = None,
+        max_results: int = 10,
+        include_citations: bool = True,
+        user_pseudo_id: Optional[str] = None
+    ) -> AsyncIterator[Union[str, QueryResponse]]:
+        """
+        Stream a Discovery Engine answer as it is generated.
+        
+        Yields answer text chunks as they arrive, then a single QueryResponse
+        with the full answer and the citations/grounding from the final chunk.
+        The admission slot is held for the whole stream.
+        
+        Raises:
+            Exception: If the streaming query fails
+        """
+        try:
+            logger.info(f"Streaming Discovery Engine query: '{query[:100]}...'")
             
-            search_spec = discoveryengine.AnswerQueryRequest.SearchSpec(
-                search_params=discoveryengine.AnswerQueryRequest.SearchSpec.SearchParams(
-                    max_return_results=max_results,
-                    data_store_specs=data_store_specs
-                )
+            request = self._build_answer_request(
+                query, session_id, preamble, data_sources,
+                max_results, include_citations, user_pseudo_id
             )
             
-            # Initialize request
-            request = discoveryengine.AnswerQueryRequest(
-                serving_config=serving_config,
-                query=discoveryengine.Query(text=query),
-                session=session_id,
-                user_pseudo_id=user_pseudo_id or "ask-mode-api-user",
-                search_spec=search_spec,
-                query_understanding_spec=query_understanding_spec,
-                answer_generation_spec=answer_generation_spec,
-                grounding_spec=grounding_spec,
-            )
+            answer_parts = []
+            last_chunk = None
+            async with self._admission:
+                stream = await self._next_client().stream_answer_query(request)
+                async for chunk in stream:
+                    text = chunk.answer.answer_text
+                    if text:
+                        answer_parts.append(text)
+                        yield text
+                    last_chunk = chunk
             
-            # Make the request
-            logger.info(f"Sending Discovery Engine request for query: '{query[:50]}...'")
-            response = self.client.answer_query(request)
-            
-            # Process the response
-            answer_text = response.answer.answer_text if hasattr(response.answer, "answer_text") else ""
-            
-            # Map citations
-            mapped_citations = []
-            if include_citations and hasattr(response.answer, "citations"):
-                mapped_citations = self.map_citations_to_references(response.answer)
-            
-            # Extract query classification if available
-            query_classification = None
-            if hasattr(response, "query_understanding_info") and response.query_understanding_info:
-                query_classification = {
-                    "query_classification_info": dict(response.query_understanding_info.query_classification_info) if hasattr(response.query_understanding_info, "query_classification_info") else None
-                }
-            
-            # Extract grounding supports if available
-            grounding_supports = []
-            if hasattr(response.answer, "grounding_supports") and response.answer.grounding_supports:
-                for support in response.answer.grounding_supports:
-                    grounding_supports.append({
-                        "segment": dict(support.segment) if hasattr(support, "segment") else None,
-                        "grounding_check_required": getattr(support, "grounding_check_required", False)
-                    })
-            
-            # Build response
-            query_response = QueryResponse(
-                answer=answer_text,
-                citations=mapped_citations,
-                session_id=session_id,
-                query_classification=query_classification,
-                grounding_supports=grounding_supports if grounding_supports else None,
-                status="success"
-            )
+            if last_chunk is None:
+                raise Exception("Discovery Engine returned an empty stream")
             
-            logger.info(f"Query executed successfully, answer length: {len(answer_text)} chars, citations: {len(mapped_citations)}")
-            return query_response
+            # Chunks carry answer deltas; citation offsets index the full text
+            answer_text = "".join(answer_parts)
+            last_chunk.answer.answer_text = answer_text
+            logger.info(f"Streamed query completed, answer length: {len(answer_text)} chars")
+            yield self._build_query_response(last_chunk, answer_text, session_id, include_citations)
             
         except Exception as e:
-            error_msg = f"Failed to execute query: {str(e)}"
+            error_msg = f"Failed to stream query: {str(e)}"
             logger.error(error_msg, exc_info=True)
             raise Exception(error_msg)
     
@@ -449,16 +824,16 @@ class SessionService:
         Returns:
             Optional[str]: Error message if validation fails, None if valid
         """
-        if not ticket_info or not ticket_info.strip():
+        stripped_length = len(ticket_info.strip()) if ticket_info else 0
+        if not stripped_length:
             return "Ticket info cannot be empty"
         
-        # Check for essential components
-        required_indicators = ['Ticket Title:', 'Ticket Description:', 'Comment']
-        if not any(indicator in ticket_info for indicator in required_indicators):
+        # Check for essential components (one pass, stops at the first hit)
+        if not _TICKET_INDICATOR_RE.search(ticket_info):
             return "Ticket info must contain at least title, description, or comments"
         
         # Check minimum length for meaningful analysis
-        if len(ticket_info.strip()) < 100:
+        if stripped_length < 100:
             return "Ticket info too short for meaningful analysis"
         
         return None
@@ -476,68 +851,67 @@ class SessionService:
         context_parts = []
         
         # Extract title
-        title_match = re.search(r'\*\*Ticket Title:\*\*\s*(.+)', ticket_info)
+        title_match = _TITLE_RE.search(ticket_info)
         if title_match:
             title = title_match.group(1).strip()
             context_parts.append(f"Issue: {title}")
         
         # Extract description
-        desc_match = re.search(r'\*\*Ticket Description:\*\*\s*(.+?)(?=\*\*Ticket Comments:|$)', ticket_info, re.DOTALL)
+        desc_match = _DESC_RE.search(ticket_info)
         if desc_match:
             description = desc_match.group(1).strip()
-            # Clean up formatting
-            description = re.sub(r'\r\n', ' ', description)
-            description = re.sub(r'\s+', ' ', description)
+            # Clean up formatting (\s+ also covers \r\n)
+            description = _WS_RE.sub(' ', description)
             context_parts.append(f"Description: {description}")
         
         # Extract key technical details from comments
         # Focus on error messages, technical configurations, and problem statements
-        comment_pattern = r'Comment #\d+.*?Author ID:.*?(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z)\s*\n(.*?)(?=Comment #|\n\n|\Z)'
-        comment_matches = re.findall(comment_pattern, ticket_info, re.DOTALL)
+        comment_matches = _COMMENT_RE.findall(ticket_info)
         
         technical_details = []
-        moengage_features = []
+        moengage_features = set()
         error_details = []
         
         for timestamp, comment_content in comment_matches[-8:]:  # Last 8 comments for relevance
             # Clean comment content
-            clean_comment = re.sub(r'\n+', ' ', comment_content)
-            clean_comment = re.sub(r'\s+', ' ', clean_comment)
-            clean_comment = clean_comment.strip()
+            clean_comment = _WS_RE.sub(' ', comment_content).strip()
             
             if not clean_comment or len(clean_comment) < 20:
                 continue
             
-            # Extract MoEngage-specific features mentioned
-            moe_features = re.findall(r'\b(Cards?|SDK|Push|Campaign|Notification|Integration|Analytics|Segmentation|API|Dashboard)\b', clean_comment, re.IGNORECASE)
-            if moe_features:
-                unique_features = list(set([f.lower() for f in moe_features]))
-                moengage_features.extend(unique_features)
+            # Extract MoEngage-specific features mentioned and classify the comment
+            has_error = has_tech = False
+            for match in _COMMENT_SCAN_RE.finditer(clean_comment):
+                kind = match.lastgroup
+                if kind == 'feat':
+                    moengage_features.add(match.group().lower())
+                elif kind == 'err':
+                    has_error = True
+                else:
+                    has_tech = True
             
-            # Extract error messages and technical issues
-            if any(keyword in clean_comment.lower() for keyword in ['error', 'issue', 'problem', 'not working', 'failed', 'bug']):
-                if len(clean_comment) > 400:
-                    clean_comment = clean_comment[:400] + "..."
-                error_details.append(clean_comment)
+            # Extract error messages and technical issues; only the first few
+            # of each are used, so later ones aren't truncated and kept
+            if has_error:
+                if len(error_details) < 3:
+                    error_details.append(clean_comment if len(clean_comment) <= 400 else clean_comment[:400] + "...")
             
             # Extract technical configurations and solutions
-            elif any(keyword in clean_comment.lower() for keyword in ['configuration', 'setup', 'implementation', 'version', 'upgrade', 'fix']):
-                if len(clean_comment) > 300:
-                    clean_comment = clean_comment[:300] + "..."
-                technical_details.append(clean_comment)
+            elif has_tech:
+                if len(technical_details) < 2:
+                    technical_details.append(clean_comment if len(clean_comment) <= 300 else clean_comment[:300] + "...")
         
         # Add MoEngage features context
         if moengage_features:
-            unique_features = list(set(moengage_features))
-            context_parts.append(f"MoEngage Features: {', '.join(unique_features)}")
+            context_parts.append(f"MoEngage Features: {', '.join(moengage_features)}")
         
         # Add error details
         if error_details:
-            context_parts.append(f"Error Details: {' | '.join(error_details[:3])}")  # Top 3 error details
+            context_parts.append(f"Error Details: {' | '.join(error_details)}")  # Top 3 error details
         
         # Add technical details
         if technical_details:
-            context_parts.append(f"Technical Details: {' | '.join(technical_details[:2])}")  # Top 2 technical details
+            context_parts.append(f"Technical Details: {' | '.join(technical_details)}")  # Top 2 technical details
         
         return "\n".join(context_parts)
     
@@ -553,7 +927,7 @@ class SessionService:
         """
         try:
             # Try to parse as JSON directly
-            parsed = json.loads(raw_answer.strip())
+            parsed = orjson.loads(raw_answer.strip())
             
             return RecommendationsResponse(
                 related_questions=parsed.get('related_questions', []),
@@ -561,32 +935,31 @@ class SessionService:
                 status="success"
             )
             
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Try to extract JSON from markdown code blocks
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', raw_answer, re.DOTALL)
-            if json_match:
+            fenced_json = _extract_fenced_json(raw_answer)
+            if fenced_json:
                 try:
-                    parsed = json.loads(json_match.group(1))
+                    parsed = orjson.loads(fenced_json)
                     return RecommendationsResponse(
                         related_questions=parsed.get('related_questions', []),
                         relevant_tickets=parsed.get('relevant_tickets', []),
                         status="success"
                     )
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     pass
             
-            # Try to extract JSON from the response text using regex
-            json_pattern = r'\{[^{}]*"related_questions"[^{}]*"relevant_tickets"[^{}]*\}'
-            json_match = re.search(json_pattern, raw_answer, re.DOTALL)
-            if json_match:
+            # Try to extract a JSON object embedded in the response text
+            embedded_json = _find_json_object(raw_answer)
+            if embedded_json:
                 try:
-                    parsed = json.loads(json_match.group(0))
+                    parsed = orjson.loads(embedded_json)
                     return RecommendationsResponse(
                         related_questions=parsed.get('related_questions', []),
                         relevant_tickets=parsed.get('relevant_tickets', []),
                         status="success"
                     )
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     pass
             
             # Fallback: provide empty response with parsing failed status
@@ -605,6 +978,34 @@ class SessionService:
                 status="error"
             )
     
+    def merge_recommendations(self, parsed: List[RecommendationsResponse], limit: int = 5) -> RecommendationsResponse:
+        """
+        Merge per-data-store recommendations, de-duplicating while keeping order.
+        
+        Args:
+            parsed: Parsed recommendations, one per data store
+            limit: Maximum questions and tickets to keep
+            
+        Returns:
+            RecommendationsResponse: Combined recommendations; successful if any input was
+        """
+        successful = [item for item in parsed if item.status == "success"]
+        if not successful:
+            return parsed[0]
+        
+        related_questions = list(dict.fromkeys(
+            question for item in successful for question in item.related_questions
+        ))[:limit]
+        relevant_tickets = list(dict.fromkeys(
+            ticket for item in successful for ticket in item.relevant_tickets
+        ))[:limit]
+        
+        return RecommendationsResponse(
+            related_questions=related_questions,
+            relevant_tickets=relevant_tickets,
+            status="success"
+        )
+    
     async def get_recommendations(
         self,
         ticket_info: str
@@ -676,19 +1077,35 @@ Guidelines:
 - Return only valid JSON, no other text
 """
             
-            # Execute query using existing answer_query method
-            query_response = await self.answer_query(
-                query=query,
-                session_id=None,  # No session needed for recommendations
-                preamble=recommendations_preamble,
-                data_sources=data_sources,
-                max_results=25,  # Higher limit to find more relevant tickets
-                include_citations=False,  # Don't need citations for this use case
-                user_pseudo_id="recommendations-api-user"
-            )
+            # Query each data store concurrently so latency tracks the slowest
+            # store rather than one combined fan-out; every call still passes
+            # through the admission limiter
+            responses = await asyncio.gather(*(
+                self.answer_query(
+                    query=query,
+                    session_id=None,  # No session needed for recommendations
+                    preamble=recommendations_preamble,
+                    data_sources=[data_source],
+                    max_results=25,  # Higher limit to find more relevant tickets
+                    include_citations=False,  # Don't need citations for this use case
+                    user_pseudo_id="recommendations-api-user"
+                )
+                for data_source in data_sources
+            ), return_exceptions=True)
             
-            # Parse the JSON response
-            recommendations = self.parse_recommendations_response(query_response.answer)
+            answers = []
+            for data_source, response in zip(data_sources, responses):
+                if isinstance(response, BaseException):
+                    logger.warning(f"Recommendations query failed for data store {data_source}: {response}")
+                else:
+                    answers.append(response.answer)
+            if not answers:
+                raise responses[0]
+            
+            # Parse each JSON response and merge
+            recommendations = self.merge_recommendations(
+                [self.parse_recommendations_response(answer) for answer in answers]
+            )
             
             logger.info(f"Generated {len(recommendations.related_questions)} questions and {len(recommendations.relevant_tickets)} ticket references")
             return recommendations
@@ -703,12 +1120,14 @@ Guidelines:
 _session_service_instance: Optional[SessionService] = None
 
 
-def get_session_service() -> SessionService:
+async def get_session_service() -> SessionService:
     """
     Get or create a singleton SessionService instance.
     
     This function is used as a FastAPI dependency to ensure we reuse
-    the same service instance across requests.
+    the same service instance across requests. It is async so the service
+    (and its gRPC aio channel) is created on the running event loop rather
+    than in FastAPI's threadpool.
     
     Returns:
         SessionService: The session service instance
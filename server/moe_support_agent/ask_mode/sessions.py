@@ -1,23 +1,166 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Dict, Any, Optional
-import asyncpg
-import json
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import contextlib
+import functools
+import orjson
 import logging
 
-from moe_support_agent.ask_mode.db import get_db
+from moe_support_agent.cache import TTLCache
+from moe_support_agent.ask_mode.db import acquire_connection
+from moe_support_agent.ask_mode.filters import build_where
+from moe_support_agent.ask_mode.errors import AskModeRoute, internal_error
 
-sessions_router = APIRouter(prefix="/api", tags=["sessions"])
+sessions_router = APIRouter(prefix="/api", tags=["sessions"], route_class=AskModeRoute)
 logger = logging.getLogger(__name__)
 
-@sessions_router.get("/sessions")
+# Encoded /asksessions responses keyed by their query parameters. Dashboards
+# poll it with the same few parameter sets, so a short TTL absorbs most of the
+# load. /sessions is not cached: ADK's session service writes that table
+# in-process and new chats have to show up right away.
+LISTING_CACHE_TTL_SECONDS = 30
+_ask_sessions_cache = TTLCache(maxsize=256, ttl=LISTING_CACHE_TTL_SECONDS)
+
+
+def invalidate_ask_sessions_cache() -> None:
+    """
+    Drop cached /asksessions pages after asksessions rows change.
+    
+    The cache is per worker process and only this worker's copy is cleared,
+    so the listing is eventually consistent: other workers may serve a page
+    up to LISTING_CACHE_TTL_SECONDS old.
+    """
+    _ask_sessions_cache.clear()
+
+
+def _next_cursor(rows, limit: int, time_column: str, id_column: str) -> Optional[Dict[str, Any]]:
+    """Keyset cursor for the page after this one, or None on the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return {"after_created_at": last[time_column], "after_id": last[id_column]}
+
+
+_SESSIONS_COLUMNS = "id, user_id, app_name, create_time, update_time, state"
+
+_ASK_SESSIONS_COLUMNS = (
+    "session_id, user_id, api_session_id, conversation_id, title, created_at, "
+    "updated_at, status, session_metadata, total_queries, last_query_at"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _listing_queries(table: str, columns: str, order_by: str, where_conditions: Tuple[str, ...], filter_param_count: int) -> Tuple[str, str, str]:
+    """
+    Build the page, count and streaming SQL for one filter shape.
+    
+    Every request with the same set of filters gets byte-identical SQL text,
+    so asyncpg's per-connection statement cache reuses the server-side
+    prepared statement instead of parsing and planning it again.
+    """
+    where_sql = f" WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+    limit_param = filter_param_count + 1
+    page_query = (
+        f"SELECT {columns}, COUNT(*) OVER() AS total_sessions FROM {table}{where_sql}"
+        f" ORDER BY {order_by} LIMIT ${limit_param} OFFSET ${limit_param + 1}"
+    )
+    count_query = f"SELECT COUNT(*) FROM {table}{where_sql}"
+    # No window count when streaming: it would make Postgres read the whole
+    # result before returning the first row
+    stream_query = (
+        f"SELECT {columns} FROM {table}{where_sql}"
+        f" ORDER BY {order_by} LIMIT ${limit_param} OFFSET ${limit_param + 1}"
+    )
+    return page_query, count_query, stream_query
+
+
+# Rows fetched per round trip when streaming through a server-side cursor
+STREAM_PREFETCH_ROWS = 200
+
+
+def _session_row(row) -> Dict[str, Any]:
+    """Project a sessions row; datetime columns are encoded by orjson."""
+    return {
+        "session_id": row['id'],
+        "user_id": row['user_id'],
+        "app_name": row['app_name'],
+        "created_at": row['create_time'],
+        "updated_at": row['update_time'],
+        "state": row['state'] or {}
+    }
+
+
+def _ask_session_row(row) -> Dict[str, Any]:
+    """Project an asksessions row; datetime columns are encoded by orjson."""
+    return {
+        "session_id": row['session_id'],
+        "user_id": row['user_id'],
+        "api_session_id": row['api_session_id'],
+        "conversation_id": row['conversation_id'],
+        "title": row['title'],
+        "created_at": row['created_at'],
+        "updated_at": row['updated_at'],
+        "status": row['status'],
+        "session_metadata": row['session_metadata'] or {},
+        "total_queries": row['total_queries'],
+        "last_query_at": row['last_query_at']
+    }
+
+
+async def _stream_rows(query: str, params: List[Any], project) -> StreamingResponse:
+    """
+    Stream a listing as JSON lines, one object per row.
+    
+    Rows come from a server-side cursor, so memory stays bounded by the
+    prefetch size and the first line is sent before the query finishes.
+    The connection, transaction and cursor are set up, and the first batch
+    fetched, before the response starts, so a busy pool (503) or a failing
+    query is reported as an HTTP error instead of a truncated body. The
+    connection is held only while the body is being sent.
+    """
+    resources = contextlib.AsyncExitStack()
+    try:
+        db = await resources.enter_async_context(acquire_connection())
+        await resources.enter_async_context(db.transaction())
+        cursor = await db.cursor(query, *params)
+        rows = await cursor.fetch(STREAM_PREFETCH_ROWS)
+    except BaseException:
+        await resources.aclose()
+        raise
+    
+    async def body():
+        nonlocal rows
+        try:
+            while rows:
+                for row in rows:
+                    yield orjson.dumps(project(row)) + b"\n"
+                if len(rows) < STREAM_PREFETCH_ROWS:
+                    break
+                rows = await cursor.fetch(STREAM_PREFETCH_ROWS)
+        finally:
+            await resources.aclose()
+    
+    # The background task releases the connection if the body is never
+    # iterated (client gone before streaming began); closing twice is a no-op
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(resources.aclose)
+    )
+
+@sessions_router.get("/sessions", response_class=ORJSONResponse)
+@internal_error("Failed to fetch sessions")
 async def get_sessions(
-    db: asyncpg.Connection = Depends(get_db),
     limit: int = Query(50, ge=1, le=1000, description="Number of results to return"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
     start_date: Optional[str] = Query(None, description="Filter sessions created after this date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[str] = Query(None, description="Filter sessions created before this date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
-    last_n_days: Optional[int] = Query(None, description="Filter sessions created in the last N days")
+    last_n_days: Optional[int] = Query(None, description="Filter sessions created in the last N days"),
+    after_created_at: Optional[datetime] = Query(None, description="Keyset cursor: created_at of the last session on the previous page"),
+    after_id: Optional[str] = Query(None, description="Keyset cursor: session_id of the last session on the previous page"),
+    stream: bool = Query(False, description="Stream matching sessions as JSON lines")
 ):
     """
     Get sessions from the sessions table with optional date filtering and pagination.
@@ -28,145 +171,79 @@ async def get_sessions(
     - start_date: Filter sessions created on or after this date
     - end_date: Filter sessions created on or before this date
     - last_n_days: Filter sessions created within the last N days
+    - after_created_at/after_id: Keyset cursor taken from the previous page's
+      next_cursor; replaces offset (which is ignored) and stays fast at any
+      depth. total_count then counts sessions from the cursor onwards
+    - stream: Return one JSON object per line (application/x-ndjson) instead
+      of the envelope; suited to large limits
     
     Either use start_date/end_date combination or last_n_days, but not both.
     """
-    try:
-        # Build dynamic WHERE conditions
-        where_conditions = []
-        params = []
-        param_counter = 1
-        
-        # Date filtering
-        if last_n_days is not None:
-            # Calculate the date that's last_n_days ago
-            start_date_from_days = datetime.now() - timedelta(days=last_n_days)
-            where_conditions.append(f"create_time >= ${param_counter}")
-            params.append(start_date_from_days)
-            param_counter += 1
-        else:
-            # Start date filter
-            if start_date:
-                try:
-                    # Convert string to datetime object
-                    start_datetime = None
-                    if len(start_date) == 10:  # YYYY-MM-DD format
-                        start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                    else:
-                        # Try to parse with time component
-                        start_datetime = datetime.strptime(start_date, "%Y-%m-%dT%H:%M:%S" if "T" in start_date else "%Y-%m-%d %H:%M:%S")
-                    
-                    where_conditions.append(f"create_time >= ${param_counter}")
-                    params.append(start_datetime)
-                    param_counter += 1
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Invalid start_date format: {e}")
-            
-            # End date filter
-            if end_date:
-                try:
-                    # Convert string to datetime object
-                    end_datetime = None
-                    if len(end_date) == 10:  # YYYY-MM-DD format
-                        # Add end of day for inclusive filtering
-                        end_datetime = datetime.strptime(f"{end_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
-                    else:
-                        # Try to parse with time component
-                        end_datetime = datetime.strptime(end_date, "%Y-%m-%dT%H:%M:%S" if "T" in end_date else "%Y-%m-%d %H:%M:%S")
-                    
-                    where_conditions.append(f"create_time <= ${param_counter}")
-                    params.append(end_datetime)
-                    param_counter += 1
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Invalid end_date format: {e}")
-        
-        # Build the count query for total results
-        count_query = "SELECT COUNT(*) as total_sessions FROM sessions"
-        if where_conditions:
-            count_query += f" WHERE {' AND '.join(where_conditions)}"
-        
-        # Execute count query
-        result = await db.fetchrow(count_query, *params)
-        total_sessions = result['total_sessions'] if result else 0
-        
-        # Build the main query
-        main_query = """
-            SELECT 
-                id, 
-                user_id, 
-                app_name, 
-                create_time, 
-                update_time, 
-                state
-            FROM sessions
-        """
-        
-        if where_conditions:
-            main_query += f" WHERE {' AND '.join(where_conditions)}"
-        
-        # Add sorting and pagination
-        main_query += f" ORDER BY create_time DESC LIMIT ${param_counter} OFFSET ${param_counter + 1}"
-        params.append(limit)
-        param_counter += 1
-        params.append(offset)
-        
-        # Execute main query
+    where_conditions, params = build_where(
+        "create_time",
+        id_column="id",
+        start_date=start_date,
+        end_date=end_date,
+        last_n_days=last_n_days,
+        after_created_at=after_created_at,
+        after_id=after_id,
+        naive_time_column=True
+    )
+    if after_id is not None:
+        offset = 0
+
+    # Pick the prebuilt statements for this filter shape
+    main_query, count_query, stream_query = _listing_queries(
+        "sessions", _SESSIONS_COLUMNS, "create_time DESC, id DESC", where_conditions, len(params)
+    )
+    filter_params = params[:]
+    params.append(limit)
+    params.append(offset)
+
+    if stream:
+        return await _stream_rows(stream_query, params, _session_row)
+
+    # Execute main query; the window count rides along with the page
+    async with acquire_connection() as db:
         rows = await db.fetch(main_query, *params)
-        
-        # Format results
-        sessions = []
-        for row in rows:
-            # Parse state JSON with error handling
-            state_data = {}
-            if row['state']:
-                try:
-                    state_data = json.loads(row['state']) if isinstance(row['state'], str) else row['state']
-                except (json.JSONDecodeError, TypeError):
-                    state_data = {"error": "Invalid state format"}
-            
-            sessions.append({
-                "session_id": row['id'],
-                "user_id": row['user_id'],
-                "app_name": row['app_name'],
-                "created_at": row['create_time'].isoformat() if row['create_time'] else None,
-                "updated_at": row['update_time'].isoformat() if row['update_time'] else None,
-                "state": state_data
-            })
-        
-        return {
-            "success": True,
-            "data": {
-                "sessions": sessions,
-                "total_count": total_sessions,
-                "limit": limit,
-                "offset": offset,
-                "filters": {
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "last_n_days": last_n_days
-                }
+        total_sessions = rows[0]['total_sessions'] if rows else 0
+        if not rows and offset:
+            # Paged past the end, so no row carried the total
+            total_sessions = await db.fetchval(count_query, *filter_params)
+
+    # Format results; datetime columns are encoded by orjson
+    sessions = [_session_row(row) for row in rows]
+
+    body = orjson.dumps({
+        "success": True,
+        "data": {
+            "sessions": sessions,
+            "total_count": total_sessions,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": _next_cursor(rows, limit, "create_time", "id"),
+            "filters": {
+                "start_date": start_date,
+                "end_date": end_date,
+                "last_n_days": last_n_days
             }
         }
-        
-    except Exception as e:
-        error_msg = f"Error fetching sessions: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to fetch sessions: {str(e)}"
-        )
-
-@sessions_router.get("/asksessions")
+    })
+    return Response(content=body, media_type="application/json")
+
+@sessions_router.get("/asksessions", response_class=ORJSONResponse)
+@internal_error("Failed to fetch ask sessions")
 async def get_ask_sessions(
-    db: asyncpg.Connection = Depends(get_db),
     limit: int = Query(50, ge=1, le=1000, description="Number of results to return"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
     start_date: Optional[str] = Query(None, description="Filter sessions created after this date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[str] = Query(None, description="Filter sessions created before this date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
     last_n_days: Optional[int] = Query(None, description="Filter sessions created in the last N days"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
-    status: Optional[str] = Query(None, description="Filter by session status")
+    status: Optional[str] = Query(None, description="Filter by session status"),
+    after_created_at: Optional[datetime] = Query(None, description="Keyset cursor: created_at of the last session on the previous page"),
+    after_id: Optional[str] = Query(None, description="Keyset cursor: session_id of the last session on the previous page"),
+    stream: bool = Query(False, description="Stream matching sessions as JSON lines")
 ):
     """
     Get asksessions with optional filtering and pagination.
@@ -179,155 +256,75 @@ async def get_ask_sessions(
     - last_n_days: Filter sessions created within the last N days
     - user_id: Filter by specific user ID
     - status: Filter by session status
+    - after_created_at/after_id: Keyset cursor taken from the previous page's
+      next_cursor; replaces offset (which is ignored) and stays fast at any
+      depth. total_count then counts sessions from the cursor onwards
+    - stream: Return one JSON object per line (application/x-ndjson) instead
+      of the envelope; suited to large limits
     
     Either use start_date/end_date combination or last_n_days, but not both.
+    
+    Non-streamed pages are cached per worker process for
+    LISTING_CACHE_TTL_SECONDS. Writes only invalidate the writing worker's
+    cache, so other workers may lag behind by up to that long.
     """
-    try:
-        # Build dynamic WHERE conditions
-        where_conditions = []
-        params = []
-        param_counter = 1
-        
-        # User ID filter
-        if user_id:
-            where_conditions.append(f"user_id = ${param_counter}")
-            params.append(user_id)
-            param_counter += 1
-        
-        # Status filter
-        if status:
-            where_conditions.append(f"status = ${param_counter}")
-            params.append(status)
-            param_counter += 1
-        
-        # Date filtering
-        if last_n_days is not None:
-            # Calculate the date that's last_n_days ago
-            start_date_from_days = datetime.now() - timedelta(days=last_n_days)
-            where_conditions.append(f"created_at >= ${param_counter}")
-            params.append(start_date_from_days)
-            param_counter += 1
-        else:
-            # Start date filter
-            if start_date:
-                try:
-                    # Convert string to datetime object
-                    start_datetime = None
-                    if len(start_date) == 10:  # YYYY-MM-DD format
-                        start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                    else:
-                        # Try to parse with time component
-                        start_datetime = datetime.strptime(start_date, "%Y-%m-%dT%H:%M:%S" if "T" in start_date else "%Y-%m-%d %H:%M:%S")
-                    
-                    where_conditions.append(f"created_at >= ${param_counter}")
-                    params.append(start_datetime)
-                    param_counter += 1
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Invalid start_date format: {e}")
-            
-            # End date filter
-            if end_date:
-                try:
-                    # Convert string to datetime object
-                    end_datetime = None
-                    if len(end_date) == 10:  # YYYY-MM-DD format
-                        # Add end of day for inclusive filtering
-                        end_datetime = datetime.strptime(f"{end_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
-                    else:
-                        # Try to parse with time component
-                        end_datetime = datetime.strptime(end_date, "%Y-%m-%dT%H:%M:%S" if "T" in end_date else "%Y-%m-%d %H:%M:%S")
-                    
-                    where_conditions.append(f"created_at <= ${param_counter}")
-                    params.append(end_datetime)
-                    param_counter += 1
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Invalid end_date format: {e}")
-        
-        # Build the count query for total results
-        count_query = "SELECT COUNT(*) as total_sessions FROM asksessions"
-        if where_conditions:
-            count_query += f" WHERE {' AND '.join(where_conditions)}"
-        
-        # Execute count query
-        result = await db.fetchrow(count_query, *params)
-        total_sessions = result['total_sessions'] if result else 0
-        
-        # Build the main query
-        main_query = """
-            SELECT 
-                session_id, 
-                user_id, 
-                api_session_id, 
-                conversation_id, 
-                title,
-                created_at, 
-                updated_at, 
-                status, 
-                session_metadata, 
-                total_queries, 
-                last_query_at
-            FROM asksessions
-        """
-        
-        if where_conditions:
-            main_query += f" WHERE {' AND '.join(where_conditions)}"
-        
-        # Add sorting and pagination
-        main_query += f" ORDER BY created_at DESC LIMIT ${param_counter} OFFSET ${param_counter + 1}"
-        params.append(limit)
-        param_counter += 1
-        params.append(offset)
-        
-        # Execute main query
+    cache_key = (limit, offset, start_date, end_date, last_n_days, user_id, status, after_created_at, after_id)
+    cached = None if stream else _ask_sessions_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    where_conditions, params = build_where(
+        "created_at",
+        id_column="session_id",
+        user_id=user_id,
+        status=status,
+        start_date=start_date,
+        end_date=end_date,
+        last_n_days=last_n_days,
+        after_created_at=after_created_at,
+        after_id=after_id
+    )
+    if after_id is not None:
+        offset = 0
+
+    # Pick the prebuilt statements for this filter shape
+    main_query, count_query, stream_query = _listing_queries(
+        "asksessions", _ASK_SESSIONS_COLUMNS, "created_at DESC, session_id DESC", where_conditions, len(params)
+    )
+    filter_params = params[:]
+    params.append(limit)
+    params.append(offset)
+
+    if stream:
+        return await _stream_rows(stream_query, params, _ask_session_row)
+
+    # Execute main query; the window count rides along with the page
+    async with acquire_connection() as db:
         rows = await db.fetch(main_query, *params)
-        
-        # Format results
-        sessions = []
-        for row in rows:
-            # Parse session_metadata JSON with error handling
-            metadata = {}
-            if row['session_metadata']:
-                try:
-                    metadata = json.loads(row['session_metadata']) if isinstance(row['session_metadata'], str) else row['session_metadata']
-                except (json.JSONDecodeError, TypeError):
-                    metadata = {"error": "Invalid metadata format"}
-            
-            sessions.append({
-                "session_id": row['session_id'],
-                "user_id": row['user_id'],
-                "api_session_id": row['api_session_id'],
-                "conversation_id": row['conversation_id'],
-                "title": row['title'],
-                "created_at": row['created_at'].isoformat() if row['created_at'] else None,
-                "updated_at": row['updated_at'].isoformat() if row['updated_at'] else None,
-                "status": row['status'],
-                "session_metadata": metadata,
-                "total_queries": row['total_queries'],
-                "last_query_at": row['last_query_at'].isoformat() if row['last_query_at'] else None
-            })
-        
-        return {
-            "success": True,
-            "data": {
-                "sessions": sessions,
-                "total_count": total_sessions,
-                "limit": limit,
-                "offset": offset,
-                "filters": {
-                    "user_id": user_id,
-                    "status": status,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "last_n_days": last_n_days
-                }
+        total_sessions = rows[0]['total_sessions'] if rows else 0
+        if not rows and offset:
+            # Paged past the end, so no row carried the total
+            total_sessions = await db.fetchval(count_query, *filter_params)
+
+    # Format results; datetime columns are encoded by orjson
+    sessions = [_ask_session_row(row) for row in rows]
+
+    body = orjson.dumps({
+        "success": True,
+        "data": {
+            "sessions": sessions,
+            "total_count": total_sessions,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": _next_cursor(rows, limit, "created_at", "session_id"),
+            "filters": {
+                "user_id": user_id,
+                "status": status,
+                "start_date": start_date,
+                "end_date": end_date,
+                "last_n_days": last_n_days
             }
         }
-        
-    except Exception as e:
-        error_msg = f"Error fetching ask sessions: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to fetch ask sessions: {str(e)}"
-        )
\ No newline at end of file
+    })
+    _ask_sessions_cache.set(cache_key, body)
+    return Response(content=body, media_type="application/json")
\ No newline at end of file
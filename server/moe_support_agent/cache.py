@@ -0,0 +1,36 @@
+"""
+In-process caching helpers shared by the agent and Ask Mode modules.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed time-to-live."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+    
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,133 @@
+"""
+Gemini context caching for the static prefix of an agent's LLM requests.
+
+Attached as an agent's before-model callback, a ContextCache serves the
+system instruction and tool declarations from a cached content resource, so
+only the conversation itself is prefilled on each turn.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional
+from google import genai
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Extend a cache's TTL in the background once it is this close to expiring
+CONTEXT_CACHE_RENEW_MARGIN_SECONDS = 300
+# After a failed cache create (e.g. prompt below the model's minimum size),
+# wait this long before trying again instead of retrying on every turn
+CONTEXT_CACHE_RETRY_SECONDS = 600
+
+
+class ContextCache:
+    """
+    Gemini context cache for the static prefix of an agent's requests.
+    
+    The system instruction (agent prompt plus ADK's identity, transfer and
+    planner instructions) and the tool declarations are identical on every
+    turn. As a before-model callback this moves them into a cached content
+    resource and sends only its name, so the model does not prefill them
+    again each turn.
+    The cache is keyed by a fingerprint of that prefix, so a changed prompt or
+    tool set gets a new cache; failures fall back to the uncached request.
+    """
+    
+    def __init__(self, ttl_seconds: int, display_name: Optional[str] = None):
+        self._ttl_seconds = ttl_seconds
+        self._display_name = display_name
+        self._client: Optional[genai.Client] = None
+        self._name: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._renewal: Optional[asyncio.Task] = None
+    
+    async def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        request_config = llm_request.config
+        if request_config is None or request_config.cached_content or not request_config.system_instruction:
+            return None
+        
+        name = await self._cache_name(llm_request.model, request_config)
+        if name is not None:
+            # Cached content already carries these; the API rejects requests
+            # that set them as well
+            request_config.cached_content = name
+            request_config.system_instruction = None
+            request_config.tools = None
+            request_config.tool_config = None
+        return None
+    
+    async def _cache_name(self, model: str, request_config: types.GenerateContentConfig) -> Optional[str]:
+        fingerprint = _prefix_fingerprint(model, request_config)
+        now = time.monotonic()
+        if fingerprint == self._fingerprint and now < self._expires_at:
+            if now >= self._expires_at - CONTEXT_CACHE_RENEW_MARGIN_SECONDS and self._renewal is None:
+                self._renewal = asyncio.create_task(self._renew(self._name))
+            return self._name
+        if now < self._retry_at and fingerprint == self._fingerprint:
+            return None
+        
+        async with self._lock:
+            if fingerprint == self._fingerprint and time.monotonic() < self._expires_at:
+                return self._name
+            try:
+                cached_content = await self._genai_client().aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=request_config.system_instruction,
+                        tools=request_config.tools,
+                        tool_config=request_config.tool_config,
+                        ttl=f"{self._ttl_seconds}s",
+                        display_name=self._display_name,
+                    ),
+                )
+            except Exception as e:
+                logger.warning("Context cache creation failed, sending the full prompt: %s", e)
+                self._name = None
+                self._fingerprint = fingerprint
+                self._expires_at = 0.0
+                self._retry_at = time.monotonic() + CONTEXT_CACHE_RETRY_SECONDS
+                return None
+            self._name = cached_content.name
+            self._fingerprint = fingerprint
+            self._expires_at = time.monotonic() + self._ttl_seconds
+            logger.info("Created context cache %s for model %s", self._name, model)
+            return self._name
+    
+    async def _renew(self, name: str) -> None:
+        try:
+            await self._genai_client().aio.caches.update(
+                name=name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self._ttl_seconds}s"),
+            )
+            if name == self._name:
+                self._expires_at = time.monotonic() + self._ttl_seconds
+        except Exception as e:
+            # The next turn after expiry creates a fresh cache
+            logger.warning("Context cache renewal failed for %s: %s", name, e)
+        finally:
+            self._renewal = None
+    
+    def _genai_client(self) -> genai.Client:
+        # Same environment-driven client (API key or Vertex AI) ADK's Gemini uses
+        if self._client is None:
+            self._client = genai.Client()
+        return self._client
+
+
+def _prefix_fingerprint(model: str, request_config: types.GenerateContentConfig) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model.encode())
+    digest.update(str(request_config.system_instruction).encode())
+    for tool in request_config.tools or ():
+        digest.update(tool.model_dump_json(exclude_none=True).encode())
+    if request_config.tool_config is not None:
+        digest.update(request_config.tool_config.model_dump_json(exclude_none=True).encode())
+    return digest.hexdigest()
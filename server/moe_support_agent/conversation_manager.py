@@ -9,6 +9,8 @@ This agent handles:
 """
 
 import logging
+import re
+import time
 from typing import Dict, Any, List, AsyncGenerator, Sequence, Optional
 from typing_extensions import override
 from google.adk.agents import BaseAgent
@@ -19,6 +21,144 @@ from google.genai import types
 
 logger = logging.getLogger(__name__)
 
+# Most recent turns kept in session_state["conversation_history"]
+MAX_CONVERSATION_HISTORY = 32
+
+
+def _compile_keywords(keywords: Sequence[str]) -> "re.Pattern[str]":
+    """Compile a keyword list into one alternation that matches anywhere, like `in`"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+# Intent keyword sets, each compiled once so classification is a single
+# regex scan per category instead of one substring scan per keyword
+_GREETING_RE = _compile_keywords(["hi", "hello", "hey", "good morning", "good afternoon", "good evening"])
+
+# Follow-up detection - key for conversational flow
+_FOLLOWUP_RE = _compile_keywords([
+    "what about", "what if", "can you also", "how about", "and what", 
+    "also", "additionally", "furthermore", "what else", "any other",
+    "follow up", "more details", "explain more", "tell me more"
+])
+
+# Keywords that keep a query inside the current conversation context
+_CONTEXT_KEYWORD_RES = {
+    "technical": _compile_keywords(["campaign", "delivery", "error", "issue", "problem", "debug", "fix"]),
+    "knowledge": _compile_keywords(["how", "what", "explain", "guide", "setup", "configure"]),
+    "ticket": _compile_keywords(["ticket", "summary", "analyze", "details"])
+}
+
+# Topic intents in priority order: when a query mentions several topics the
+# earliest one here wins
+_TOPIC_KEYWORDS = (
+    ("ticket_analysis", ["ticket", "zendesk", "summarize", "summarise", "summary", "analyze ticket"]),
+    ("technical_troubleshooting", [
+        "campaign", "not delivering", "error", "failed", "debug", "issue", 
+        "problem", "api", "logs", "delivery", "performance", "rate limit"
+    ]),
+    ("knowledge_search", [
+        "how to", "what is", "explain", "setup", "configure", "guide", 
+        "documentation", "help", "best practice", "feature"
+    ])
+)
+_TOPIC_PRIORITY = {intent: rank for rank, (intent, _) in enumerate(_TOPIC_KEYWORDS)}
+
+# All topic keywords in one zero-width lookahead, so a single scan reports a
+# match at every position where any keyword starts, overlaps included. At a
+# given position the higher-priority topic is tried first.
+_TOPIC_SCAN_RE = re.compile("(?=(?:%s))" % "|".join(
+    f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})" for intent, keywords in _TOPIC_KEYWORDS
+))
+
+
+def _classify_topic(query_lower: str) -> Optional[str]:
+    """Return the highest-priority topic intent mentioned in the query, if any"""
+    best = None
+    best_rank = len(_TOPIC_KEYWORDS)
+    for match in _TOPIC_SCAN_RE.finditer(query_lower):
+        rank = _TOPIC_PRIORITY[match.lastgroup]
+        if rank < best_rank:
+            if rank == 0:
+                # Nothing outranks the first topic; stop scanning
+                return match.lastgroup
+            best, best_rank = match.lastgroup, rank
+    return best
+
+
+# Canned replies for turns that are not delegated to a specialist
+_GREETING_TEXT = """Hello! I'm your MoEngage Support Assistant. I can help you with:
+
+🔧 **Technical Issues**: Campaign delivery, API errors, debugging
+📚 **Knowledge & Guides**: How-to guides, feature explanations, setup
+🎫 **Ticket Analysis**: Zendesk ticket summaries and analysis
+💬 **Follow-up Questions**: Clarifications and additional help
+
+What can I assist you with today?"""
+
+_CLARIFICATION_TEXT = """I'd be happy to help you! However, I need a bit more information to provide the best assistance.
+
+Could you please provide more details about:
+• What specific issue are you experiencing?
+• Which feature or campaign is affected?
+• Any error messages you've seen?
+• What you're trying to accomplish?
+
+The more details you can share, the better I can help you!"""
+
+_GENERAL_TEXT = """I understand you have a question. Let me help you find the right information.
+
+Based on your query, I can:
+• Search our knowledge base and documentation
+• Look up technical troubleshooting guides
+• Analyze support tickets and historical solutions
+• Provide step-by-step guidance
+
+Could you provide a bit more context about what you're looking for? This will help me direct you to the most relevant specialist."""
+
+
+def _model_content(text: str) -> types.Content:
+    # Replies are identical on every turn, so each Content is built once at
+    # import and shared by every Event this agent yields
+    return types.Content(role='model', parts=[types.Part(text=text)])
+
+
+# intent -> (conversation_context, reply) for turns this agent answers itself
+_REPLIES = {
+    "greeting": ("greeting", _model_content(_GREETING_TEXT)),
+    "clarification": ("clarification", _model_content(_CLARIFICATION_TEXT)),
+    "general": ("general", _model_content(_GENERAL_TEXT))
+}
+
+# intent -> (target agent, conversation_context or None to keep the current
+# one, transfer_reason, acknowledgement) for turns delegated to a specialist
+_TRANSFERS = {
+    "followup": (
+        "FollowUpSpecialist", None, "followup_question",
+        _model_content("Let me help you with that follow-up question...")
+    ),
+    "knowledge_search": (
+        "KnowledgeSpecialist", "knowledge", "knowledge_search",
+        _model_content("I'll search our knowledge base for you...")
+    ),
+    "technical_troubleshooting": (
+        "TechnicalTroubleshootAgent", "technical", "technical_issue",
+        _model_content("I'll investigate this technical issue for you...")
+    ),
+    "ticket_analysis": (
+        "TicketSpecialist", "ticket", "ticket_analysis",
+        _model_content("I'll analyze that ticket for you...")
+    )
+}
+
+
+def _set_state(state, key: str, value: Any) -> None:
+    """Write a session-state key only when its value actually changes"""
+    # Routing keys usually hold the same value turn after turn; skipping the
+    # no-op assignment keeps them out of the state that gets persisted
+    if state.get(key) != value:
+        state[key] = value
+
+
 class ConversationManager(BaseAgent):
     """
     Root agent that handles conversation routing and maintains flow continuity
@@ -29,15 +169,19 @@ class ConversationManager(BaseAgent):
     
     def _extract_latest_user_message(self, ctx: InvocationContext) -> str:
         """Extract the current user message from the invocation context"""
-        if ctx.user_content and ctx.user_content.parts:
-            for part in ctx.user_content.parts:
-                if part.text and part.text.strip():
-                    user_message = part.text.strip()
-                    logger.info(f"[{self.name}] Extracted user message: '{user_message[:100]}...'")
-                    return user_message
+        parts = ctx.user_content.parts if ctx.user_content else None
+        # First non-blank text part wins; later parts are never stripped
+        user_message = next(
+            (text for text in (part.text.strip() for part in parts or () if part.text) if text),
+            None
+        )
+        if user_message is None:
+            logger.info(f"[{self.name}] No user message found, using default.")
+            return "No query provided for this session."
         
-        logger.info(f"[{self.name}] No user message found, using default.")
-        return "No query provided for this session."
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"[{self.name}] Extracted user message: '{user_message[:100]}...'")
+        return user_message
     
     def _classify_intent(self, user_query: str, session_state: Dict) -> str:
         """Enhanced intent classification with conversation context"""
@@ -50,52 +194,24 @@ class ConversationManager(BaseAgent):
         logger.info(f"[{self.name}] Classifying query: '{query_lower}' with context: '{current_context}'")
         
         # Greeting patterns
-        greeting_patterns = ["hi", "hello", "hey", "good morning", "good afternoon", "good evening"]
-        if any(greeting in query_lower for greeting in greeting_patterns) and len(query_lower) < 25:
+        if len(query_lower) < 25 and _GREETING_RE.search(query_lower):
             return "greeting"
         
         # Follow-up detection - key for conversational flow
-        followup_patterns = [
-            "what about", "what if", "can you also", "how about", "and what", 
-            "also", "additionally", "furthermore", "what else", "any other",
-            "follow up", "more details", "explain more", "tell me more"
-        ]
-        if any(pattern in query_lower for pattern in followup_patterns) and current_context:
+        if current_context and _FOLLOWUP_RE.search(query_lower):
             return "followup"
         
         # Context-based follow-up detection
         if current_context and last_agent and len(query_lower) > 5:
             # If we're in a conversation context and user asks a related question
-            context_keywords = {
-                "technical": ["campaign", "delivery", "error", "issue", "problem", "debug", "fix"],
-                "knowledge": ["how", "what", "explain", "guide", "setup", "configure"],
-                "ticket": ["ticket", "summary", "analyze", "details"]
-            }
-            
-            if current_context in context_keywords:
-                if any(keyword in query_lower for keyword in context_keywords[current_context]):
-                    return "followup"
-        
-        # Ticket-related queries
-        ticket_patterns = ["ticket", "zendesk", "summarize", "summarise", "summary", "analyze ticket"]
-        if any(pattern in query_lower for pattern in ticket_patterns):
-            return "ticket_analysis"
+            context_re = _CONTEXT_KEYWORD_RES.get(current_context)
+            if context_re is not None and context_re.search(query_lower):
+                return "followup"
         
-        # Technical troubleshooting
-        technical_patterns = [
-            "campaign", "not delivering", "error", "failed", "debug", "issue", 
-            "problem", "api", "logs", "delivery", "performance", "rate limit"
-        ]
-        if any(pattern in query_lower for pattern in technical_patterns):
-            return "technical_troubleshooting"
-        
-        # Knowledge queries
-        knowledge_patterns = [
-            "how to", "what is", "explain", "setup", "configure", "guide", 
-            "documentation", "help", "best practice", "feature"
-        ]
-        if any(pattern in query_lower for pattern in knowledge_patterns):
-            return "knowledge_search"
+        # Ticket, technical and knowledge queries, in that priority
+        topic = _classify_topic(query_lower)
+        if topic is not None:
+            return topic
         
         # Clarification needed for very short queries
         if len(query_lower.strip()) < 5:
@@ -113,145 +229,40 @@ class ConversationManager(BaseAgent):
         user_query = self._extract_latest_user_message(ctx)
         
         # Initialize or update session state
-        if "conversation_history" not in ctx.session.state:
-            ctx.session.state["conversation_history"] = []
+        history = ctx.session.state.setdefault("conversation_history", [])
         
         # Update session state with current query
         ctx.session.state["current_query"] = user_query
-        ctx.session.state["conversation_history"].append({
+        history.append({
             "role": "user", 
             "content": user_query,
-            "timestamp": str(ctx.session.state.get("message_count", 0))
+            "timestamp": time.time()
         })
+        if len(history) > MAX_CONVERSATION_HISTORY:
+            # Keep the persisted state from growing with session length
+            del history[:-MAX_CONVERSATION_HISTORY]
         
         # Classify intent with conversation context
         intent = self._classify_intent(user_query, ctx.session.state)
         logger.info(f"[{self.name}] Classified intent: {intent}")
         
         # Route based on intent using ADK delegation pattern
-        if intent == "greeting":
-            async for event in self._handle_greeting(ctx):
-                yield event
-            
-        elif intent == "followup":
-            # Delegate to follow-up specialist
-            logger.info(f"[{self.name}] Transferring to FollowUpSpecialist for follow-up question")
-            ctx.session.state["transfer_reason"] = "followup_question"
-            yield Event(
-                author=self.name, 
-                content=types.Content(
-                    role='model',
-                    parts=[types.Part(text="Let me help you with that follow-up question...")]
-                ),
-                actions=EventActions(transfer_to_agent="FollowUpSpecialist")
-            )
-            
-        elif intent == "knowledge_search":
-            # Delegate to knowledge specialist
-            logger.info(f"[{self.name}] Transferring to KnowledgeSpecialist for knowledge query")
-            ctx.session.state["conversation_context"] = "knowledge"
-            ctx.session.state["transfer_reason"] = "knowledge_search"
-            yield Event(
-                author=self.name, 
-                content=types.Content(
-                    role='model',
-                    parts=[types.Part(text="I'll search our knowledge base for you...")]
-                ),
-                actions=EventActions(transfer_to_agent="KnowledgeSpecialist")
-            )
-            
-        elif intent == "technical_troubleshooting":
-            # Delegate to technical specialist
-            logger.info(f"[{self.name}] Transferring to TechnicalTroubleshootAgent for technical issue")
-            ctx.session.state["conversation_context"] = "technical"
-            ctx.session.state["transfer_reason"] = "technical_issue"
-            yield Event(
-                author=self.name, 
-                content=types.Content(
-                    role='model',
-                    parts=[types.Part(text="I'll investigate this technical issue for you...")]
-                ),
-                actions=EventActions(transfer_to_agent="TechnicalTroubleshootAgent")
-            )
-            
-        elif intent == "ticket_analysis":
-            # Delegate to ticket specialist
-            logger.info(f"[{self.name}] Transferring to TicketSpecialist for ticket analysis")
-            ctx.session.state["conversation_context"] = "ticket"
-            ctx.session.state["transfer_reason"] = "ticket_analysis"
+        transfer = _TRANSFERS.get(intent)
+        if transfer is not None:
+            agent_name, context, reason, content = transfer
+            logger.info(f"[{self.name}] Transferring to {agent_name} for {intent}")
+            if context is not None:
+                _set_state(ctx.session.state, "conversation_context", context)
+            _set_state(ctx.session.state, "transfer_reason", reason)
             yield Event(
                 author=self.name, 
-                content=types.Content(
-                    role='model',
-                    parts=[types.Part(text="I'll analyze that ticket for you...")]
-                ),
-                actions=EventActions(transfer_to_agent="TicketSpecialist")
+                content=content,
+                actions=EventActions(transfer_to_agent=agent_name)
             )
-            
-        elif intent == "clarification":
-            async for event in self._handle_clarification(ctx):
-                yield event
-            
-        else:
-            # Handle general queries
-            async for event in self._handle_general(ctx):
-                yield event
-    
-    async def _handle_greeting(self, ctx: InvocationContext):
-        """Handle greeting responses"""
-        greeting_response = """Hello! I'm your MoEngage Support Assistant. I can help you with:
-
-🔧 **Technical Issues**: Campaign delivery, API errors, debugging
-📚 **Knowledge & Guides**: How-to guides, feature explanations, setup
-🎫 **Ticket Analysis**: Zendesk ticket summaries and analysis
-💬 **Follow-up Questions**: Clarifications and additional help
-
-What can I assist you with today?"""
-        
-        ctx.session.state["conversation_context"] = "greeting"
-        ctx.session.state["last_active_agent"] = self.name
-        
-        yield Event(author=self.name, content=types.Content(
-            role='model', 
-            parts=[types.Part(text=greeting_response)]
-        ))
-    
-    async def _handle_clarification(self, ctx: InvocationContext):
-        """Handle clarification requests"""
-        clarification_response = """I'd be happy to help you! However, I need a bit more information to provide the best assistance.
-
-Could you please provide more details about:
-• What specific issue are you experiencing?
-• Which feature or campaign is affected?
-• Any error messages you've seen?
-• What you're trying to accomplish?
-
-The more details you can share, the better I can help you!"""
-        
-        ctx.session.state["conversation_context"] = "clarification"
-        ctx.session.state["last_active_agent"] = self.name
-        
-        yield Event(author=self.name, content=types.Content(
-            role='model',
-            parts=[types.Part(text=clarification_response)]
-        ))
-    
-    async def _handle_general(self, ctx: InvocationContext):
-        """Handle general queries that don't fit specific categories"""
-        general_response = """I understand you have a question. Let me help you find the right information.
-
-Based on your query, I can:
-• Search our knowledge base and documentation
-• Look up technical troubleshooting guides
-• Analyze support tickets and historical solutions
-• Provide step-by-step guidance
-
-Could you provide a bit more context about what you're looking for? This will help me direct you to the most relevant specialist."""
-        
-        ctx.session.state["conversation_context"] = "general"
-        ctx.session.state["last_active_agent"] = self.name
+            return
         
-        yield Event(author=self.name, content=types.Content(
-            role='model',
-            parts=[types.Part(text=general_response)]
-        ))
+        # Greeting, clarification and anything else is answered directly
+        context, content = _REPLIES.get(intent, _REPLIES["general"])
+        _set_state(ctx.session.state, "conversation_context", context)
+        _set_state(ctx.session.state, "last_active_agent", self.name)
+        yield Event(author=self.name, content=content)
@@ -6,15 +6,28 @@ This module provides search functionality using Google's Generative AI App Build
 and help documentation.
 """
 
+import asyncio
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Any, List, Optional
 
 from google.api_core.client_options import ClientOptions
+from google.api_core.exceptions import DeadlineExceeded
 from google.cloud import discoveryengine_v1 as discoveryengine
+from google.cloud.discoveryengine_v1.services.conversational_search_service.transports import (
+    ConversationalSearchServiceGrpcAsyncIOTransport
+)
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 
+from .cache import TTLCache
+
+if TYPE_CHECKING:
+    from .semantic_cache import SemanticCache
+
 # Import configuration
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -45,19 +58,168 @@ except Exception as e:
 DEFAULT_PROJECT_ID = discovery_config["project_id"]
 DEFAULT_LOCATION = discovery_config["location"]
 DEFAULT_ENGINE_ID = discovery_config["engine_id"]
+MAX_INFLIGHT_REQUESTS = discovery_config["max_inflight"]
+CHANNEL_POOL_SIZE = discovery_config["channel_pool_size"]
+SEARCH_TIMEOUT_SECONDS = discovery_config["search_timeout"]
 
 # Datastore IDs from configuration
 CONFLUENCE_RUNBOOKS_DATASTORE_ID = discovery_config["datastores"]["confluence_runbooks"]
 ZENDESK_TICKETS_DATASTORE_ID = discovery_config["datastores"]["zendesk_tickets"]
 HELP_DOCS_DATASTORE_ID = discovery_config["datastores"]["help_docs"]
 
+# Request specs that don't vary per query, built once at import
+QueryUnderstandingSpec = discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec
+AnswerGenerationSpec = discoveryengine.AnswerQueryRequest.AnswerGenerationSpec
+
+_QUERY_UNDERSTANDING_SPEC = QueryUnderstandingSpec(
+    query_rephraser_spec=QueryUnderstandingSpec.QueryRephraserSpec(
+        disable=False,
+        max_rephrase_steps=1,
+    ),
+    query_classification_spec=QueryUnderstandingSpec.QueryClassificationSpec(
+        types=[
+            QueryUnderstandingSpec.QueryClassificationSpec.Type.ADVERSARIAL_QUERY,
+            QueryUnderstandingSpec.QueryClassificationSpec.Type.NON_ANSWER_SEEKING_QUERY,
+        ]
+    ),
+)
+
+DEFAULT_PREAMBLE = (
+    "You are a MoEngage support assistant. Provide detailed technical information "
+    "about the MoEngage platform. Focus on specific features, technical details, "
+    "API endpoints, and troubleshooting steps."
+)
+
+# Answer preambles of the per-datastore search tools
+_RUNBOOKS_PREAMBLE = (
+    "You are a MoEngage technical support specialist. Provide detailed troubleshooting "
+    "steps and technical guidance based on internal runbooks. Focus on specific "
+    "procedures, configuration steps, and known solutions. Include relevant technical "
+    "details and step-by-step instructions."
+)
+
+_ZENDESK_PREAMBLE = (
+    "You are a MoEngage support agent analyzing historical support tickets. "
+    "Provide solutions and insights based on how similar issues were resolved "
+    "in the past. Focus on proven solutions, common patterns, and actionable "
+    "steps that worked for other customers."
+)
+
+_HELP_DOCS_PREAMBLE = (
+    "You are a MoEngage documentation assistant. Provide clear, comprehensive "
+    "explanations based on official documentation. Focus on step-by-step guides, "
+    "feature descriptions, API usage examples, and best practices. Include specific "
+    "configuration details and code examples where applicable."
+)
+
+_DEFAULT_ANSWER_GENERATION_SPEC = AnswerGenerationSpec(
+    ignore_adversarial_query=False,
+    ignore_non_answer_seeking_query=False,
+    ignore_low_relevant_content=False,
+    model_spec=AnswerGenerationSpec.ModelSpec(
+        model_version="gemini-2.5-flash/answer_gen/v1",
+    ),
+    prompt_spec=AnswerGenerationSpec.PromptSpec(
+        preamble=DEFAULT_PREAMBLE,
+    ),
+    include_citations=True,
+    answer_language_code="en",
+)
+
+
+def _answer_generation_spec(preamble: str) -> AnswerGenerationSpec:
+    spec = AnswerGenerationSpec(_DEFAULT_ANSWER_GENERATION_SPEC)
+    spec.prompt_spec.preamble = preamble
+    return spec
+
+
+# The tools' preambles are fixed, so their specs are built once here too
+_ANSWER_GENERATION_SPECS = {
+    DEFAULT_PREAMBLE: _DEFAULT_ANSWER_GENERATION_SPEC,
+    **{
+        preamble: _answer_generation_spec(preamble)
+        for preamble in (_RUNBOOKS_PREAMBLE, _ZENDESK_PREAMBLE, _HELP_DOCS_PREAMBLE)
+    },
+}
+
+# Searches are sparse and user-driven; keepalive pings stop intermediaries
+# from dropping the idle HTTP/2 connection, so the next search skips the TCP
+# and TLS handshakes. Answers with many references can be large
+_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.http2.min_time_between_pings_ms", 10000),
+    ("grpc.max_receive_message_length", 32 * 1024 * 1024),
+]
+
+
+def _create_keepalive_channel(host, **kwargs):
+    kwargs["options"] = [*kwargs.get("options", []), *_CHANNEL_OPTIONS]
+    return ConversationalSearchServiceGrpcAsyncIOTransport.create_channel(host, **kwargs)
+
+
+def _keepalive_transport(**kwargs):
+    return ConversationalSearchServiceGrpcAsyncIOTransport(channel=_create_keepalive_channel, **kwargs)
+
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    """
+    Outcome of one Discovery Engine search.
+    
+    Immutable, so cached and shared in-flight results are handed to every
+    caller as-is; the tool functions convert to a dict for the agent.
+    """
+    status: str
+    answer: str = ""
+    citations: tuple = ()
+    error_message: Optional[str] = None
+    raw: Any = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result in the dict shape the search tools expose."""
+        result = {
+            "status": self.status,
+            "answer": self.answer,
+            "citations": list(self.citations)
+        }
+        if self.error_message is not None:
+            result["error_message"] = self.error_message
+        if self.status == "mock":
+            result["mock_response"] = True
+        if self.raw is not None:
+            result["_raw"] = self.raw
+        return result
+
+# Answer.Reference keeps its document info in the `content` oneof
+_reference_pb = discoveryengine.Answer.Reference.pb
+
+# Exact-match result cache, checked before the semantic cache
+EXACT_CACHE_TTL_SECONDS = 600
+EXACT_CACHE_MAX_ENTRIES = 512
+_exact_cache = TTLCache(maxsize=EXACT_CACHE_MAX_ENTRIES, ttl=EXACT_CACHE_TTL_SECONDS)
+
+# Semantic result cache, one per (datastore, preamble) so sources never mix
+SEMANTIC_CACHE_CONFIG = discovery_config["semantic_cache"]
+_semantic_caches: Dict[tuple, "SemanticCache"] = {}
+_semantic_caches_lock = threading.Lock()
+
 # Shared Discovery Engine client instance for ADK compatibility
 _discovery_client = None
+_discovery_client_lock = threading.Lock()
 
+# Access tokens are refreshed this long before they expire, off the request path
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+TOKEN_REFRESH_RETRY_SECONDS = 60
+_token_refresher = None
+_token_refresher_lock = threading.Lock()
 
-# def _get_discovery_client() -> DiscoveryEngineClient:
-#     """Base exception for Discovery Engine errors"""
-#     pass
+
+class DiscoveryEngineError(Exception):
+    """Raised when a Discovery Engine search request fails."""
 
 
 class DiscoveryEngineClient:
@@ -78,6 +240,18 @@ class DiscoveryEngineClient:
         self.project_id = project_id
         self.location = location
         
+        # Resource names only depend on the project and location
+        self._engine_parent = (
+            f"projects/{project_id}/locations/{location}/collections/default_collection/"
+            f"engines/{DEFAULT_ENGINE_ID}"
+        )
+        self._serving_config = f"{self._engine_parent}/servingConfigs/default_serving_config"
+        self._data_store_specs: Dict[str, discoveryengine.SearchRequest.DataStoreSpec] = {}
+        self._search_specs: Dict[tuple, discoveryengine.AnswerQueryRequest.SearchSpec] = {}
+        
+        # In-flight cacheable searches, keyed like the exact-match cache
+        self._inflight_searches: Dict[tuple, asyncio.Future] = {}
+        
         # Check if we have valid credentials
         if credentials is None:
             logger.warning("⚠️  No valid Google credentials available. Discovery Engine will return mock responses.")
@@ -93,8 +267,11 @@ class DiscoveryEngineClient:
         
         # Initialize the client
         try:
-            self.client = discoveryengine.ConversationalSearchServiceClient(
+            # Async client, so a search awaits the RPC instead of blocking
+            # the event loop (and every other request) for its full duration
+            self.client = discoveryengine.ConversationalSearchServiceAsyncClient(
                 credentials=credentials,
+                transport=_keepalive_transport,
                 client_options=self.client_options
             )
             logger.info(f"Discovery Engine client initialized for project {project_id} in {location}")
@@ -102,14 +279,16 @@ class DiscoveryEngineClient:
             logger.exception(f"Failed to initialize Discovery Engine client: {e}")
             self.client = None
     
-    def search(
+    async def search(
         self,
         query_text: str,
         data_store_id: str,
         max_results: int = 3,
         session_id: Optional[str] = None,
-        preamble: Optional[str] = None
-    ) -> Dict[str, Any]:
+        preamble: Optional[str] = None,
+        return_raw: bool = False,
+        timeout_s: Optional[float] = None
+    ) -> SearchResult:
         """
         Search using Discovery Engine and get a generated answer with citations.
         
@@ -119,126 +298,411 @@ class DiscoveryEngineClient:
             max_results: Maximum number of results to return
             session_id: Optional session ID for conversational search
             preamble: Optional preamble for answer generation
+            return_raw: Also return the final response proto as result.raw
+            timeout_s: Deadline for the whole search in seconds, defaults to
+                SEARCH_TIMEOUT_SECONDS; a search that misses it returns
+                status "timeout"
             
         Returns:
-            Dictionary with search results and metadata
+            SearchResult with the answer and citations
+            
+        Raises:
+            DiscoveryEngineError: If the Discovery Engine request fails
         """
+        if timeout_s is None:
+            timeout_s = SEARCH_TIMEOUT_SECONDS
+        
         # If client is not available, return mock response
         if self.client is None:
             logger.warning(f"Discovery Engine client not available. Returning mock response for query: '{query_text}'")
-            return {
-                "status": "mock",
-                "answer": f"This is a mock response for the query: '{query_text}'. Discovery Engine is not configured with valid credentials.",
-                "citations": [],
-                "mock_response": True
-            }
+            return SearchResult(
+                status="mock",
+                answer=f"This is a mock response for the query: '{query_text}'. Discovery Engine is not configured with valid credentials."
+            )
+        
+        # Sessioned queries depend on conversation history, so only standalone
+        # queries are served from or stored in the caches. Cached entries
+        # carry no proto, so raw requests always go to the service
+        if session_id is not None or return_raw:
+            return await self._search_uncached(
+                query_text, data_store_id, max_results, session_id, preamble, return_raw, timeout_s
+            )
+        
+        # Verbatim repeats (retries, follow-up turns) hit here without paying
+        # for an embedding
+        exact_key = (data_store_id, preamble, max_results, " ".join(query_text.lower().split()))
+        cached = _exact_cache.get(exact_key)
+        if cached is not None:
+            logger.info(f"Exact cache hit for query: '{query_text}' on datastore: {data_store_id}")
+            return cached
+        
+        # Identical concurrent queries (UI retries, parallel tool calls) share
+        # one Discovery Engine call, which also fills the caches once
+        task = self._inflight_searches.get(exact_key)
+        if task is None:
+            task = asyncio.ensure_future(self._search_uncached(
+                query_text, data_store_id, max_results, None, preamble, False, timeout_s, exact_key
+            ))
+            self._inflight_searches[exact_key] = task
+            task.add_done_callback(lambda done: self._inflight_searches.pop(exact_key, None))
+        else:
+            logger.info(f"Joining in-flight search for query: '{query_text}' on datastore: {data_store_id}")
+        
+        # Shield so one cancelled caller does not cancel the call for the
+        # others; joiners share the first caller's deadline
+        return await asyncio.shield(task)
+    
+    async def _search_uncached(
+        self,
+        query_text: str,
+        data_store_id: str,
+        max_results: int,
+        session_id: Optional[str],
+        preamble: Optional[str],
+        return_raw: bool,
+        timeout_s: float,
+        exact_key: Optional[tuple] = None
+    ) -> SearchResult:
+        """Run a search past the exact-match cache; exact_key marks it cacheable."""
+        semantic_cache = None
+        if SEMANTIC_CACHE_CONFIG["enabled"] and exact_key is not None:
+            # Imported here: the cache is opt-in and pulls in numpy, which
+            # would otherwise be loaded at startup for nothing
+            from .semantic_cache import embed_query
+            semantic_cache = _get_semantic_cache(data_store_id, preamble)
+            query_embedding = embed_query(query_text)
+            cached = semantic_cache.get(query_embedding)
+            if cached is not None:
+                logger.info(f"Semantic cache hit for query: '{query_text}' on datastore: {data_store_id}")
+                return cached
+        
+        async def collect():
+            # Accumulate the streamed deltas into one result for tool callers
+            answer_parts = []
+            citations = []
+            raw_response = None
+            async for delta in self.search_stream(
+                query_text, data_store_id, max_results, session_id, preamble, timeout_s
+            ):
+                answer_parts.append(delta["answer_delta"])
+                citations.extend(delta["citations_delta"])
+                raw_response = delta.get("_raw", raw_response)
+            return answer_parts, citations, raw_response
         
         try:
-            # The full resource name of the Search serving config
-            serving_config = f"projects/{self.project_id}/locations/{self.location}/collections/default_collection/engines/{DEFAULT_ENGINE_ID}/servingConfigs/default_serving_config"
+            # The gRPC deadline lets the server abort too; wait_for also
+            # bounds the time spent reading the stream
+            answer_parts, citations, raw_response = await asyncio.wait_for(collect(), timeout=timeout_s)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Citations: %s", citations)
             
-            # Configure query understanding spec
-            query_understanding_spec = discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec(
-                query_rephraser_spec=discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryRephraserSpec(
-                    disable=False,
-                    max_rephrase_steps=1,
-                ),
-                query_classification_spec=discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec(
-                    types=[
-                        discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec.Type.ADVERSARIAL_QUERY,
-                        discoveryengine.AnswerQueryRequest.QueryUnderstandingSpec.QueryClassificationSpec.Type.NON_ANSWER_SEEKING_QUERY,
-                    ]
-                ),
+            # Raw results are never cached, so only they carry the proto
+            search_result = SearchResult(
+                status="success",
+                answer="".join(answer_parts),
+                citations=tuple(citations),
+                raw=raw_response if return_raw else None
             )
             
-            # Configure answer generation spec
-            default_preamble = (
-                "You are a MoEngage support assistant. Provide detailed technical information "
-                "about the MoEngage platform. Focus on specific features, technical details, "
-                "API endpoints, and troubleshooting steps."
-            )
+            if exact_key is not None:
+                _exact_cache.set(exact_key, search_result)
+            if semantic_cache is not None:
+                semantic_cache.put(query_embedding, search_result)
+            return search_result
             
-            answer_generation_spec = discoveryengine.AnswerQueryRequest.AnswerGenerationSpec(
-                ignore_adversarial_query=False,
-                ignore_non_answer_seeking_query=False,
-                ignore_low_relevant_content=False,
-                model_spec=discoveryengine.AnswerQueryRequest.AnswerGenerationSpec.ModelSpec(
-                    model_version="gemini-2.5-flash/answer_gen/v1",
-                ),
-                prompt_spec=discoveryengine.AnswerQueryRequest.AnswerGenerationSpec.PromptSpec(
-                    preamble=preamble or default_preamble,
-                ),
-                include_citations=True,
-                answer_language_code="en",
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            logger.warning(f"Discovery Engine search timed out after {timeout_s}s for query: '{query_text}'")
+            return SearchResult(
+                status="timeout",
+                error_message=f"Search timed out after {timeout_s} seconds"
             )
+        except Exception as e:
+            # Stack traces are only worth their cost when debugging
+            logger.error(
+                f"Error in Discovery Engine search: {e}",
+                exc_info=logger.isEnabledFor(logging.DEBUG)
+            )
+            raise DiscoveryEngineError(str(e)) from e
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        data_store_id: str,
+        max_results: int = 3,
+        preamble: Optional[str] = None
+    ) -> List[SearchResult]:
+        """
+        Answer several independent queries against one data store concurrently.
+        
+        Each query is a standalone search, so it goes through the exact cache,
+        the semantic cache and in-flight deduplication like any other call.
+        No Discovery Engine session is shared: concurrent turns in one session
+        would race to append to its history. A failing query does not cancel
+        the others.
+        
+        Args:
+            queries: The search query texts
+            data_store_id: The data store ID to search
+            max_results: Maximum number of results per query
+            preamble: Optional preamble for answer generation
             
-            # Configure search spec
-            search_spec = discoveryengine.AnswerQueryRequest.SearchSpec(
+        Returns:
+            One SearchResult per query, in the order of queries
+        """
+        outcomes = await asyncio.gather(
+            *(
+                self.search(query, data_store_id, max_results, preamble=preamble)
+                for query in queries
+            ),
+            return_exceptions=True
+        )
+        return [
+            SearchResult(status="error", error_message=str(outcome))
+            if isinstance(outcome, BaseException) else outcome
+            for outcome in outcomes
+        ]
+    
+    def _data_store_spec(self, data_store_id: str) -> discoveryengine.SearchRequest.DataStoreSpec:
+        """Return the (cached) search spec entry for one data store."""
+        spec = self._data_store_specs.get(data_store_id)
+        if spec is None:
+            spec = self._data_store_specs[data_store_id] = discoveryengine.SearchRequest.DataStoreSpec(
+                data_store=(
+                    f"projects/{self.project_id}/locations/{self.location}/"
+                    f"collections/default_collection/dataStores/{data_store_id}"
+                )
+            )
+        return spec
+    
+    def _search_spec(self, data_store_id: str, max_results: int) -> discoveryengine.AnswerQueryRequest.SearchSpec:
+        """Return the (cached) search spec for one data store and result limit."""
+        key = (data_store_id, max_results)
+        spec = self._search_specs.get(key)
+        if spec is None:
+            spec = self._search_specs[key] = discoveryengine.AnswerQueryRequest.SearchSpec(
                 search_params=discoveryengine.AnswerQueryRequest.SearchSpec.SearchParams(
                     max_return_results=max_results,
-                    data_store_specs=[
-                        discoveryengine.SearchRequest.DataStoreSpec(
-                            data_store=f"projects/{self.project_id}/locations/{self.location}/collections/default_collection/dataStores/{data_store_id}"
-                        ),
-                    ]
+                    data_store_specs=[self._data_store_spec(data_store_id)]
                 )
             )
-            
-            # Initialize request
-            request = discoveryengine.AnswerQueryRequest(
-                serving_config=serving_config,
-                query=discoveryengine.Query(text=query_text),
-                search_spec=search_spec,
-                session=session_id,
-                user_pseudo_id="agent.reader@moengage.com",
-                query_understanding_spec=query_understanding_spec,
-                answer_generation_spec=answer_generation_spec,
-            )
-            
-            # Make the request
-            logger.info(f"Sending search request for query: '{query_text}' to datastore: {data_store_id}")
-            response = self.client.answer_query(request)
-            
-            # Process the response
-            answer_text = response.answer.answer_text if hasattr(response.answer, "answer_text") else ""
-            logger.info(response.answer)
-            for ref in response.answer.references:
-                logger.info(f"Reference: {ref}")
-                
-            # Extract citations if available
-            citations = []
-            if hasattr(response.answer, "citations") and response.answer.citations:
-                for citation in response.answer.citations:
-                    logger.info(f"Citation: {citation}")
-                    citation_data = {
-                        "start_index": getattr(citation, "start_index", 0),
-                        "end_index": getattr(citation, "end_index", 0),
-                        "uri": getattr(citation, "uri", ""),
-                        "title": getattr(citation, "title", "")
-                    }
-                    citations.append(citation_data)
-            logger.info(citations)
-            # Build response
-            search_response = {
-                "status": "success",
-                "answer": answer_text,
-                "citations": citations,
-                "response_whole" : f"{response}",
-            }
-            
-            return search_response
-            
-        except Exception as e:
-            logger.exception(f"Error in Discovery Engine search: {e}")
-            return {
-                "status": "error",
-                "error_message": str(e),
-                "answer": "",
-                "citations": []
-            }
+        return spec
+    
+    def _build_request(
+        self,
+        query_text: str,
+        data_store_id: str,
+        max_results: int,
+        preamble: Optional[str]
+    ) -> discoveryengine.AnswerQueryRequest:
+        """
+        Build the AnswerQuery request for a standalone query.
+        
+        Only the sub-specs are cached; the request itself is new on every
+        call and copies them on assignment, so callers may modify it.
+        """
+        # Static specs are shared; the request copies them on assignment.
+        # Only a preamble without a prebuilt spec needs its own copy
+        preamble = preamble or DEFAULT_PREAMBLE
+        answer_generation_spec = _ANSWER_GENERATION_SPECS.get(preamble)
+        if answer_generation_spec is None:
+            answer_generation_spec = _answer_generation_spec(preamble)
+        search_spec = self._search_spec(data_store_id, max_results)
+        
+        return discoveryengine.AnswerQueryRequest(
+            serving_config=self._serving_config,
+            query=discoveryengine.Query(text=query_text),
+            search_spec=search_spec,
+            user_pseudo_id="agent.reader@moengage.com",
+            query_understanding_spec=_QUERY_UNDERSTANDING_SPEC,
+            answer_generation_spec=answer_generation_spec,
+        )
+    
+    async def search_stream(
+        self,
+        query_text: str,
+        data_store_id: str,
+        max_results: int = 3,
+        session_id: Optional[str] = None,
+        preamble: Optional[str] = None,
+        timeout_s: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a generated answer from Discovery Engine as it is produced.
+        
+        Yields dicts with an "answer_delta" (new answer text) and a
+        "citations_delta" (citations not yet yielded). Citation offsets index
+        the full answer, so citations arrive with the final delta once the
+        whole text is known; that delta also carries the last response proto
+        under "_raw". Concatenating the deltas gives the same result as
+        search().
+        
+        timeout_s sets the gRPC deadline of the streaming call (default
+        SEARCH_TIMEOUT_SECONDS), which the server also honours.
+        
+        Raises:
+            RuntimeError: If the Discovery Engine client is not available
+            DeadlineExceeded: If the stream misses its deadline
+            Exception: If the streaming request fails
+        """
+        if self.client is None:
+            raise RuntimeError("Discovery Engine client is not available")
+        
+        request = self._build_request(query_text, data_store_id, max_results, preamble)
+        if session_id:
+            request.session = session_id
+        
+        logger.info(f"Streaming search request for query: '{query_text}' to datastore: {data_store_id}")
+        stream = await self.client.stream_answer_query(
+            request,
+            timeout=SEARCH_TIMEOUT_SECONDS if timeout_s is None else timeout_s
+        )
+        last_chunk = None
+        async for chunk in stream:
+            text = chunk.answer.answer_text
+            if text:
+                yield {"answer_delta": text, "citations_delta": []}
+            last_chunk = chunk
+        
+        if last_chunk is None:
+            return
+        yield {
+            "answer_delta": "",
+            "citations_delta": _extract_citations(last_chunk.answer),
+            "_raw": last_chunk
+        }
+
+
+def _reference_document(reference):
+    """Return the document info (with uri and title) a Reference carries."""
+    content = _reference_pb(reference).WhichOneof("content")
+    if content is None:
+        return None
+    if content == "chunk_info":
+        return reference.chunk_info.document_metadata
+    return getattr(reference, content)
+
+
+def _extract_citations(answer) -> List[Dict[str, Any]]:
+    """Convert the citations of an Answer proto into plain dicts."""
+    if logger.isEnabledFor(logging.DEBUG):
+        for citation in answer.citations:
+            logger.debug("Citation: %s", citation)
+    # Proto fields always exist with zero-value defaults, so no getattr
+    # guards. Citations have no uri/title of their own; those come from
+    # the reference behind the citation's first source
+    references = answer.references
+    documents = [_reference_document(reference) for reference in references]
+    citations = []
+    for citation in answer.citations:
+        document = None
+        sources = citation.sources
+        if sources and sources[0].reference_id.isdigit():
+            index = int(sources[0].reference_id)
+            if index < len(documents):
+                document = documents[index]
+        citations.append({
+            "start_index": citation.start_index,
+            "end_index": citation.end_index,
+            "uri": document.uri if document else "",
+            "title": document.title if document else ""
+        })
+    return citations
+
+
+def _get_semantic_cache(data_store_id: str, preamble: Optional[str]) -> "SemanticCache":
+    """Return the semantic cache for one datastore/preamble scope."""
+    from .semantic_cache import SemanticCache
+    
+    key = (data_store_id, preamble)
+    cache = _semantic_caches.get(key)
+    if cache is None:
+        with _semantic_caches_lock:
+            cache = _semantic_caches.get(key)
+            if cache is None:
+                cache = _semantic_caches[key] = SemanticCache(
+                    max_entries=SEMANTIC_CACHE_CONFIG["max_entries"],
+                    ttl=SEMANTIC_CACHE_CONFIG["ttl_seconds"],
+                    threshold=SEMANTIC_CACHE_CONFIG["threshold"]
+                )
+    return cache
 
 
-def search_runbooks_tool(
+def _get_discovery_client() -> DiscoveryEngineClient:
+    """
+    Return the process-wide Discovery Engine client, creating it on first use.
+    
+    The underlying gRPC channel keeps its HTTP/2 connection and auth state, so
+    sharing one client spares every search the connect and TLS handshake.
+    """
+    global _discovery_client
+    if _discovery_client is None:
+        with _discovery_client_lock:
+            if _discovery_client is None:
+                _discovery_client = DiscoveryEngineClient(DEFAULT_PROJECT_ID, DEFAULT_LOCATION)
+    _start_token_refresher()
+    return _discovery_client
+
+
+def _seconds_until_token_refresh() -> float:
+    """Seconds until the shared credentials should be refreshed (0 if now)."""
+    if not credentials.valid or credentials.expiry is None:
+        return 0.0
+    # google-auth keeps expiry as a naive UTC datetime
+    refresh_at = credentials.expiry - TOKEN_REFRESH_MARGIN
+    return max((refresh_at - datetime.utcnow()).total_seconds(), 0.0)
+
+
+def _refresh_token() -> float:
+    """Refresh the shared credentials; returns the delay until the next refresh."""
+    try:
+        credentials.refresh(Request())
+        logger.debug("Refreshed Discovery Engine access token")
+    except Exception as e:
+        logger.warning(f"Failed to refresh Discovery Engine access token: {e}")
+        return TOKEN_REFRESH_RETRY_SECONDS
+    return max(_seconds_until_token_refresh(), TOKEN_REFRESH_RETRY_SECONDS)
+
+
+async def _refresh_token_loop() -> None:
+    delay = _seconds_until_token_refresh()
+    while True:
+        await asyncio.sleep(delay)
+        # The refresh is a blocking HTTP call
+        delay = await asyncio.to_thread(_refresh_token)
+
+
+def _refresh_token_on_timer(delay: float) -> None:
+    global _token_refresher
+    
+    def run():
+        _refresh_token_on_timer(_refresh_token())
+    
+    _token_refresher = threading.Timer(delay, run)
+    _token_refresher.daemon = True
+    _token_refresher.start()
+
+
+def _start_token_refresher() -> None:
+    """
+    Keep the shared credentials' access token fresh in the background.
+    
+    Without this, the first RPC after the token expires blocks on a full
+    OAuth refresh. Inside an event loop the refresher is a task; when
+    called synchronously it falls back to a daemon timer thread.
+    """
+    global _token_refresher
+    if credentials is None or _token_refresher is not None:
+        return
+    with _token_refresher_lock:
+        if _token_refresher is not None:
+            return
+        try:
+            _token_refresher = asyncio.get_running_loop().create_task(_refresh_token_loop())
+        except RuntimeError:
+            _refresh_token_on_timer(_seconds_until_token_refresh())
+
+
+async def search_runbooks_tool(
     query: str,
     max_results: int = 3
 ) -> Dict[str, Any]:
@@ -255,13 +719,13 @@ def search_runbooks_tool(
     
     Returns:
         Dict[str, Any]: Dictionary containing:
-            - status (str): "success" or "error"
+            - status (str): "success", "error" or "timeout"
             - answer (str): Generated answer from the search results
             - citations (List[Dict]): List of citations with source information
             - error_message (str, optional): Error description if status is "error"
     
     Example:
-        >>> results = search_runbooks_tool(
+        >>> results = await search_runbooks_tool(
         ...     query="Push notification delivery issues",
         ...     product_areas=["Push Campaigns"],
         ...     max_results=5
@@ -274,45 +738,29 @@ def search_runbooks_tool(
         # if product_areas:
         #     enhanced_query += f" Product areas: {', '.join(product_areas)}"
             
-        # Custom preamble for runbooks
-        preamble = (
-            "You are a MoEngage technical support specialist. Provide detailed troubleshooting "
-            "steps and technical guidance based on internal runbooks. Focus on specific "
-            "procedures, configuration steps, and known solutions. Include relevant technical "
-            "details and step-by-step instructions."
-        )
-        
-        # Initialize client and perform search
-        client = DiscoveryEngineClient()
-        results = client.search(
+        # Perform search on the shared client
+        result = await _get_discovery_client().search(
             query_text=enhanced_query,
             data_store_id=CONFLUENCE_RUNBOOKS_DATASTORE_ID,
             max_results=max_results,
-            preamble=preamble
+            preamble=_RUNBOOKS_PREAMBLE
         )
         
-        logger.info(f"Runbooks search completed for query: '{query}' with {results.get('total_results', 0)} results")
-        return results
+        logger.info(f"Runbooks search completed for query: '{query}' with {len(result.citations)} citations")
+        return result.to_dict()
         
-    except Exception as e:
+    except DiscoveryEngineError as e:
         logger.error(f"Runbooks search error: {e}")
-        return {
-            "status": "error", 
-            "error_message": str(e),
-            "answer": "",
-            "citations": []
-        }
+        return SearchResult(status="error", error_message=str(e)).to_dict()
     except Exception as e:
-        logger.exception(f"Unexpected error in runbooks search: {e}")
-        return {
-            "status": "error",
-            "error_message": f"Unexpected error: {e}",
-            "answer": "",
-            "citations": []
-        }
+        logger.error(
+            f"Unexpected error in runbooks search: {e}",
+            exc_info=logger.isEnabledFor(logging.DEBUG)
+        )
+        return SearchResult(status="error", error_message=f"Unexpected error: {e}").to_dict()
 
 
-def search_zendesk_tickets_tool(
+async def search_zendesk_tickets_tool(
     query: str,
     max_results: int = 3
 ) -> Dict[str, Any]:
@@ -329,13 +777,13 @@ def search_zendesk_tickets_tool(
     
     Returns:
         Dict[str, Any]: Dictionary containing:
-            - status (str): "success" or "error"
+            - status (str): "success", "error" or "timeout"
             - answer (str): Generated answer based on ticket resolutions
             - citations (List[Dict]): List of citations with source information
             - error_message (str, optional): Error description if status is "error"
     
     Example:
-        >>> results = search_zendesk_tickets_tool(
+        >>> results = await search_zendesk_tickets_tool(
         ...     query="API rate limiting errors",
         ...     intent="integration_problem",
         ...     max_results=5
@@ -346,45 +794,29 @@ def search_zendesk_tickets_tool(
         # Build enhanced query with intent context
         enhanced_query = query
             
-        # Custom preamble for Zendesk tickets
-        preamble = (
-            "You are a MoEngage support agent analyzing historical support tickets. "
-            "Provide solutions and insights based on how similar issues were resolved "
-            "in the past. Focus on proven solutions, common patterns, and actionable "
-            "steps that worked for other customers."
-        )
-        
-        # Initialize client and perform search
-        client = DiscoveryEngineClient()
-        results = client.search(
+        # Perform search on the shared client
+        result = await _get_discovery_client().search(
             query_text=enhanced_query,
             data_store_id=ZENDESK_TICKETS_DATASTORE_ID,
             max_results=max_results,
-            preamble=preamble
+            preamble=_ZENDESK_PREAMBLE
         )
         
-        logger.info(f"Zendesk search completed for query: '{query}' with {results.get('total_results', 0)} results")
-        return results
+        logger.info(f"Zendesk search completed for query: '{query}' with {len(result.citations)} citations")
+        return result.to_dict()
         
-    except Exception as e:
+    except DiscoveryEngineError as e:
         logger.error(f"Zendesk search error: {e}")
-        return {
-            "status": "error", 
-            "error_message": str(e),
-            "answer": "",
-            "citations": []
-        }
+        return SearchResult(status="error", error_message=str(e)).to_dict()
     except Exception as e:
-        logger.exception(f"Unexpected error in Zendesk search: {e}")
-        return {
-            "status": "error",
-            "error_message": f"Unexpected error: {e}",
-            "answer": "",
-            "citations": []
-        }
+        logger.error(
+            f"Unexpected error in Zendesk search: {e}",
+            exc_info=logger.isEnabledFor(logging.DEBUG)
+        )
+        return SearchResult(status="error", error_message=f"Unexpected error: {e}").to_dict()
 
 
-def search_help_docs_tool(
+async def search_help_docs_tool(
     query: str,
     max_results: int = 3
 ) -> Dict[str, Any]:
@@ -401,13 +833,13 @@ def search_help_docs_tool(
     
     Returns:
         Dict[str, Any]: Dictionary containing:
-            - status (str): "success" or "error"
+            - status (str): "success", "error" or "timeout"
             - answer (str): Generated answer from the documentation
             - citations (List[Dict]): List of citations with source information
             - error_message (str, optional): Error description if status is "error"
     
     Example:
-        >>> results = search_help_docs_tool(
+        >>> results = await search_help_docs_tool(
         ...     query="How to set up push notification campaigns",
         ...     max_results=5
         ... )
@@ -417,42 +849,98 @@ def search_help_docs_tool(
         # Build enhanced query with product areas context
         enhanced_query = query
             
-        # Custom preamble for help documentation
-        preamble = (
-            "You are a MoEngage documentation assistant. Provide clear, comprehensive "
-            "explanations based on official documentation. Focus on step-by-step guides, "
-            "feature descriptions, API usage examples, and best practices. Include specific "
-            "configuration details and code examples where applicable."
-        )
-        
-        # Initialize client and perform search
-        client = DiscoveryEngineClient()
-        results = client.search(
+        # Perform search on the shared client
+        result = await _get_discovery_client().search(
             query_text=enhanced_query,
             data_store_id=HELP_DOCS_DATASTORE_ID,
             max_results=max_results,
-            preamble=preamble
+            preamble=_HELP_DOCS_PREAMBLE
         )
         
-        logger.info(f"Help docs search completed for query: '{query}' with {results.get('total_results', 0)} results")
-        return results
+        logger.info(f"Help docs search completed for query: '{query}' with {len(result.citations)} citations")
+        return result.to_dict()
         
-    except Exception as e:
+    except DiscoveryEngineError as e:
         logger.error(f"Help docs search error: {e}")
-        return {
-            "status": "error", 
-            "error_message": str(e),
-            "answer": "",
-            "citations": []
-        }
+        return SearchResult(status="error", error_message=str(e)).to_dict()
     except Exception as e:
-        logger.exception(f"Unexpected error in help docs search: {e}")
-        return {
-            "status": "error",
-            "error_message": f"Unexpected error: {e}",
-            "answer": "",
-            "citations": []
-        }
+        logger.error(
+            f"Unexpected error in help docs search: {e}",
+            exc_info=logger.isEnabledFor(logging.DEBUG)
+        )
+        return SearchResult(status="error", error_message=f"Unexpected error: {e}").to_dict()
+
+
+# Fan-out targets for search_all_sources_tool, tagged onto each citation
+_SOURCE_TOOLS = (
+    ("runbook", search_runbooks_tool),
+    ("zendesk", search_zendesk_tickets_tool),
+    ("helpdoc", search_help_docs_tool),
+)
+
+
+async def search_all_sources_tool(
+    query: str,
+    max_results: int = 3
+) -> Dict[str, Any]:
+    """
+    Search runbooks, Zendesk tickets and help documentation in one call.
+    
+    The three datastore searches run concurrently, so the call takes as long
+    as the slowest source rather than the sum of all three. A failing source
+    does not cancel the others; its error is reported under "errors".
+    
+    Args:
+        query (str): The search query text describing the issue or topic
+        max_results (int, optional): Maximum number of results to return
+            per source. Defaults to 3.
+    
+    Returns:
+        Dict[str, Any]: Dictionary containing:
+            - status (str): "success" if any source answered, else "error"
+            - answers (Dict[str, str]): Generated answer per source type
+            - answer (str): Source answers combined into one text
+            - citations (List[Dict]): Citations from all sources, each with a
+              "source_type" of "runbook", "zendesk" or "helpdoc"
+            - errors (Dict[str, str], optional): Error message per failed source
+    
+    Example:
+        >>> results = await search_all_sources_tool(
+        ...     query="Push notifications not delivered on iOS"
+        ... )
+        >>> print(results["answers"]["runbook"])
+    """
+    outcomes = await asyncio.gather(
+        *(tool(query, max_results) for _, tool in _SOURCE_TOOLS),
+        return_exceptions=True
+    )
+    
+    answers = {}
+    citations = []
+    errors = {}
+    for (source_type, _), outcome in zip(_SOURCE_TOOLS, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"{source_type} search failed for query '{query}': {outcome}")
+            errors[source_type] = str(outcome)
+            continue
+        if outcome.get("status") in ("error", "timeout"):
+            errors[source_type] = outcome.get("error_message", "")
+            continue
+        if outcome.get("answer"):
+            answers[source_type] = outcome["answer"]
+        for citation in outcome.get("citations", []):
+            citations.append({**citation, "source_type": source_type})
+    
+    combined = {
+        "status": "success" if len(errors) < len(_SOURCE_TOOLS) else "error",
+        "answers": answers,
+        "answer": "\n\n".join(f"[{source_type}] {answer}" for source_type, answer in answers.items()),
+        "citations": citations,
+    }
+    if errors:
+        combined["errors"] = errors
+    logger.info(f"All-sources search completed for query: '{query}' with {len(citations)} citations")
+    return combined
 
 
 # Legacy function for backward compatibility
@@ -482,8 +970,6 @@ def answer_query(
     """
     logger.warning("Using deprecated answer_query function. Consider using specific search functions instead.")
     
-    client = DiscoveryEngineClient(project_id=project_id, location=location)
-    
     # Use the new search method but return raw response for compatibility
     try:
         # The full resource name of the Search serving config
@@ -513,8 +999,17 @@ def answer_query(
             user_pseudo_id="agent.reader@moengage.com",
         )
         
-        # Make the request
-        response = client.client.answer_query(request)
+        # Blocking callers get their own synchronous client; the shared
+        # client is async
+        client = discoveryengine.ConversationalSearchServiceClient(
+            credentials=credentials,
+            client_options=(
+                ClientOptions(api_endpoint=f"{location}-discoveryengine.googleapis.com")
+                if location != "global"
+                else None
+            )
+        )
+        response = client.answer_query(request)
         return response
         
     except Exception as e:
@@ -524,7 +1019,7 @@ def answer_query(
 
 # Simple test if run directly
 if __name__ == "__main__":
-    import json
+    import orjson
     
     # Test runbooks search
     # print("Testing Runbooks search...")
@@ -533,7 +1028,7 @@ if __name__ == "__main__":
     #     product_areas=["Push Campaigns"],
     #     max_results=3
     # )
-    # print(json.dumps(runbooks_results, indent=2))
+    # print(orjson.dumps(runbooks_results, option=orjson.OPT_INDENT_2).decode())
     
     # # Test Zendesk search
     # print("\nTesting Zendesk search...")
@@ -542,12 +1037,12 @@ if __name__ == "__main__":
     #     intent="integration_problem",
     #     max_results=3
     # )
-    # print(json.dumps(zendesk_results, indent=2))
+    # print(orjson.dumps(zendesk_results, option=orjson.OPT_INDENT_2).decode())
     
     # Test help docs search
     print("\nTesting Help Docs search...")
-    help_docs_results = search_help_docs_tool(
+    help_docs_results = asyncio.run(search_help_docs_tool(
         query="how to set up push campaigns",
         max_results=3
-    )
-    print(json.dumps(help_docs_results))
+    ))
+    print(orjson.dumps(help_docs_results, option=orjson.OPT_INDENT_2).decode())
@@ -6,17 +6,147 @@ This agent uses LlmAgent with AgentTool pattern for intelligent routing:
 - Specialist agents wrapped as tools that return results to root agent
 - Root agent maintains conversation control and context continuity
 - Robust system prompt handles complex routing scenarios
+- Keyword fast path hands generic how-to questions (no specialist trigger) to KnowledgeSpecialist
 """
 
+import hashlib
+import json
 import logging
-from typing import Sequence
+import re
+from typing import Any, AsyncGenerator, Optional, Sequence
+from typing_extensions import override
 from google.adk.agents import LlmAgent
 from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
 from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
 from google.adk.planners import PlanReActPlanner
+import os
+
+from .cache import TTLCache
+from .context_cache import ContextCache
+from .parallel_tools import enable_parallel_tool_calls
+
+# Import configuration
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
 
 logger = logging.getLogger(__name__)
 
+CONTEXT_CACHE_CONFIG = config.context_cache_config
+
+# KnowledgeSpecialist answers for the same request are reused for this long
+TOOL_RESULT_CACHE_TTL_SECONDS = 600
+TOOL_RESULT_CACHE_MAX_ENTRIES = 512
+
+# Knowledge-only questions ("what is a segment?") that go straight to
+# KnowledgeSpecialist without a planning turn. Matched on word boundaries, so
+# "guide" does not match "guidelines"
+_FAST_KNOWLEDGE_RE = re.compile(
+    r"\b(?:how do i|how to|how can i|what is|what are|set ?up|configure|explain"
+    r"|guides?|documentation|best practices?)\b"
+)
+# Any trigger keyword from the routing table means a specialist may own the
+# query, so the model decides
+_SPECIALIST_TRIGGER_RE = re.compile(
+    r"\b(?:push|notifications?|fcm|apns|whatsapp|waba|templates?|campaigns?|sms"
+    r"|emails?|apis?|integrations?|tickets?|zendesk)\b"
+)
+# Anything that looks like a problem to investigate also goes to the model
+_NEEDS_ROUTING_RE = re.compile(
+    r"\b(?:errors?|issues?|problems?|fail\w*|not|\w+n't|debug\w*|fix\w*|reject\w*"
+    r"|stuck|broken|drop\w*|delay\w*|lost|missing|wrong|why)\b"
+)
+
+
+# Comprehensive system instruction for intelligent routing, built once
+_SYSTEM_INSTRUCTION = """# MoEngage Support Assistant
+
+You are an expert customer support agent for MoEngage, specializing in helping users with campaigns, technical issues, and platform guidance. You have access to specialized tools and agents that can provide deep expertise in different areas.
+
+## Your Role
+
+You are the primary interface for all customer interactions: understand the query, gather knowledge, route technical investigations to specialists, synthesize results into coherent, actionable responses, keep conversation context, and escalate when necessary.
+
+## Agents & Routing
+
+KnowledgeSpecialist is a tool: it returns synthesized documentation, best practices and setup guides to you. Every other agent takes over the conversation when you route to it.
+
+| Agent | Trigger keywords | When to use |
+|---|---|---|
+| KnowledgeSpecialist (tool) | "how do I", "set up", "what is", feature names | Before routing any technical issue; alone for knowledge-only questions |
+| PushTroubleshootAgent | "push", "notification", "FCM", "APNS", "push template" | Push delivery failures, push campaign/API errors, payload problems |
+| WhatsAppTroubleshootAgent | "whatsapp", "WABA", "whatsapp template" | WhatsApp not sending, template approval/rejection, messaging limits, WhatsApp API errors |
+| TechnicalTroubleshootAgent | "email campaign", "SMS", "web push", "API error", "integration" | Other channels, general API and integration issues |
+| TicketSpecialist | ticket IDs, "zendesk", "ticket" | Analysis of specific tickets or historical patterns |
+| FollowUpSpecialist | "what about", "also", "you said" | Follow-ups and clarification of ambiguous requests |
+
+**Routing rule:** technical issue → KnowledgeSpecialist with a specific query, then route to the matching specialist with clear context; anything else → KnowledgeSpecialist and answer directly. When the issue type is already clear, you MAY call KnowledgeSpecialist and route in the same turn - calls made in one turn run in parallel.
+
+Priority: issues affecting live campaigns first; Push/WhatsApp to their own agents over TechnicalTroubleshootAgent. Let specialists handle technical follow-ups; route elsewhere only when the conversation changes domain.
+
+## Response Guidelines
+- Combine KnowledgeSpecialist findings with specialist results into actionable, step-by-step guidance
+- Include relevant documentation links; offer alternatives when appropriate
+- Be conversational and empathetic; prefer plain language and explain technical recommendations
+- Always end with clear next steps
+
+## Citations
+Cite every factual sentence with [n] referencing `context` sources; use [n][m] for multi-source, and say so when no source supports a statement. Example: "Paris is a cultural hub[1][2]."
+
+Remember: You are the orchestrator. Use KnowledgeSpecialist tool for context, route to specialists for technical investigation, and synthesize everything into helpful, actionable responses."""
+# Identifies the prompt version, e.g. in context cache names
+_SYSTEM_INSTRUCTION_SHA = hashlib.blake2b(_SYSTEM_INSTRUCTION.encode(), digest_size=16).hexdigest()
+
+
+class _ToolResultCache:
+    """
+    LRU cache of tool results, keyed by tool name and canonicalized arguments.
+    
+    Used as the agent's before/after tool callbacks: a hit returns the stored
+    response, which makes ADK skip the tool (and, for an AgentTool, the whole
+    sub-agent LLM run); a miss stores the response once the tool returns.
+    """
+    
+    def __init__(self, tool_names: Sequence[str], maxsize: int, ttl: float):
+        self._tool_names = frozenset(tool_names)
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._hits = 0
+        self._misses = 0
+    
+    def before_tool(self, tool: BaseTool, args: dict[str, Any], tool_context: ToolContext) -> Optional[dict]:
+        if tool.name not in self._tool_names:
+            return None
+        result = self._results.get(_tool_key(tool.name, args))
+        if result is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        logger.info(
+            "Tool result cache hit for %s (hit rate %.0f%% over %d calls)",
+            tool.name, 100 * self._hits / (self._hits + self._misses), self._hits + self._misses
+        )
+        return result
+    
+    def after_tool(self, tool: BaseTool, args: dict[str, Any], tool_context: ToolContext, tool_response: Any) -> None:
+        if tool.name not in self._tool_names or not tool_response:
+            return None
+        key = _tool_key(tool.name, args)
+        if self._results.get(key) is None:
+            # Stored in the dict form ADK sends to the model
+            result = tool_response if isinstance(tool_response, dict) else {"result": tool_response}
+            self._results.set(key, result)
+        return None
+
+
+def _tool_key(tool_name: str, args: dict[str, Any]) -> tuple[str, str]:
+    canonical_args = json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+    return tool_name, hashlib.blake2b(canonical_args.encode(), digest_size=16).hexdigest()
+
+
 class LlmConversationManager(LlmAgent):
     """
     LLM-powered root agent that intelligently routes queries to specialist agents
@@ -30,166 +160,64 @@ class LlmConversationManager(LlmAgent):
             skip_summarization=False  # Let LLM summarize the knowledge findings
         )
         
-        # Other specialists remain as sub-agents for routing
-        sub_agents = [agent for agent in specialist_agents]
+        # Other specialists remain as sub-agents for routing; LlmAgent's
+        # validation builds its own list, so the sequence is passed as is
+        sub_agents = specialist_agents
+        
+        # Run the tool calls of a single turn concurrently
+        enable_parallel_tool_calls()
+        
+        # Serve the static prompt and tool declarations from a context cache
+        context_cache = None
+        if CONTEXT_CACHE_CONFIG["enabled"]:
+            context_cache = ContextCache(
+                CONTEXT_CACHE_CONFIG["ttl_seconds"],
+                display_name=f"{name}-{_SYSTEM_INSTRUCTION_SHA}"
+            ).before_model
         
-        # Comprehensive system instruction for intelligent routing
-        system_instruction = self._build_system_instruction()
+        # Repeated KnowledgeSpecialist requests reuse the earlier answer
+        tool_result_cache = _ToolResultCache(
+            [knowledge_tool.name],
+            maxsize=TOOL_RESULT_CACHE_MAX_ENTRIES,
+            ttl=TOOL_RESULT_CACHE_TTL_SECONDS
+        )
         
         super().__init__(
             name=name,
             model=model,
-            instruction=system_instruction,
+            instruction=_SYSTEM_INSTRUCTION,
             sub_agents=sub_agents,
             tools=[knowledge_tool],  # KnowledgeSpecialist as a tool
             description="MoEngage Support Assistant - Expert customer support agent with specialized tools",
             planner=PlanReActPlanner(),
+            before_model_callback=context_cache,
+            before_tool_callback=tool_result_cache.before_tool,
+            after_tool_callback=tool_result_cache.after_tool,
         )
+        self._knowledge_specialist = knowledge_specialist
         
-        logger.info(f"[{self.name}] Initialized LLM Conversation Manager with {len(sub_agents)} specialist agents and KnowledgeSpecialist tool")
+        logger.info("[%s] Initialized LLM Conversation Manager with %d specialist agents and KnowledgeSpecialist tool", self.name, len(sub_agents))
     
-    def _build_system_instruction(self) -> str:
-        """Build comprehensive system instruction for intelligent routing"""
-        return """# MoEngage Support Assistant
-
-You are an expert customer support agent for MoEngage, specializing in helping users with campaigns, technical issues, and platform guidance. You have access to specialized tools and agents that can provide deep expertise in different areas.
-
-## Your Role & Capabilities
-
-You are the primary interface for all customer interactions. Your job is to:
-- Understand user queries and provide helpful, accurate responses
-- Use KnowledgeSpecialist tool to gather synthesized data for technical issues
-- Intelligently route complex queries to appropriate specialist agents
-- Synthesize tool results into coherent, actionable responses
-- Maintain conversation context and continuity
-- Escalate issues when necessary
-
-## Available Tools & Specialist Agents
-
-### 🔍 **KnowledgeSpecialist Tool** (Use as Tool - Returns Data to You)
-- **Purpose**: Gather synthesized knowledge and context before routing technical issues
-- **Capabilities**: Documentation search, best practices, setup guides, feature explanations
-- **When to Use**: ALWAYS use before routing to technical specialists for data synthesis
-- **Returns**: Synthesized knowledge that you can combine with specialist findings
-
-### 📱 **PushTroubleshootAgent** (Route Control To)
-- **Purpose**: Specialized technical troubleshooting for Push Notification campaigns
-- **Expertise**: Push delivery issues, template problems, API errors, rate limiting, payload analysis
-- **Route When**: Push notification delivery problems, push campaign errors, push API issues
-- **Patterns**: "push not delivering", "push notification", "push campaign", "FCM", "APNS", "push template"
-
-### 💬 **WhatsAppTroubleshootAgent** (Route Control To)  
-- **Purpose**: Specialized technical troubleshooting for WhatsApp campaigns
-- **Expertise**: WhatsApp delivery issues, template approval/rejection, messaging limits, WABA problems
-- **Route When**: WhatsApp campaign problems, template issues, WhatsApp API errors
-- **Patterns**: "whatsapp", "whatsapp campaign", "whatsapp template", "WABA", "whatsapp delivery", "whatsapp not sending"
-
-### 🔧 **TechnicalTroubleshootAgent** (Route Control To)
-- **Purpose**: General technical troubleshooting for other campaign types
-- **Expertise**: Email campaigns, SMS, web push, API integration, general technical issues
-- **Route When**: Non-Push/WhatsApp technical issues, general API problems, other campaign types
-- **Patterns**: "email campaign", "SMS", "web push", "API error", "integration issue"
-
-### 🎫 **TicketSpecialist** (Route Control To)
-- **Purpose**: Support ticket analysis and historical context
-- **Expertise**: Zendesk ticket analysis, historical patterns, ticket context
-- **Route When**: Users reference specific tickets or need historical analysis
-
-### 💭 **FollowUpSpecialist** (Route Control To)
-- **Purpose**: Conversation continuity and clarification
-- **Expertise**: Handling follow-ups, clarifying ambiguous requests
-- **Route When**: Queries need clarification or are follow-ups to previous discussions
-
-## Intelligent Routing Workflow
-
-### For Technical Issues (Push, WhatsApp, or General):
-1. **FIRST**: Use KnowledgeSpecialist tool to gather relevant context and documentation
-2. **THEN**: Route to appropriate specialist based on issue type:
-   - Push issues → PushTroubleshootAgent
-   - WhatsApp issues → WhatsAppTroubleshootAgent  
-   - Other technical issues → TechnicalTroubleshootAgent
-3. **FINALLY**: Synthesize knowledge + specialist findings into comprehensive response
-
-### For Non-Technical Issues:
-- **Knowledge-only queries**: Use KnowledgeSpecialist tool and provide direct response
-- **Ticket analysis**: Route to TicketSpecialist
-- **Follow-ups/clarifications**: Route to FollowUpSpecialist
-
-## Decision Framework
-
-### Issue Type Detection:
-**Push Notification Issues:**
-- Keywords: "push", "notification", "FCM", "APNS", "push campaign", "push delivery", "push template"
-- Scenarios: Push not delivering, push errors, push API issues, push payload problems
-
-**WhatsApp Issues:**
-- Keywords: "whatsapp", "whatsapp campaign", "WABA", "whatsapp template", "whatsapp delivery"
-- Scenarios: WhatsApp not sending, template approval/rejection, messaging limits, WhatsApp API errors
-
-**General Technical Issues:**
-- Keywords: "email campaign", "SMS", "web push", "API error", "integration", "delivery issue"
-- Scenarios: Non-Push/WhatsApp technical problems, general API issues, other campaign types
-
-### Routing Priority:
-1. **URGENT/CRITICAL**: Technical issues affecting live campaigns
-2. **SPECIFIC**: Push/WhatsApp issues to specialized agents
-3. **GENERAL**: Other technical issues to TechnicalTroubleshootAgent
-4. **INFORMATIONAL**: Knowledge-only queries use KnowledgeSpecialist tool
-
-## Tool Usage Best Practices
-
-### KnowledgeSpecialist Tool Usage:
-- **Always use first** for technical issues to gather context
-- Provide specific query about the user's problem
-- Use returned knowledge to inform your routing decision
-- Combine knowledge findings with specialist results
-
-### Agent Routing:
-- Route control completely to specialist agents for technical investigation
-- Provide clear context about the issue when routing
-- Let specialists handle follow-up technical questions
-- Only route back if conversation shifts to different domain
-
-## Response Quality Guidelines
-
-### Synthesis Approach:
-- Combine KnowledgeSpecialist findings with specialist results
-- Provide actionable, step-by-step guidance
-- Include relevant documentation links or references
-- Offer multiple solutions when appropriate
-
-### Communication Style:
-- Be conversational and empathetic
-- Use clear, non-technical language when possible
-- Provide context for technical recommendations
-- Always end with clear next steps
-
-## Example Workflows
-
-**Push Issue Example:**
-1. User: "My push notifications aren't delivering"
-2. Use KnowledgeSpecialist tool: "push notification delivery troubleshooting"
-3. Route to PushTroubleshootAgent with context
-4. Synthesize knowledge + specialist findings into response
-
-**WhatsApp Issue Example:**
-1. User: "WhatsApp template got rejected"
-2. Use KnowledgeSpecialist tool: "WhatsApp template approval guidelines"
-3. Route to WhatsAppTroubleshootAgent with context
-4. Combine knowledge + specialist analysis for comprehensive answer
-
-**Knowledge-Only Example:**
-1. User: "How do I set up push notifications?"
-2. Use KnowledgeSpecialist tool: "push notification setup guide"
-3. Provide direct response based on knowledge findings
-4. No routing needed for setup guidance
-
-### Citation Requirements
-    - Cite every single fact, statement, or sentence using [number] notation corresponding to the source from the provided \`context\`.
-    - Integrate citations naturally at the end of sentences or clauses as appropriate. For example, "The Eiffel Tower is one of the most visited landmarks in the world[1]."
-    - Ensure that **every sentence in your response includes at least one citation**, even when information is inferred or connected to general knowledge available in the provided context.
-    - Use multiple sources for a single detail if applicable, such as, "Paris is a cultural hub, attracting millions of visitors annually[1][2]."
-    - Always prioritize credibility and accuracy by linking all statements back to their respective context sources.
-    - Avoid citing unsupported assumptions or personal interpretations; if no source supports a statement, clearly indicate the limitation.
-
-Remember: You are the orchestrator. Use KnowledgeSpecialist tool for context, route to specialists for technical investigation, and synthesize everything into helpful, actionable responses."""
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        target = self._fast_route(ctx)
+        if target is not None:
+            # KnowledgeSpecialist answers the turn itself; the root does not
+            # summarize its output
+            logger.info("[%s] Fast-routing knowledge-only query to %s", self.name, target.name)
+            async for event in target.run_async(ctx):
+                yield event
+            return
+        
+        async for event in super()._run_async_impl(ctx):
+            yield event
+    
+    def _fast_route(self, ctx: InvocationContext) -> Optional[BaseAgent]:
+        """Return the agent for an unambiguous query, or None to let the model plan"""
+        parts = ctx.user_content.parts if ctx.user_content else None
+        user_msg = " ".join(part.text for part in parts or () if part.text).lower()
+        if not _FAST_KNOWLEDGE_RE.search(user_msg):
+            return None
+        if _SPECIALIST_TRIGGER_RE.search(user_msg) or _NEEDS_ROUTING_RE.search(user_msg):
+            return None
+        return self._knowledge_specialist
@@ -0,0 +1,174 @@
+"""
+Concurrent execution of the function calls in a single model turn.
+
+ADK 1.4 runs the function calls of one LLM response one after another, so a
+turn that asks for KnowledgeSpecialist plus a search tool (or several search
+tools) waits for the sum of their latencies. This module swaps in a variant of
+``handle_function_calls_async`` that runs those calls concurrently, bounded
+by a semaphore, and merges the responses in the order the model emitted them.
+Only read-only tools and transfer_to_agent (which only sets an event action)
+are run concurrently; a turn with a single call, or with
+any call outside ``PARALLEL_SAFE_TOOLS``, keeps using ADK's own implementation,
+so write tools (e.g. ``add_episode``) and tool_context state updates of the
+MCP specialists stay sequential.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.flows.llm_flows import functions
+from google.adk.telemetry import trace_merged_tool_calls, trace_tool_call, tracer
+from google.adk.tools.base_tool import BaseTool
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on tool calls from one turn that run at the same time
+MAX_PARALLEL_TOOL_CALLS = 4
+
+# Side-effect-free tools that may share a turn concurrently; any tool name
+# starting with PARALLEL_SAFE_TOOL_PREFIX is read-only as well.
+# transfer_to_agent only sets the transfer action on its own tool_context,
+# which the merged response carries, so the root can look up knowledge and
+# route in one turn
+PARALLEL_SAFE_TOOLS = frozenset({
+    "KnowledgeSpecialist", "search_nodes", "search_facts", "transfer_to_agent"
+})
+PARALLEL_SAFE_TOOL_PREFIX = "search_"
+
+# ADK's own (sequential) implementation, used for single-call and write turns
+_sequential_handle_function_calls_async = functions.handle_function_calls_async
+
+# Module-private helpers in ADK's functions module; the double-underscore names
+# are only mangled inside class bodies, so they are reachable via getattr
+_call_tool_async = getattr(functions, "__call_tool_async")
+_build_response_event = getattr(functions, "__build_response_event")
+
+
+async def _run_function_call(
+    invocation_context: InvocationContext,
+    function_call_event: Event,
+    function_call: types.FunctionCall,
+    tools_dict: dict[str, BaseTool],
+    semaphore: asyncio.Semaphore,
+) -> Optional[Event]:
+    """Run one function call with the agent's tool callbacks, mirroring ADK."""
+    agent = invocation_context.agent
+    tool, tool_context = functions._get_tool_and_context(
+        invocation_context, function_call_event, function_call, tools_dict
+    )
+
+    async with semaphore:
+        with tracer.start_as_current_span(f"execute_tool {tool.name}"):
+            function_args = function_call.args or {}
+            function_response = None
+
+            for callback in agent.canonical_before_tool_callbacks:
+                function_response = callback(
+                    tool=tool, args=function_args, tool_context=tool_context
+                )
+                if inspect.isawaitable(function_response):
+                    function_response = await function_response
+                if function_response:
+                    break
+
+            if not function_response:
+                function_response = await _call_tool_async(
+                    tool, args=function_args, tool_context=tool_context
+                )
+
+            for callback in agent.canonical_after_tool_callbacks:
+                altered_function_response = callback(
+                    tool=tool,
+                    args=function_args,
+                    tool_context=tool_context,
+                    tool_response=function_response,
+                )
+                if inspect.isawaitable(altered_function_response):
+                    altered_function_response = await altered_function_response
+                if altered_function_response is not None:
+                    function_response = altered_function_response
+                    break
+
+            # Long running tools may return None to skip the function response
+            if tool.is_long_running and not function_response:
+                return None
+
+            function_response_event = _build_response_event(
+                tool, function_response, tool_context, invocation_context
+            )
+            trace_tool_call(
+                tool=tool,
+                args=function_args,
+                function_response_event=function_response_event,
+            )
+            return function_response_event
+
+
+def _is_parallel_safe(function_call: types.FunctionCall) -> bool:
+    """Whether a function call targets a read-only tool."""
+    name = function_call.name or ""
+    return name in PARALLEL_SAFE_TOOLS or name.startswith(PARALLEL_SAFE_TOOL_PREFIX)
+
+
+async def handle_function_calls_async(
+    invocation_context: InvocationContext,
+    function_call_event: Event,
+    tools_dict: dict[str, BaseTool],
+    filters: Optional[set[str]] = None,
+) -> Optional[Event]:
+    """Drop-in for ADK's handler that runs a turn's read-only calls concurrently."""
+    from google.adk.agents.llm_agent import LlmAgent
+
+    function_calls = [
+        function_call
+        for function_call in function_call_event.get_function_calls()
+        if not filters or function_call.id in filters
+    ]
+    if (
+        len(function_calls) < 2
+        or not isinstance(invocation_context.agent, LlmAgent)
+        or not all(_is_parallel_safe(function_call) for function_call in function_calls)
+    ):
+        return await _sequential_handle_function_calls_async(
+            invocation_context, function_call_event, tools_dict, filters
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Running %d tool calls concurrently: %s",
+            len(function_calls),
+            [function_call.name for function_call in function_calls],
+        )
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOL_CALLS)
+    # gather keeps the model's call order, so the merged response lines up
+    # with the function calls exactly as in the sequential handler
+    results = await asyncio.gather(*[
+        _run_function_call(
+            invocation_context, function_call_event, function_call, tools_dict, semaphore
+        )
+        for function_call in function_calls
+    ])
+    function_response_events = [event for event in results if event is not None]
+
+    if not function_response_events:
+        return None
+    merged_event = functions.merge_parallel_function_response_events(
+        function_response_events
+    )
+    if len(function_response_events) > 1:
+        with tracer.start_as_current_span("execute_tool (merged)"):
+            trace_merged_tool_calls(
+                response_event_id=merged_event.id,
+                function_response_event=merged_event,
+            )
+    return merged_event
+
+
+def enable_parallel_tool_calls() -> None:
+    """Route ADK's flows through the concurrent function-call handler."""
+    functions.handle_function_calls_async = handle_function_calls_async
@@ -4,6 +4,7 @@ WhatsAppDeepReasonPlanner: Human-like CoT + ReAct planner for WhatsApp troublesh
 - ReAct pattern: Reason -> Act -> Observe -> Reflect
 - Hypothesis-driven investigation with adaptive planning
 """
+import re
 from typing import List, Optional
 from google.genai import types
 from typing_extensions import override
@@ -24,9 +25,67 @@ class WhatsAppDeepReasonPlanner(BasePlanner):
     FINAL_ANSWER_TAG = '/*FINAL_ANSWER*/'
     REPLAN_TAG = '/*REPLAN*/'
 
+    # Any tag that marks a text part as reasoning, matched in one scan. Parts
+    # arrive as str, and encoding each one to bytes to scan costs more than
+    # the byte search saves (and 'ignore' would shift split offsets)
+    _THOUGHT_RE = re.compile('|'.join(map(re.escape, [
+        THINK_TAG, INTUITION_TAG, HYPOTHESIS_TAG, PLAN_TAG,
+        OBSERVATION_TAG, REFLECTION_TAG, REPLAN_TAG
+    ])))
+
+    # Once earlier reasoning in the request exceeds this many characters
+    # (~6k tokens), older thought parts are collapsed into one summary part
+    THOUGHT_BUDGET_CHARS = 24000
+    # Most recent thought parts that are always kept verbatim
+    RECENT_THOUGHT_PARTS = 4
+    # Characters of each older thought part kept in the summary
+    SUMMARY_LINE_CHARS = 160
+
+    def __init__(self, thought_budget_chars: Optional[int] = None):
+        self.thought_budget_chars = thought_budget_chars or self.THOUGHT_BUDGET_CHARS
+        # The instruction only interpolates the fixed tags, so build it once
+        self._instruction_str = self._build_cot_react_instruction()
+
     @override
     def build_planning_instruction(self, readonly_context: ReadonlyContext, llm_request: LlmRequest) -> str:
-        return self._build_cot_react_instruction()
+        # Runs before ADK clears the thought flags from the request contents
+        self._prune_thoughts(llm_request)
+        return self._instruction_str
+
+    def _prune_thoughts(self, llm_request: LlmRequest):
+        """
+        Collapse older reasoning parts of a long session into one summary part.
+
+        Every earlier CoT/ReAct trace is otherwise replayed on each turn, so the
+        prompt grows with the session. The request contents are ADK's per-turn
+        copies, so the stored session history is left untouched.
+        """
+        thoughts = [
+            (content, part)
+            for content in llm_request.contents or []
+            for part in content.parts or []
+            if part.thought and part.text
+        ]
+        if sum(len(part.text) for _, part in thoughts) <= self.thought_budget_chars:
+            return
+        older = thoughts[:-self.RECENT_THOUGHT_PARTS]
+        if len(older) < 2:
+            return
+
+        summary_lines = []
+        for _, part in older:
+            line = ' '.join(part.text.split())
+            if len(line) > self.SUMMARY_LINE_CHARS:
+                line = line[:self.SUMMARY_LINE_CHARS] + '...'
+            summary_lines.append(f'- {line}')
+        first_part = older[0][1]
+        first_part.text = f'{self.THINK_TAG} Summary of earlier reasoning:\n' + '\n'.join(summary_lines)
+
+        # Drop the remaining older parts, and any content left without parts
+        dropped = {id(part) for _, part in older[1:]}
+        for content in {id(content): content for content, _ in older[1:]}.values():
+            content.parts = [part for part in content.parts if id(part) not in dropped]
+        llm_request.contents = [content for content in llm_request.contents if content.parts]
 
     @override
     def process_planning_response(self, callback_context: CallbackContext, response_parts: List[types.Part]) -> Optional[List[types.Part]]:
@@ -34,38 +93,49 @@ class WhatsAppDeepReasonPlanner(BasePlanner):
             return None
 
         preserved_parts = []
-        first_fc_part_index = -1
-
-        for i, part in enumerate(response_parts):
-            # Handle function calls - stop at first one and preserve subsequent ones
-            if part.function_call is not None:
-                if not part.function_call.name:
-                    continue  # Skip empty function calls
-                preserved_parts.append(part)
-                if first_fc_part_index == -1:
-                    first_fc_part_index = i
-                    # Add subsequent function calls
-                    j = i + 1
-                    while j < len(response_parts) and response_parts[j].function_call is not None:
-                        if response_parts[j].function_call.name:
-                            preserved_parts.append(response_parts[j])
-                        j += 1
-                    break
-                continue
-
-            # Handle text parts
-            if part.text is not None:
-                self._handle_text_part(part, preserved_parts)
+        saw_function_call = False
+        # Consecutive plain text parts, scanned for tags as one text
+        text_run: List[types.Part] = []
 
+        # Single pass: keep every named function call, and the text parts
+        # that come before the first one
+        for part in response_parts:
+            function_call = part.function_call
+            if function_call is not None:
+                if function_call.name:  # Skip empty function calls
+                    self._flush_text_run(text_run, preserved_parts)
+                    preserved_parts.append(part)
+                    saw_function_call = True
+            elif not saw_function_call and part.text is not None:
+                if part.thought or part.thought_signature:
+                    # Parts carrying thought data are never merged
+                    self._flush_text_run(text_run, preserved_parts)
+                    self._handle_text_part(part, preserved_parts)
+                else:
+                    text_run.append(part)
+
+        self._flush_text_run(text_run, preserved_parts)
         return preserved_parts
 
+    def _flush_text_run(self, text_run: List[types.Part], preserved_parts: List[types.Part]):
+        if not text_run:
+            return
+        if len(text_run) == 1:
+            part = text_run[0]
+        else:
+            # One scan over the joined text also catches tags split across parts
+            part = types.Part(text=''.join(run_part.text for run_part in text_run))
+        text_run.clear()
+        self._handle_text_part(part, preserved_parts)
+
     def _handle_text_part(self, part: types.Part, preserved_parts: List[types.Part]):
         text = part.text
         if text is None:
             return
 
-        if self.FINAL_ANSWER_TAG in text:
-            reasoning_text, final_text = self._split_by_last_pattern(text, self.FINAL_ANSWER_TAG)
+        split = self._split_by_last_pattern(text, self.FINAL_ANSWER_TAG)
+        if split is not None:
+            reasoning_text, final_text = split
             if reasoning_text:
                 reasoning_part = types.Part(text=reasoning_text)
                 self._mark_as_thought(reasoning_part)
@@ -73,12 +143,7 @@ class WhatsAppDeepReasonPlanner(BasePlanner):
             if final_text:
                 preserved_parts.append(types.Part(text=final_text))
         else:
-            thinking_tags = [
-                self.THINK_TAG, self.INTUITION_TAG, self.HYPOTHESIS_TAG,
-                self.PLAN_TAG, self.OBSERVATION_TAG, self.REFLECTION_TAG,
-                self.REPLAN_TAG
-            ]
-            if any(tag in text for tag in thinking_tags):
+            if self._THOUGHT_RE.search(text):
                 self._mark_as_thought(part)
             preserved_parts.append(part)
 
@@ -86,11 +151,13 @@ class WhatsAppDeepReasonPlanner(BasePlanner):
         if response_part.text:
             response_part.thought = True
 
-    def _split_by_last_pattern(self, text: str, separator: str) -> tuple[str, str]:
+    def _split_by_last_pattern(self, text: str, separator: str) -> Optional[tuple[str, str]]:
+        # One rfind both detects the separator and locates the split point
         index = text.rfind(separator)
         if index == -1:
-            return text, ''
-        return text[:index + len(separator)], text[index + len(separator):]
+            return None
+        end = index + len(separator)
+        return text[:end], text[end:]
 
     def _build_cot_react_instruction(self) -> str:
         return f"""
@@ -101,7 +168,7 @@ You're a WhatsApp troubleshooting specialist for MoEngage. Think systematically
 IMPORTANT: Every internal reasoning section MUST start with its corresponding tag (e.g., /*THINK*/, /*ACTION*/, etc.). Do not omit these tags. Example:
 
 {self.THINK_TAG} Analyzing the WhatsApp campaign failure...
-{self.ACTION_TAG} [search_nodes: 'template rejection', search_facts: 'CMP98765']
+{self.ACTION_TAG} [search_nodes: 'template rejection', search_facts: 'CMP98765', search_facts: 'whatsapp delivery']
 {self.OBSERVATION_TAG} Memory shows similar cases...
 {self.FINAL_ANSWER_TAG} Your WhatsApp campaign failed due to template rejection...
 
@@ -131,8 +198,8 @@ IMPORTANT: Every internal reasoning section MUST start with its corresponding ta
 
 ### {self.ACTION_TAG} - Tool Execution
 Execute tools strategically:
-- Start with search_nodes/search_facts
-- If your memory search did not yield anything then fire with more broad queries like some thing big specific did not yield any result then search with more broad keywords like `whatsapp` `whatsapp delivery` etc based on that you can fire multiple queries around that.
+- Start with ONE batch of memory searches: emit every search_nodes/search_facts call you need (specific IDs and errors plus broader keywords like `whatsapp`, `whatsapp delivery`) in the same turn - calls in one turn run in parallel
+- Only search again if the whole batch yielded nothing useful
 - Get campaign details if ID available
 - Search logs using campaign dates
 - Store insights with add_episode
@@ -180,7 +247,7 @@ Ask for essentials:
 {self.INTUITION_TAG} "High failure rate often points to template issues or rate limits. Let's check template status first." [THOUGHT]
 {self.HYPOTHESIS_TAG} "Most likely: Template rejected. Alternative: Rate limit exceeded. Edge case: Invalid phone numbers." [THOUGHT]
 {self.PLAN_TAG} "1. Search memory for similar error patterns using search_nodes and search_facts. 2. Fetch campaign details and template status via MCP tools. 3. Analyze logs for error codes and delivery failures." [THOUGHT]
-{self.ACTION_TAG} "[search_nodes: 'template rejection', search_facts: 'CMP98765']" [THOUGHT + TOOL EXECUTION]
+{self.ACTION_TAG} "[search_nodes: 'template rejection', search_facts: 'CMP98765', search_facts: 'whatsapp delivery']" [THOUGHT + TOOL EXECUTION - one turn, run in parallel]
 {self.OBSERVATION_TAG} "Memory shows similar cases with template rejection errors. MCP tool confirms template was disapproved." [THOUGHT]
 {self.REFLECTION_TAG} "Template rejection confirmed as root cause. Advise on template correction and resubmission." [THOUGHT]
 {self.FINAL_ANSWER_TAG} "Your WhatsApp campaign 'CMP98765' failed due to template rejection. Please review the template for compliance with WhatsApp guidelines, correct any issues, and resubmit for approval. If you need help with template formatting, let me know!" [USER SEES THIS]
@@ -0,0 +1,121 @@
+"""
+Similarity-keyed cache for Discovery Engine search results.
+
+Queries are embedded into fixed-size, L2-normalized vectors and a lookup
+returns the cached payload of the most similar earlier query when the cosine
+similarity clears a threshold. Entries expire after a TTL and the least
+recently used entry is evicted when the cache is full.
+"""
+
+import functools
+import re
+import threading
+import time
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+
+# Dimensionality of the hashed query embeddings
+EMBEDDING_DIM = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for matching support questions
+_STOPWORDS = frozenset([
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by",
+    "at", "from", "is", "are", "was", "were", "be", "it", "its", "this", "that",
+    "my", "our", "we", "i", "me", "you", "your", "do", "does", "can", "how",
+    "what", "why", "when", "which", "about", "there", "any", "some"
+])
+
+
+def _normalize_token(token: str) -> str:
+    # Fold simple plurals so "notifications" and "notification" collide
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+@functools.lru_cache(maxsize=2048)
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embed a query as a hashed bag of unigrams and bigrams.
+
+    Word order and filler words mostly drop out, so rephrasings that share
+    their content words land close together. Returns an L2-normalized float32
+    vector of length EMBEDDING_DIM (all zeros when the query has no content
+    words). Results are memoized per query string, so the vector is returned
+    read-only.
+    """
+    tokens = [
+        _normalize_token(token)
+        for token in _TOKEN_RE.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in tokens:
+        vector[zlib.crc32(token.encode()) % EMBEDDING_DIM] += 1.0
+    for first, second in zip(tokens, tokens[1:]):
+        vector[zlib.crc32(f"{first} {second}".encode()) % EMBEDDING_DIM] += 0.5
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.flags.writeable = False
+    return vector
+
+
+class SemanticCache:
+    """
+    Fixed-capacity cache of payloads looked up by embedding similarity.
+
+    Embeddings live in one preallocated matrix, so a lookup is a single
+    matrix-vector product over all slots. Empty and expired slots hold zero
+    vectors and never clear the threshold.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, threshold: float):
+        self._ttl = ttl
+        self._threshold = threshold
+        self._vectors = np.zeros((max_entries, EMBEDDING_DIM), dtype=np.float32)
+        self._payloads: list = [None] * max_entries
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_access = np.zeros(max_entries, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def get(self, embedding: np.ndarray) -> Optional[Any]:
+        """Return the payload of the most similar live entry, or None."""
+        if not embedding.any():
+            return None
+        now = time.monotonic()
+        with self._lock:
+            similarities = self._vectors @ embedding
+            slot = int(similarities.argmax())
+            if similarities[slot] < self._threshold:
+                return None
+            if self._expires_at[slot] < now:
+                self._clear_slot(slot)
+                return None
+            self._last_access[slot] = now
+            return self._payloads[slot]
+
+    def put(self, embedding: np.ndarray, payload: Any) -> None:
+        """Store a payload, evicting the least recently used entry when full."""
+        if not embedding.any():
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Empty and expired slots have the oldest access times (0 or
+            # stale), so they are reused before any live entry is evicted
+            expired = self._expires_at < now
+            slot = int(np.where(expired, -1.0, self._last_access).argmin())
+            self._vectors[slot] = embedding
+            self._payloads[slot] = payload
+            self._expires_at[slot] = now + self._ttl
+            self._last_access[slot] = now
+
+    def _clear_slot(self, slot: int) -> None:
+        self._vectors[slot] = 0.0
+        self._payloads[slot] = None
+        self._expires_at[slot] = 0.0
+        self._last_access[slot] = 0.0
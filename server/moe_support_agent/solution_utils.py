@@ -6,20 +6,141 @@ performing root cause analysis, and generating comprehensive solutions and recom
 """
 
 import logging
-from typing import Dict, Any, Callable
+import re
+from typing import Dict, Any, Callable, FrozenSet, Optional, Sequence, Tuple
 from datetime import datetime
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-def analyze_root_cause(knowledge: str, execution: str) -> str:
+
+def _timestamp() -> str:
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def _compile_category_scanner(categories: Sequence[Tuple[str, Sequence[str]]]) -> "re.Pattern[str]":
+    """
+    Compile (category, keywords) pairs into one regex that reports every category
+    mentioned in a text in a single scan.
+
+    The zero-width lookahead yields a match at each position where a keyword
+    starts, so keywords nested inside other keywords are still found. At one
+    position only a single alternative can match, so no keyword may be a prefix
+    of another category's keyword.
+    """
+    for category, keywords in categories:
+        for other, other_keywords in categories:
+            if other != category and any(
+                keyword.startswith(other_keyword) for keyword in keywords for other_keyword in other_keywords
+            ):
+                raise ValueError(f"Keywords of {category!r} overlap keywords of {other!r} at the same position")
+    return re.compile("(?=(?:%s))" % "|".join(
+        f"(?P<{category}>{'|'.join(map(re.escape, keywords))})" for category, keywords in categories
+    ))
+
+
+def _matched_categories(scanner: "re.Pattern[str]", text_lower: str) -> FrozenSet[str]:
+    """Return the categories whose keywords occur in text_lower"""
+    category_count = len(scanner.groupindex)
+    matched = set()
+    for match in scanner.finditer(text_lower):
+        matched.add(match.lastgroup)
+        if len(matched) == category_count:
+            break
+    return frozenset(matched)
+
+
+# Root cause rules, in report order: category -> (keywords, root cause,
+# contributing factor)
+_KNOWLEDGE_ROOT_CAUSES = (
+    ("delivery", ('delivery', 'failed', 'not delivered', 'bounce'),
+     "Message delivery failure", "Delivery issues identified in knowledge base"),
+    ("rate_limit", ('rate limit', 'throttle', 'quota', 'limit exceeded'),
+     "API rate limiting", "Rate limiting constraints mentioned in documentation"),
+    ("template", ('template', 'approval', 'rejected', 'not approved'),
+     "Template approval issues", "Template-related problems found in knowledge base"),
+    ("webhook", ('webhook', 'callback', 'status update'),
+     "Webhook/status update issues", "Webhook configuration problems identified"),
+    ("phone_number", ('phone number', 'invalid', 'format', 'country code'),
+     "Phone number formatting issues", "Phone number validation problems documented"),
+)
+_EXECUTION_ROOT_CAUSES = (
+    ("errors", ('error', 'failed', 'exception', 'timeout'),
+     "Technical execution errors", "Error conditions detected in campaign logs"),
+    ("failed_status", ('status: failed', 'delivery_status: failed'),
+     "Campaign delivery failure", "Failed delivery status in campaign data"),
+    ("audience", ('no recipients', 'empty audience', 'zero users'),
+     "Audience targeting issues", "No valid recipients found in campaign execution"),
+    ("configuration", ('configuration', 'setup', 'missing parameter'),
+     "Campaign configuration issues", "Configuration problems identified in execution data"),
+)
+
+# Recommendation rules, in report order: category -> (keywords,
+# recommendation, immediate action or None, preventive measure or None)
+_KNOWLEDGE_RECOMMENDATIONS = (
+    ("delivery", ('delivery', 'failed', 'not delivered'), {
+        "category": "Delivery Issues",
+        "action": "Check WhatsApp Business API status and verify phone number validity",
+        "priority": "High",
+        "details": "Verify recipient phone numbers are in correct international format and WhatsApp-enabled"
+    }, "Validate phone number formats and WhatsApp availability", None),
+    ("rate_limit", ('rate limit', 'throttle', 'quota'), {
+        "category": "Rate Limiting",
+        "action": "Implement rate limiting controls and review API usage patterns",
+        "priority": "High",
+        "details": "Check current API usage against limits and implement exponential backoff"
+    }, None, "Set up monitoring for API rate limit thresholds"),
+    ("template", ('template', 'approval', 'rejected'), {
+        "category": "Template Issues",
+        "action": "Review and resubmit template for approval",
+        "priority": "Medium",
+        "details": "Ensure template follows WhatsApp Business API guidelines and policies"
+    }, "Check template approval status in WhatsApp Business Manager", None),
+    ("webhook", ('webhook', 'callback', 'status'), {
+        "category": "Webhook Configuration",
+        "action": "Verify webhook endpoint configuration and SSL certificate",
+        "priority": "Medium",
+        "details": "Ensure webhook URL is accessible and returns proper HTTP status codes"
+    }, None, None),
+)
+_EXECUTION_RECOMMENDATIONS = (
+    ("errors", ('error', 'failed', 'exception'), {
+        "category": "Error Resolution",
+        "action": "Review error logs and implement proper error handling",
+        "priority": "High",
+        "details": "Analyze specific error messages and implement retry mechanisms"
+    }, "Review campaign error logs for specific failure patterns", None),
+    ("configuration", ('configuration', 'setup', 'missing'), {
+        "category": "Configuration",
+        "action": "Review campaign configuration and required parameters",
+        "priority": "Medium",
+        "details": "Verify all required fields are properly configured"
+    }, None, "Implement configuration validation checks"),
+    ("audience", ('no recipients', 'empty audience', 'zero users'), {
+        "category": "Audience Targeting",
+        "action": "Review audience segmentation and targeting criteria",
+        "priority": "High",
+        "details": "Verify audience filters and ensure valid recipients exist"
+    }, "Check audience size and targeting parameters", None),
+)
+
+# One scanner per rule table, compiled once at import
+_KNOWLEDGE_ROOT_CAUSE_RE = _compile_category_scanner([(c, k) for c, k, *_ in _KNOWLEDGE_ROOT_CAUSES])
+_EXECUTION_ROOT_CAUSE_RE = _compile_category_scanner([(c, k) for c, k, *_ in _EXECUTION_ROOT_CAUSES])
+_KNOWLEDGE_RECOMMENDATION_RE = _compile_category_scanner([(c, k) for c, k, *_ in _KNOWLEDGE_RECOMMENDATIONS])
+_EXECUTION_RECOMMENDATION_RE = _compile_category_scanner([(c, k) for c, k, *_ in _EXECUTION_RECOMMENDATIONS])
+
+
+def analyze_root_cause(knowledge: str, execution: str, timestamp: Optional[str] = None) -> str:
     """
     Analyze the root cause of WhatsApp campaign issues based on knowledge and execution findings.
     
     Args:
         knowledge (str): Findings from knowledge agent (runbooks, Zendesk tickets)
         execution (str): Results from execution agent (campaign data, logs)
+        timestamp (Optional[str]): Report timestamp; defaults to the current time
     
     Returns:
         str: Root cause analysis with identified issues and contributing factors
@@ -30,51 +151,19 @@ def analyze_root_cause(knowledge: str, execution: str) -> str:
     root_causes = []
     contributing_factors = []
     
-    # Analyze knowledge findings for known issues
-    if knowledge and knowledge.strip():
-        knowledge_lower = knowledge.lower()
-        
-        # Common WhatsApp campaign issues from knowledge base
-        if any(term in knowledge_lower for term in ['delivery', 'failed', 'not delivered', 'bounce']):
-            root_causes.append("Message delivery failure")
-            contributing_factors.append("Delivery issues identified in knowledge base")
-        
-        if any(term in knowledge_lower for term in ['rate limit', 'throttle', 'quota', 'limit exceeded']):
-            root_causes.append("API rate limiting")
-            contributing_factors.append("Rate limiting constraints mentioned in documentation")
-        
-        if any(term in knowledge_lower for term in ['template', 'approval', 'rejected', 'not approved']):
-            root_causes.append("Template approval issues")
-            contributing_factors.append("Template-related problems found in knowledge base")
-        
-        if any(term in knowledge_lower for term in ['webhook', 'callback', 'status update']):
-            root_causes.append("Webhook/status update issues")
-            contributing_factors.append("Webhook configuration problems identified")
-        
-        if any(term in knowledge_lower for term in ['phone number', 'invalid', 'format', 'country code']):
-            root_causes.append("Phone number formatting issues")
-            contributing_factors.append("Phone number validation problems documented")
-    
-    # Analyze execution findings for technical issues
-    if execution and execution.strip():
-        execution_lower = execution.lower()
-        
-        # Technical issues from campaign data/logs
-        if any(term in execution_lower for term in ['error', 'failed', 'exception', 'timeout']):
-            root_causes.append("Technical execution errors")
-            contributing_factors.append("Error conditions detected in campaign logs")
-        
-        if any(term in execution_lower for term in ['status: failed', 'delivery_status: failed']):
-            root_causes.append("Campaign delivery failure")
-            contributing_factors.append("Failed delivery status in campaign data")
-        
-        if any(term in execution_lower for term in ['no recipients', 'empty audience', 'zero users']):
-            root_causes.append("Audience targeting issues")
-            contributing_factors.append("No valid recipients found in campaign execution")
-        
-        if any(term in execution_lower for term in ['configuration', 'setup', 'missing parameter']):
-            root_causes.append("Campaign configuration issues")
-            contributing_factors.append("Configuration problems identified in execution data")
+    # Analyze knowledge findings for known issues, then execution findings
+    # for technical issues; each text is lowercased and scanned once
+    for text, scanner, rules in (
+        (knowledge, _KNOWLEDGE_ROOT_CAUSE_RE, _KNOWLEDGE_ROOT_CAUSES),
+        (execution, _EXECUTION_ROOT_CAUSE_RE, _EXECUTION_ROOT_CAUSES)
+    ):
+        if not text or not text.strip():
+            continue
+        matched = _matched_categories(scanner, text.lower())
+        for category, _, root_cause, factor in rules:
+            if category in matched:
+                root_causes.append(root_cause)
+                contributing_factors.append(factor)
     
     # Build root cause analysis
     if not root_causes:
@@ -117,19 +206,20 @@ def analyze_root_cause(knowledge: str, execution: str) -> str:
             analysis += f"• {factor}\n"
         
         analysis += f"\n**Analysis Confidence:** {'High' if len(root_causes) >= 2 else 'Medium'}"
-        analysis += f"\n**Analysis Timestamp:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        analysis += f"\n**Analysis Timestamp:** {timestamp or _timestamp()}"
     
     logger.info(f"Root cause analysis completed. Found {len(root_causes)} primary causes.")
     return analysis
 
 
-def generate_recommendations(knowledge: str, execution: str) -> str:
+def generate_recommendations(knowledge: str, execution: str, timestamp: Optional[str] = None) -> str:
     """
     Generate actionable recommendations based on knowledge and execution findings.
     
     Args:
         knowledge (str): Findings from knowledge agent (runbooks, Zendesk tickets)
         execution (str): Results from execution agent (campaign data, logs)
+        timestamp (Optional[str]): Report timestamp; defaults to the current time
     
     Returns:
         str: Structured recommendations with specific action items
@@ -140,82 +230,22 @@ def generate_recommendations(knowledge: str, execution: str) -> str:
     immediate_actions = []
     preventive_measures = []
     
-    # Analyze knowledge for solution patterns
-    if knowledge and knowledge.strip():
-        knowledge_lower = knowledge.lower()
-        
-        # Delivery issue recommendations
-        if any(term in knowledge_lower for term in ['delivery', 'failed', 'not delivered']):
-            recommendations.append({
-                "category": "Delivery Issues",
-                "action": "Check WhatsApp Business API status and verify phone number validity",
-                "priority": "High",
-                "details": "Verify recipient phone numbers are in correct international format and WhatsApp-enabled"
-            })
-            immediate_actions.append("Validate phone number formats and WhatsApp availability")
-        
-        # Rate limiting recommendations
-        if any(term in knowledge_lower for term in ['rate limit', 'throttle', 'quota']):
-            recommendations.append({
-                "category": "Rate Limiting",
-                "action": "Implement rate limiting controls and review API usage patterns",
-                "priority": "High",
-                "details": "Check current API usage against limits and implement exponential backoff"
-            })
-            preventive_measures.append("Set up monitoring for API rate limit thresholds")
-        
-        # Template recommendations
-        if any(term in knowledge_lower for term in ['template', 'approval', 'rejected']):
-            recommendations.append({
-                "category": "Template Issues",
-                "action": "Review and resubmit template for approval",
-                "priority": "Medium",
-                "details": "Ensure template follows WhatsApp Business API guidelines and policies"
-            })
-            immediate_actions.append("Check template approval status in WhatsApp Business Manager")
-        
-        # Webhook recommendations
-        if any(term in knowledge_lower for term in ['webhook', 'callback', 'status']):
-            recommendations.append({
-                "category": "Webhook Configuration",
-                "action": "Verify webhook endpoint configuration and SSL certificate",
-                "priority": "Medium",
-                "details": "Ensure webhook URL is accessible and returns proper HTTP status codes"
-            })
-    
-    # Analyze execution data for technical recommendations
-    if execution and execution.strip():
-        execution_lower = execution.lower()
-        
-        # Error handling recommendations
-        if any(term in execution_lower for term in ['error', 'failed', 'exception']):
-            recommendations.append({
-                "category": "Error Resolution",
-                "action": "Review error logs and implement proper error handling",
-                "priority": "High",
-                "details": "Analyze specific error messages and implement retry mechanisms"
-            })
-            immediate_actions.append("Review campaign error logs for specific failure patterns")
-        
-        # Configuration issue recommendations
-        if any(term in execution_lower for term in ['configuration', 'setup', 'missing']):
-            recommendations.append({
-                "category": "Configuration",
-                "action": "Review campaign configuration and required parameters",
-                "priority": "Medium",
-                "details": "Verify all required fields are properly configured"
-            })
-            preventive_measures.append("Implement configuration validation checks")
-        
-        # Audience targeting recommendations
-        if any(term in execution_lower for term in ['no recipients', 'empty audience', 'zero users']):
-            recommendations.append({
-                "category": "Audience Targeting",
-                "action": "Review audience segmentation and targeting criteria",
-                "priority": "High",
-                "details": "Verify audience filters and ensure valid recipients exist"
-            })
-            immediate_actions.append("Check audience size and targeting parameters")
+    # Analyze knowledge for solution patterns, then execution data for
+    # technical recommendations; each text is lowercased and scanned once
+    for text, scanner, rules in (
+        (knowledge, _KNOWLEDGE_RECOMMENDATION_RE, _KNOWLEDGE_RECOMMENDATIONS),
+        (execution, _EXECUTION_RECOMMENDATION_RE, _EXECUTION_RECOMMENDATIONS)
+    ):
+        if not text or not text.strip():
+            continue
+        matched = _matched_categories(scanner, text.lower())
+        for category, _, recommendation, immediate_action, preventive_measure in rules:
+            if category in matched:
+                recommendations.append(recommendation)
+                if immediate_action:
+                    immediate_actions.append(immediate_action)
+                if preventive_measure:
+                    preventive_measures.append(preventive_measure)
     
     # Build recommendations output
     if not recommendations:
@@ -264,7 +294,7 @@ def generate_recommendations(knowledge: str, execution: str) -> str:
             rec_output += "\n"
         
         rec_output += f"**Total Recommendations:** {len(recommendations)}\n"
-        rec_output += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        rec_output += f"**Generated:** {timestamp or _timestamp()}"
     
     logger.info(f"Generated {len(recommendations)} recommendations.")
     return rec_output
@@ -272,16 +302,18 @@ def generate_recommendations(knowledge: str, execution: str) -> str:
 
 def generate_final_solution(
     session_state: Dict[str, Any],
-    analyze_root_cause_func: Callable[[str, str], str],
-    generate_recommendations_func: Callable[[str, str], str]
+    analyze_root_cause_func: Callable[..., str],
+    generate_recommendations_func: Callable[..., str]
 ) -> str:
     """
     Generate comprehensive final solution based on all gathered information.
     
     Args:
         session_state (Dict[str, Any]): Session state containing all investigation findings
-        analyze_root_cause_func (Callable): Function to perform root cause analysis
-        generate_recommendations_func (Callable): Function to generate recommendations
+        analyze_root_cause_func (Callable): Function to perform root cause analysis,
+            called as func(knowledge, execution, timestamp=...)
+        generate_recommendations_func (Callable): Function to generate recommendations,
+            called as func(knowledge, execution, timestamp=...)
     
     Returns:
         str: Comprehensive final solution with analysis and recommendations
@@ -294,11 +326,14 @@ def generate_final_solution(
     execution_results = session_state.get("execution_results", "")
     investigation_phase = session_state.get("investigation_phase", "unknown")
     
+    # One timestamp for the whole report and its sections
+    timestamp = _timestamp()
+    
     # Perform root cause analysis
-    root_cause_analysis = analyze_root_cause_func(knowledge_findings, execution_results)
+    root_cause_analysis = analyze_root_cause_func(knowledge_findings, execution_results, timestamp=timestamp)
     
     # Generate recommendations
-    recommendations = generate_recommendations_func(knowledge_findings, execution_results)
+    recommendations = generate_recommendations_func(knowledge_findings, execution_results, timestamp=timestamp)
     
     # Build comprehensive solution
     solution = f"""# 🔍 MoEngage WhatsApp Campaign Support Analysis
@@ -309,7 +344,7 @@ def generate_final_solution(
 
 **Investigation Phase:** {investigation_phase}
 
-**Analysis Timestamp:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Analysis Timestamp:** {timestamp}
 
 ---
 
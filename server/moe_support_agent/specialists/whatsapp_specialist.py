@@ -23,6 +23,7 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from config import config
+from ..context_cache import ContextCache
 from ..planner.whatsapp_planner import WhatsAppDeepReasonPlanner
 
 # Get MCP configuration
@@ -34,6 +35,16 @@ class WhatsAppTroubleshootAgent(LlmAgent):
     """WhatsApp troubleshooting specialist."""
     
     def __init__(self):
+        # The agent prompt, ADK's identity/transfer text and the planner's
+        # CoT instruction form one static system instruction; serve it and
+        # the MCP tool declarations from a context cache
+        context_cache = None
+        if config.context_cache_config["enabled"]:
+            context_cache = ContextCache(
+                config.context_cache_config["ttl_seconds"],
+                display_name="WhatsAppTroubleshootAgent"
+            ).before_model
+        
         super().__init__(
             name="WhatsAppTroubleshootAgent",
             model=config.model_config["whatsapp"],
@@ -48,7 +59,8 @@ class WhatsAppTroubleshootAgent(LlmAgent):
                     )
                 ),
             ],
-            planner=WhatsAppDeepReasonPlanner()
+            planner=WhatsAppDeepReasonPlanner(),
+            before_model_callback=context_cache,
         )
     
     def _get_technical_prompt(self) -> str: